@@ -1,20 +1,84 @@
 """
 Chat API Endpoints
 Handles SSE streaming and chat interactions
+Updated: 2026-10-19 - Streams for sessions owned by another worker are forwarded there
+Updated: 2026-10-19 - Non-streaming turn endpoint (all answers in one payload, one deadline)
 """
 
 from fastapi import APIRouter, HTTPException, Request, Depends
 from fastapi.responses import StreamingResponse
 from sse_starlette.sse import EventSourceResponse
-from models.schemas import CreateSessionRequest, StreamingResponse as StreamResponse
-from core.session_manager import SessionManager
+from models.schemas import CreateSessionRequest, CompleteTurnRequest, StreamingResponse as StreamResponse
+from core.session_manager import SessionManager, SessionOwnedElsewhere
 from typing import AsyncGenerator, Dict, List, Any, Optional
+import httpx
 import json
 from loguru import logger
 
 
 router = APIRouter()
 
+# Marks a request relayed from another worker so it is never forwarded twice
+FORWARDED_HEADER = "X-GroupChat-Forwarded"
+
+
+def _upstream_detail(upstream: httpx.Response) -> Any:
+    """Error detail from the owning worker; the raw body if it is not JSON (e.g. a proxy error page)"""
+    try:
+        body = upstream.json()
+    except ValueError:
+        return upstream.text
+    return body.get("detail", body) if isinstance(body, dict) else body
+
+
+async def _forward_stream(owner_url: str, request: Request) -> StreamingResponse:
+    """Relay the SSE stream from the worker that owns the session"""
+    client = httpx.AsyncClient(timeout=None)
+    try:
+        upstream = await client.send(client.build_request(
+            "GET",
+            f"{owner_url.rstrip('/')}{request.url.path}",
+            params=request.query_params,
+            headers={FORWARDED_HEADER: "1"}
+        ), stream=True)
+    except Exception:
+        await client.aclose()
+        raise
+    
+    # Errors are relayed with their status, not as the body of a 200 event stream
+    if upstream.status_code != 200:
+        await upstream.aread()
+        await upstream.aclose()
+        await client.aclose()
+        raise HTTPException(status_code=upstream.status_code, detail=_upstream_detail(upstream))
+    
+    async def relay():
+        try:
+            async for chunk in upstream.aiter_raw():
+                yield chunk
+        finally:
+            await upstream.aclose()
+            await client.aclose()
+    
+    return StreamingResponse(relay(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+async def _forward_request(owner_url: str, request: Request, body: Dict[str, Any]) -> Dict[str, Any]:
+    """Relay a JSON request to the worker that owns the session"""
+    async with httpx.AsyncClient(timeout=None) as client:
+        upstream = await client.post(
+            f"{owner_url.rstrip('/')}{request.url.path}",
+            json=body,
+            headers={FORWARDED_HEADER: "1"}
+        )
+    if upstream.status_code != 200:
+        raise HTTPException(status_code=upstream.status_code, detail=_upstream_detail(upstream))
+    try:
+        return upstream.json()
+    except ValueError:
+        # Something between the workers answered instead of the owner
+        raise HTTPException(status_code=502, detail=upstream.text)
+
 
 @router.post("/sessions/create", response_model=Dict[str, Any])
 async def create_session(
@@ -51,9 +115,15 @@ async def stream_chat(
     SSE endpoint for streaming concurrent AI responses
     This is where the magic happens - multiple models respond simultaneously
     """
-    # Verify session exists
-    session = session_manager.get_session(session_id)
-    if not session:
+    # Verify session exists and is served here, or forward to the worker that owns it
+    try:
+        await session_manager.claim_session(session_id)
+    except SessionOwnedElsewhere as owned:
+        if owned.owner_url and FORWARDED_HEADER not in request.headers:
+            logger.info(f"Forwarding stream for session {session_id} to worker {owned.owner}")
+            return await _forward_stream(owned.owner_url, request)
+        raise HTTPException(status_code=409, detail=f"Session is owned by worker {owned.owner}")
+    except ValueError:
         raise HTTPException(status_code=404, detail="Session not found")
     
     async def event_generator() -> AsyncGenerator[str, None]:
@@ -74,6 +144,18 @@ async def stream_chat(
             # Stream responses from all models
             response_count = 0
             async for response in session_manager.stream_responses(session_id, message):
+                # Provisional semantic synapse detected mid-stream
+                if response.metadata.get("event") == "synapse_preview":
+                    yield {
+                        "event": "synapse_preview",
+                        "data": json.dumps({
+                            "model": response.model_source,
+                            "building_on": response.synapse_detected,
+                            **response.metadata
+                        })
+                    }
+                    continue
+                
                 response_count += 1
                 # Format as SSE event
                 event_data = {
@@ -100,6 +182,16 @@ async def stream_chat(
                     "data": json.dumps(event_data)
                 }
                 
+                # Final detection confirms or retracts earlier previews
+                if response.is_complete and response.metadata.get("synapse_reconciliation"):
+                    yield {
+                        "event": "synapse_reconciled",
+                        "data": json.dumps({
+                            "model": response.model_source,
+                            **response.metadata["synapse_reconciliation"]
+                        })
+                    }
+                
                 # If this completes a message, send completion event
                 if response.is_complete:
                     yield {
@@ -132,13 +224,43 @@ async def stream_chat(
     return EventSourceResponse(event_generator())
 
 
+@router.post("/{session_id}/complete", response_model=Dict[str, Any])
+async def complete_turn(
+    session_id: str,
+    turn: CompleteTurnRequest,
+    request: Request,
+    session_manager: SessionManager = Depends()
+):
+    """
+    Non-streaming turn for batch jobs and webhooks: every panelist answers
+    concurrently and the whole turn (responses, failures, synapses) comes
+    back in one payload. Panelists still running at the deadline are
+    cancelled and listed under failures.
+    """
+    try:
+        await session_manager.claim_session(session_id)
+    except SessionOwnedElsewhere as owned:
+        if owned.owner_url and FORWARDED_HEADER not in request.headers:
+            logger.info(f"Forwarding turn for session {session_id} to worker {owned.owner}")
+            return await _forward_request(owned.owner_url, request, turn.model_dump())
+        raise HTTPException(status_code=409, detail=f"Session is owned by worker {owned.owner}")
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    try:
+        return await session_manager.complete_responses(session_id, turn.message, turn.deadline_seconds)
+    except Exception as e:
+        logger.error(f"Error completing turn for session {session_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{session_id}/status", response_model=Dict[str, Any])
 async def get_session_status(
     session_id: str,
     session_manager: SessionManager = Depends()
 ):
     """Get current status of all models in a session"""
-    session = session_manager.get_session(session_id)
+    session = await session_manager.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -160,7 +282,7 @@ async def get_synapse_events(
     session_manager: SessionManager = Depends()
 ):
     """Get all synapse/collaboration events for a session"""
-    session = session_manager.get_session(session_id)
+    session = await session_manager.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -13,7 +13,7 @@ async def get_session_details(
     session_manager: SessionManager = Depends()
 ):
     """Get detailed session information for debugging"""
-    session = session_manager.get_session(session_id)
+    session = await session_manager.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -1,14 +1,16 @@
 """
 Personas API Endpoints
 Manages user-created AI personas
+Updated: 2026-10-19 - Personas persisted in SQLite with cursor pagination
+Updated: 2026-10-19 - Default personas follow the persona registry
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
-from datetime import datetime
 from loguru import logger
-import uuid
+from database.persona_store import persona_store
+from providers.persona_registry import persona_registry
 
 router = APIRouter()
 
@@ -39,52 +41,71 @@ class UpdatePersonaRequest(BaseModel):
     custom_settings: Optional[Dict[str, Any]] = None
     is_public: Optional[bool] = None
 
-# In-memory storage for now (would be database in production)
-user_personas_store: Dict[str, Dict[str, Any]] = {}
+# Default personas as listed, rebuilt only when the persona registry reloads
+_default_personas: List[Dict[str, Any]] = []
+_default_personas_version: Optional[int] = None
+
+
+def get_default_personas() -> List[Dict[str, Any]]:
+    """The personas.yaml personas in list format (cached per registry version)"""
+    global _default_personas, _default_personas_version
+    snapshot = persona_registry.snapshot()
+    if snapshot.version != _default_personas_version:
+        _default_personas = [
+            {
+                "id": f"default-{persona_id}",
+                "name": personality.role,
+                "is_default": True,
+                "is_public": True,
+                "provider": personality.provider,
+                "model_name": personality.model_name,
+                "role": personality.role,
+                "icon": personality.icon,
+                "prompt_prefix": personality.prompt_prefix,
+                "collaboration_style": personality.collaboration_style,
+                "color_theme": personality.color_theme
+            }
+            for persona_id, personality in snapshot.personas.items()
+        ]
+        _default_personas_version = snapshot.version
+    return _default_personas
+
+
+def _persona_response(persona) -> Dict[str, Any]:
+    return {**persona.to_dict(), "is_default": False}
 
 
 @router.get("/", response_model=List[Dict[str, Any]])
 async def list_personas(
+    response: Response,
     user_id: str = Query(..., description="User ID"),
     include_public: bool = Query(True, description="Include public personas"),
-    include_defaults: bool = Query(True, description="Include default personas")
+    include_defaults: bool = Query(True, description="Include default personas"),
+    limit: int = Query(50, ge=1, le=200, description="User personas per page"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page")
 ):
-    """List all personas available to a user"""
+    """
+    List all personas available to a user
+    User personas are paged newest first; the next page's cursor is returned
+    in the X-Next-Cursor header. Defaults are included on the first page only.
+    """
     try:
         personas = []
         
         # Add default personas if requested
-        if include_defaults:
-            from providers.model_factory import ModelFactory
-            default_personas = ModelFactory.load_personas()
-            for persona_id, personality in default_personas.items():
-                personas.append({
-                    "id": f"default-{persona_id}",
-                    "name": personality.role,
-                    "is_default": True,
-                    "is_public": True,
-                    "provider": personality.provider,
-                    "model_name": personality.model_name,
-                    "role": personality.role,
-                    "icon": personality.icon,
-                    "prompt_prefix": personality.prompt_prefix,
-                    "collaboration_style": personality.collaboration_style,
-                    "color_theme": personality.color_theme
-                })        
+        if include_defaults and not cursor:
+            personas.extend(get_default_personas())
+        
         # Add user personas
-        for persona_id, persona in user_personas_store.items():
-            if persona["user_id"] == user_id or (include_public and persona.get("is_public")):
-                if persona.get("is_active", True):
-                    personas.append({
-                        "id": persona_id,
-                        "name": persona["name"],
-                        "is_default": False,
-                        "is_public": persona.get("is_public", False),
-                        **persona
-                    })
+        page, next_cursor = await persona_store.list_for_user(user_id, include_public, limit, cursor)
+        personas.extend(_persona_response(persona) for persona in page)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         
         return personas
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing personas: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -97,30 +118,10 @@ async def create_persona(
 ):
     """Create a new custom persona"""
     try:
-        persona_id = str(uuid.uuid4())
+        persona = await persona_store.create(user_id, request.model_dump())
         
-        persona = {
-            "id": persona_id,
-            "user_id": user_id,
-            "name": request.name,
-            "provider": request.provider,
-            "model_name": request.model_name,
-            "role": request.role,
-            "icon": request.icon,
-            "prompt_prefix": request.prompt_prefix,
-            "collaboration_style": request.collaboration_style,
-            "color_theme": request.color_theme,
-            "custom_settings": request.custom_settings,
-            "is_public": request.is_public,
-            "is_active": True,
-            "created_at": datetime.utcnow().isoformat(),
-            "updated_at": datetime.utcnow().isoformat()
-        }
-        
-        user_personas_store[persona_id] = persona
-        
-        logger.info(f"Created persona {persona_id} for user {user_id}")
-        return persona
+        logger.info(f"Created persona {persona.id} for user {user_id}")
+        return persona.to_dict()
         
     except Exception as e:
         logger.error(f"Error creating persona: {e}")
@@ -134,37 +135,19 @@ async def update_persona(
 ):
     """Update an existing persona"""
     try:
-        if persona_id not in user_personas_store:
+        persona = await persona_store.get(persona_id)
+        if not persona:
             raise HTTPException(status_code=404, detail="Persona not found")
         
-        persona = user_personas_store[persona_id]
-        
         # Check ownership
-        if persona["user_id"] != user_id:
+        if persona.user_id != user_id:
             raise HTTPException(status_code=403, detail="Not authorized to update this persona")
         
         # Update fields
-        if request.name is not None:
-            persona["name"] = request.name
-        if request.role is not None:
-            persona["role"] = request.role
-        if request.icon is not None:
-            persona["icon"] = request.icon
-        if request.prompt_prefix is not None:
-            persona["prompt_prefix"] = request.prompt_prefix
-        if request.collaboration_style is not None:
-            persona["collaboration_style"] = request.collaboration_style
-        if request.color_theme is not None:
-            persona["color_theme"] = request.color_theme
-        if request.custom_settings is not None:
-            persona["custom_settings"] = request.custom_settings
-        if request.is_public is not None:
-            persona["is_public"] = request.is_public
-        
-        persona["updated_at"] = datetime.utcnow().isoformat()
+        persona = await persona_store.update(persona_id, request.model_dump(exclude_none=True))
         
         logger.info(f"Updated persona {persona_id}")
-        return persona
+        return persona.to_dict()
         
     except HTTPException:
         raise
@@ -180,18 +163,16 @@ async def delete_persona(
 ):
     """Delete a persona (soft delete)"""
     try:
-        if persona_id not in user_personas_store:
+        persona = await persona_store.get(persona_id)
+        if not persona:
             raise HTTPException(status_code=404, detail="Persona not found")
         
-        persona = user_personas_store[persona_id]
-        
         # Check ownership
-        if persona["user_id"] != user_id:
+        if persona.user_id != user_id:
             raise HTTPException(status_code=403, detail="Not authorized to delete this persona")
         
         # Soft delete
-        persona["is_active"] = False
-        persona["updated_at"] = datetime.utcnow().isoformat()
+        await persona_store.deactivate(persona_id)
         
         logger.info(f"Deleted persona {persona_id}")
         return {"message": "Persona deleted successfully"}
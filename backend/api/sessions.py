@@ -48,7 +48,7 @@ async def get_session(
     session_manager: SessionManager = Depends()
 ):
     """Get detailed session information"""
-    session = session_manager.get_session(session_id)
+    session = await session_manager.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -89,7 +89,7 @@ async def end_session(
     session_manager: SessionManager = Depends()
 ):
     """End an active session"""
-    session = session_manager.get_session(session_id)
+    session = await session_manager.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
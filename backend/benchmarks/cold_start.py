@@ -0,0 +1,66 @@
+"""
+Cold Start Benchmark
+Measures how long `import main` takes with the semantic model loaded lazily
+versus the previous behaviour of loading it at import time.
+
+Usage (from backend/):
+    python -m benchmarks.cold_start [--runs 3]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Time until the app object is importable (what uvicorn waits for)
+LAZY_SNIPPET = """
+import time
+t = time.perf_counter()
+import main
+print(time.perf_counter() - t)
+"""
+
+# Previous behaviour: the model was built as a side effect of the import
+EAGER_SNIPPET = """
+import time
+t = time.perf_counter()
+import main
+from memory.semantic_synapse_detector import semantic_detector
+semantic_detector._load_model()
+print(time.perf_counter() - t)
+"""
+
+
+def _run(snippet: str) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    
+    lazy = [_run(LAZY_SNIPPET) for _ in range(args.runs)]
+    eager = [_run(EAGER_SNIPPET) for _ in range(args.runs)]
+    
+    lazy_median = statistics.median(lazy)
+    eager_median = statistics.median(eager)
+    
+    print(f"import main (lazy model):       {lazy_median:.3f}s median over {args.runs} runs")
+    print(f"import main + model load (old): {eager_median:.3f}s median over {args.runs} runs")
+    print(f"cold-start reduction:           {eager_median - lazy_median:.3f}s "
+          f"({(1 - lazy_median / eager_median) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Fixed benchmark corpus
+Deterministic panel discussions used by the benchmark scripts
+"""
+
+from typing import List, Tuple
+import random
+
+# (speaker, message) threads; later messages build on, agree with or
+# clarify earlier ones so synapse detection has something to find
+PANEL_THREADS: List[List[Tuple[str, str]]] = [
+    [
+        ("user", "Help me design a REST API for a multi-tenant invoicing product."),
+        ("gpt-4o", "Start with resource-oriented URLs scoped by tenant, such as /tenants/{id}/invoices, and version the API in the path so clients can migrate deliberately."),
+        ("claude-3.5", "Building on the tenant-scoped URLs, I would add idempotency keys on invoice creation so retried requests never double-bill a customer."),
+        ("gemini-1.5", "I agree with both points. The data shows most billing incidents come from retries, so idempotency keys plus path versioning cover the riskiest failure modes."),
+        ("gpt-4o", "To clarify the versioning point: only breaking changes should bump the version; additive fields can ship within v1."),
+        ("claude-3.5", "Combining the idempotency and versioning ideas, we get an integrated approach where every write is safe to retry and every contract change is explicit."),
+    ],
+    [
+        ("user", "How should a small team approach observability for a new service?"),
+        ("gemini-1.5", "Begin with the four golden signals: latency, traffic, errors and saturation, collected as metrics with consistent labels."),
+        ("gpt-4o", "Adding to the golden signals, structured logs with a request id make it possible to jump from a metric spike to the exact failing requests."),
+        ("claude-3.5", "Exactly right. I would also sample traces at the edge so the request id ties logs, metrics and traces together."),
+        ("gemini-1.5", "More specifically, keep label cardinality low; per-user labels on metrics will blow up storage costs quickly."),
+        ("gpt-4o", "Synthesizing everything: golden-signal metrics with bounded labels, structured logs keyed by request id, and sampled traces joined on the same id."),
+    ],
+    [
+        ("user", "What is a good strategy for migrating a monolith database to services?"),
+        ("claude-3.5", "Use the strangler pattern: carve out one bounded context at a time and let the new service own its tables outright."),
+        ("gpt-4o", "Following up on the strangler pattern, change data capture from the monolith can keep the new service's tables in sync during the transition."),
+        ("gemini-1.5", "Absolutely, and measure replication lag continuously; a migration is only safe to cut over when lag is consistently near zero."),
+        ("claude-3.5", "In other words, the cutover criterion is a metric, not a date."),
+        ("gpt-4o", "Bringing together the strangler pattern, change data capture and lag-based cutover gives a migration plan that can pause at any step."),
+    ],
+    [
+        ("user", "How do we keep a design system consistent across web and mobile?"),
+        ("gemini-1.5", "Define design tokens for color, spacing and type in one source of truth and generate platform-specific outputs from it."),
+        ("claude-3.5", "Expanding on design tokens, a visual regression suite on key screens catches drift that tokens alone cannot prevent."),
+        ("gpt-4o", "I strongly agree; tokens plus visual regression tests give both prevention and detection."),
+        ("gemini-1.5", "To be clear, tokens should be semantic, like color.danger, rather than raw values, so themes can change without touching components."),
+        ("claude-3.5", "Integrating semantic tokens, generated outputs and visual regression tests gives a system that stays consistent by construction."),
+    ],
+    [
+        ("user", "Should we adopt feature flags for our release process?"),
+        ("gpt-4o", "Yes: feature flags decouple deploy from release, so code can ship dark and be enabled gradually per cohort."),
+        ("gemini-1.5", "Furthermore, flags need an owner and an expiry date, otherwise stale flags accumulate and make the code hard to reason about."),
+        ("claude-3.5", "Spot on about expiry. A lint rule that fails the build on expired flags keeps the debt visible."),
+        ("gpt-4o", "What I mean is that flags are a release tool, not a permanent configuration system."),
+        ("gemini-1.5", "Taking both the gradual rollout and the expiry discipline into account, flags become safe to use at scale."),
+    ],
+]
+
+# Sentences used to lengthen messages so sequence-length limits matter
+ELABORATIONS = [
+    "This matters most when several teams depend on the same interface and cannot coordinate releases.",
+    "In practice the cost shows up months later, when the original authors have moved on.",
+    "We have seen this pattern succeed when it is introduced incrementally rather than all at once.",
+    "The trade-off is extra upfront work in exchange for fewer production incidents.",
+    "Measuring the outcome before and after the change keeps the discussion grounded in evidence.",
+    "It also gives new team members a clear mental model of how the pieces fit together.",
+]
+
+
+def panel_threads(elaborate: int = 0, seed: int = 7) -> List[List[Tuple[str, str]]]:
+    """Corpus threads, optionally lengthened with `elaborate` extra sentences per message"""
+    rng = random.Random(seed)
+    threads = []
+    for thread in PANEL_THREADS:
+        threads.append([
+            (speaker, text if speaker == "user" or not elaborate
+             else " ".join([text] + [rng.choice(ELABORATIONS) for _ in range(elaborate)]))
+            for speaker, text in thread
+        ])
+    return threads
@@ -0,0 +1,139 @@
+"""
+Orchestration Overhead Benchmark
+Replays a cassette corpus through StreamingOrchestrator and reports the time
+the orchestration adds on its own: memory updates, synapse detection, context
+building and per-chunk event creation, without any provider latency noise.
+
+Each turn is replayed twice with the same recorded streams: once through
+stream_concurrent_responses, once by draining the replay providers directly
+and concurrently. The difference is the orchestration overhead.
+
+Cassettes are recorded with PROVIDER_CASSETTE_DIR (see providers/cassette.py).
+Without any, a corpus is synthesized from benchmarks/corpus.py, timed with
+each model's streaming traits from config/models.yaml.
+
+Usage (from backend/):
+    python -m benchmarks.orchestration_overhead [CASSETTE_OR_DIR ...] [--speed 0] [--rounds 3]
+"""
+
+import argparse
+import asyncio
+import re
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from loguru import logger
+from benchmarks.corpus import panel_threads
+from memory.group_memory import GroupMemory
+from providers.cassette import Cassette, ReplayProvider
+from providers.model_capabilities import model_capabilities
+from providers.persona_registry import persona_registry
+from streaming.streaming_orchestrator import StreamingOrchestrator
+
+TOKEN = re.compile(r"\S+\s*")
+
+
+def synthesize_corpus(elaborate: int = 2) -> List[Cassette]:
+    """One cassette per corpus thread, every panelist answering every turn"""
+    personas = persona_registry.personas()
+    cassettes = []
+    for index, thread in enumerate(panel_threads(elaborate=elaborate)):
+        question = thread[0][1]
+        answers: Dict[str, List[str]] = {}
+        for speaker, text in thread[1:]:
+            answers.setdefault(speaker, []).append(text)
+
+        cassette = Cassette(Path(f"synthetic-{index}.jsonl"))
+        turns = max(len(texts) for texts in answers.values())
+        for call in range(turns):
+            for panelist, texts in answers.items():
+                persona = personas[panelist]
+                traits = model_capabilities.get(persona.model_name).streaming
+                tokens = TOKEN.findall(texts[call % len(texts)])
+                chunks = [[traits.time_to_first_token_ms if i == 0 else round(1000 / traits.tokens_per_second, 2), token]
+                          for i, token in enumerate(tokens)]
+                cassette.entries.append({
+                    "panelist": panelist, "call": call,
+                    "provider": persona.provider, "model": persona.model_name, "role": persona.role,
+                    "input": question if call == 0 else "Build on each other's points.",
+                    "usage": None, "chunks": chunks
+                })
+        cassettes.append(cassette)
+    return cassettes
+
+
+async def _drain(stream) -> int:
+    return sum([1 async for _ in stream])
+
+
+async def _replay_direct(cassette: Cassette, speed: float) -> List[float]:
+    """Seconds per turn, draining the replay streams concurrently"""
+    providers = ReplayProvider.for_cassette(cassette, speed)
+    timings = []
+    for turn in cassette.turns():
+        user_input = next(iter(turn.values()))["input"]
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            _drain(providers[panelist].generate_stream([{"role": "user", "content": user_input}]))
+            for panelist in turn
+        ])
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def _replay_orchestrated(cassette: Cassette, speed: float, session: str) -> List[float]:
+    """Seconds per turn through StreamingOrchestrator"""
+    orchestrator = StreamingOrchestrator(GroupMemory(session))
+    for panelist, provider in ReplayProvider.for_cassette(cassette, speed).items():
+        orchestrator.add_provider(panelist, provider)
+    timings = []
+    for turn in cassette.turns():
+        user_input = next(iter(turn.values()))["input"]
+        started = time.perf_counter()
+        async for _ in orchestrator.stream_concurrent_responses(user_input):
+            pass
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def run(cassettes: List[Cassette], speed: float, rounds: int):
+    turns = sum(len(c.turns()) for c in cassettes)
+    chunks = sum(len(entry["chunks"]) for c in cassettes for entry in c.entries)
+    print(f"{len(cassettes)} cassettes, {turns} turns, {chunks} chunks, speed {speed or 'no delay'}")
+
+    # Warm-up: first-use imports, lazy models, tokenizers
+    await _replay_orchestrated(cassettes[0], 0, "warmup")
+
+    direct, orchestrated = [], []
+    for round_index in range(rounds):
+        direct.append(0.0)
+        orchestrated.append(0.0)
+        for index, cassette in enumerate(cassettes):
+            direct[-1] += sum(await _replay_direct(cassette, speed))
+            orchestrated[-1] += sum(await _replay_orchestrated(cassette, speed, f"bench-{round_index}-{index}"))
+
+    direct_total = statistics.median(direct)
+    orchestrated_total = statistics.median(orchestrated)
+    overhead = orchestrated_total - direct_total
+    print(f"direct replay:   {direct_total * 1000:9.1f}ms per corpus (median of {rounds} rounds)")
+    print(f"orchestrated:    {orchestrated_total * 1000:9.1f}ms per corpus")
+    print(f"overhead:        {overhead * 1000:9.1f}ms = {overhead * 1000 / turns:.2f}ms/turn, "
+          f"{overhead * 1e6 / chunks:.1f}µs/chunk")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cassettes", nargs="*", help="cassette files or directories (default: synthesized corpus)")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = recorded pace, N = N times faster, 0 = no delay")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    logger.remove()
+    cassettes = Cassette.load_corpus(args.cassettes) if args.cassettes else synthesize_corpus()
+    asyncio.run(run(cassettes, args.speed, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Persona Store Benchmark
+Latency of listing one user's first persona page as the number of stored
+personas grows: the indexed SQLite PersonaStore against the previous full
+scan of an in-memory dict (which also rebuilt the default personas per call).
+
+Usage (from backend/):
+    python -m benchmarks.persona_store [--sizes 1000,10000,100000] [--per-user 100] [--limit 50]
+
+Personas are spread over size / per-user owners, so every listed page is full.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from loguru import logger
+from sqlalchemy import insert
+from database.models import UserPersona
+from database.persona_store import PersonaStore
+
+
+def _persona(user_id: str, created_at: datetime) -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()), "user_id": user_id, "name": "Bench persona",
+        "provider": "openai", "model_name": "gpt-4o", "role": "Analyst", "icon": "*",
+        "prompt_prefix": "You are a careful analyst.", "collaboration_style": "builder",
+        "color_theme": "blue", "custom_settings": {}, "created_at": created_at,
+        "updated_at": created_at, "is_public": random.random() < 0.02, "is_active": True
+    }
+
+
+def _scan(store: Dict[str, Dict[str, Any]], user_id: str) -> List[Dict[str, Any]]:
+    # The former list_personas loop
+    return [
+        persona for persona in store.values()
+        if (persona["user_id"] == user_id or persona["is_public"]) and persona["is_active"]
+    ]
+
+
+async def _best_ms(operation, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await operation()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+async def run(sizes: List[int], per_user: int, limit: int, repeats: int):
+    random.seed(7)
+    workdir = tempfile.mkdtemp(prefix="persona-store-")
+    print(f"{'personas':>9} {'dict scan ms':>13} {'store page ms':>14}")
+
+    for size in sizes:
+        users = [f"user-{i}" for i in range(max(1, size // per_user))]
+        store = PersonaStore(f"sqlite+aiosqlite:///{os.path.join(workdir, f'{size}.db')}")
+        await store.initialize()
+        started = datetime.utcnow() - timedelta(days=365)
+        rows = [_persona(random.choice(users), started + timedelta(seconds=i)) for i in range(size)]
+        async with store._engine.begin() as connection:
+            await connection.execute(insert(UserPersona), rows)
+        legacy = {row["id"]: row for row in rows}
+
+        user_id = users[0]
+
+        async def scan():
+            return _scan(legacy, user_id)
+
+        scan_ms = await _best_ms(scan, repeats)
+        page_ms = await _best_ms(lambda: store.list_for_user(user_id, True, limit), repeats)
+        print(f"{size:>9} {scan_ms:>13.2f} {page_ms:>14.2f}")
+        await store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--per-user", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+    logger.remove()
+    asyncio.run(run([int(s) for s in args.sizes.split(",")], args.per_user, args.limit, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Provider SDK Benchmark
+Streams through the real OpenAI and Anthropic providers (pooled SDK client,
+HTTP, SSE parsing, retry wrapper) against the bundled stub server, and
+reports what the client side adds on top of the stub's own schedule.
+
+The stub is started in-process on a free port. With --ttft 0 and
+--tokens-per-second 0 it answers as fast as it can, so the timings are the
+cost of the request path itself; with realistic settings they show how close
+the observed time to first token and token rate stay to the configured ones.
+
+Usage (from backend/):
+    python -m benchmarks.provider_sdk [--streams 20] [--concurrency 5] [--tokens 300]
+"""
+
+import argparse
+import asyncio
+import socket
+import statistics
+import time
+from typing import Dict, List
+
+from loguru import logger
+from benchmarks.stub_provider import StubSettings, create_app
+from models.schemas import ModelPersonality
+from providers.anthropic_provider import AnthropicProvider
+from providers.base_provider import AIProvider
+from providers.client_pool import client_pool
+from providers.openai_provider import OpenAIProvider
+from providers.resilience import ProviderError
+
+PROVIDERS = {
+    "openai": (OpenAIProvider, "gpt-4o", "/v1"),
+    "anthropic": (AnthropicProvider, "claude-3-5-sonnet-20241022", "")
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _start_stub(settings: StubSettings):
+    import uvicorn
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(settings), host="127.0.0.1", port=port, log_level="error"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task, f"http://127.0.0.1:{port}"
+
+
+def _provider(name: str, stub_url: str) -> AIProvider:
+    cls, model, path = PROVIDERS[name]
+    personality = ModelPersonality(
+        provider=name, model_name=model, role="Benchmark", icon="⏱",
+        prompt_prefix="You are a benchmark panelist.", collaboration_style="analytical",
+        color_theme="gray"
+    )
+    return cls(api_key="stub", model_name=model, personality=personality, base_url=stub_url + path)
+
+
+async def _one_stream(provider: AIProvider, tokens: int) -> Dict[str, float]:
+    context = [{"role": "user", "content": "Benchmark the request path, please."}]
+    started = time.perf_counter()
+    first = None
+    chunks = 0
+    async for _ in provider.generate_stream(context, max_tokens=tokens):
+        if first is None:
+            first = time.perf_counter()
+        chunks += 1
+    finished = time.perf_counter()
+    return {"ttft": (first or finished) - started, "total": finished - started, "chunks": chunks}
+
+
+async def _bench(provider: AIProvider, streams: int, concurrency: int, tokens: int) -> List[Dict[str, float]]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            return await _one_stream(provider, tokens)
+
+    await _one_stream(provider, tokens)  # warm-up: connection and first-use imports
+    return await asyncio.gather(*[limited() for _ in range(streams)])
+
+
+def _report(name: str, results: List[Dict[str, float]], settings: StubSettings, tokens: int):
+    ttft = statistics.median(r["ttft"] for r in results) * 1000
+    total = statistics.median(r["total"] for r in results) * 1000
+    chunks = statistics.median(r["chunks"] for r in results)
+    ideal = settings.ttft + (tokens / settings.tokens_per_second if settings.tokens_per_second else 0)
+    overhead = total - ideal * 1000
+    print(f"{name:10s} ttft {ttft:7.1f}ms (stub {settings.ttft * 1000:.0f}ms)  "
+          f"stream {total:7.1f}ms (stub {ideal * 1000:.0f}ms)  "
+          f"overhead {overhead:6.1f}ms = {overhead * 1000 / max(chunks, 1):5.0f}µs/chunk over {chunks:.0f} chunks")
+
+
+async def run(names: List[str], streams: int, concurrency: int, tokens: int, settings: StubSettings):
+    settings.response_tokens = tokens
+    server, task, url = await _start_stub(settings)
+    print(f"stub at {url}: ttft {settings.ttft}s, {settings.tokens_per_second or 'unlimited'} tokens/s, "
+          f"{tokens} tokens, {streams} streams x{concurrency}")
+    try:
+        for name in names:
+            try:
+                results = await _bench(_provider(name, url), streams, concurrency, tokens)
+            except ProviderError as e:
+                print(f"{name:10s} failed: {e.kind.value} {e.message}")
+                continue
+            _report(name, results, settings, tokens)
+        connections = client_pool.stats()
+        print(f"connections: {connections['requests']} requests, {connections['new_connections']} new")
+    finally:
+        await client_pool.close()
+        server.should_exit = True
+        await task
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--providers", default="openai,anthropic")
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--tokens", type=int, default=300)
+    parser.add_argument("--ttft", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logger.remove()
+    settings = StubSettings(ttft=args.ttft, tokens_per_second=args.tokens_per_second)
+    asyncio.run(run(args.providers.split(","), args.streams, args.concurrency, args.tokens, settings))
+
+
+if __name__ == "__main__":
+    main()
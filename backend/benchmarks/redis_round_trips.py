@@ -0,0 +1,194 @@
+"""
+Redis Round-Trip Benchmark
+Round trips and latency of RedisClient operations, pipelined vs. the
+equivalent one-command-per-round-trip sequences, against a real redis-server.
+
+Usage (from backend/):
+    redis-server --port 6379 &
+    python -m benchmarks.redis_round_trips [--url redis://localhost:6379/15] [--messages 1200]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, List
+import redis.asyncio as redis
+from loguru import logger
+from benchmarks.corpus import panel_threads
+from core.redis_client import RedisClient
+from memory.group_memory import GroupMemory
+from models.schemas import CollaborationEvent, Message, MessageType, Session, SynapseConnection, SynapseType
+
+
+class RoundTripCounter:
+    """Counts commands sent on their own and pipelines sent as a whole"""
+
+    def __init__(self):
+        self.count = 0
+
+    @contextmanager
+    def installed(self):
+        execute_command = redis.Redis.execute_command
+        execute_pipeline = redis.client.Pipeline.execute
+
+        async def counted_command(client, *args, **kwargs):
+            self.count += 1
+            return await execute_command(client, *args, **kwargs)
+
+        async def counted_pipeline(pipe, *args, **kwargs):
+            self.count += 1
+            return await execute_pipeline(pipe, *args, **kwargs)
+
+        redis.Redis.execute_command = counted_command
+        redis.client.Pipeline.execute = counted_pipeline
+        try:
+            yield self
+        finally:
+            redis.Redis.execute_command = execute_command
+            redis.client.Pipeline.execute = execute_pipeline
+
+
+def _memory_delta(session_id: str, n_messages: int) -> Dict:
+    """A GroupMemory delta with n corpus messages and one synapse/event per six messages"""
+    memory = GroupMemory(session_id)
+    texts = [(speaker, text) for thread in panel_threads(elaborate=2) for speaker, text in thread]
+    for i in range(n_messages):
+        speaker, text = texts[i % len(texts)]
+        memory.messages.append(Message(session_id=session_id, content=text,
+                                       message_type=MessageType.RESPONSE, model_source=speaker))
+        if i % 6 == 5:
+            memory.synapse_connections.append(SynapseConnection(
+                from_message_id=memory.messages[i - 1].id, to_message_id=memory.messages[i].id,
+                synapse_type=SynapseType.BUILDING, strength=0.7))
+            memory.collaboration_events.append(CollaborationEvent(
+                session_id=session_id, event_type="synapse_formed",
+                involved_models=[speaker], description="bench"))
+    return memory.take_delta()
+
+
+# Baselines: the same work issued one command per round trip
+async def _sequential_save(client: RedisClient, session: Session, delta: Dict):
+    r = client._client
+    await r.setex(f"session:{session.id}", client.SESSION_TTL, session.model_dump_json())
+    await r.sadd("active_sessions", session.id)
+    header_key = client._memory_key(session.id, "header")
+    await r.hset(header_key, mapping=delta["header"])
+    await r.expire(header_key, client.MEMORY_TTL)
+
+
+async def _sequential_append(client: RedisClient, session_id: str, delta: Dict):
+    r = client._client
+    for kind, (suffix, _) in client.MEMORY_LISTS.items():
+        if delta[kind]:
+            key = client._memory_key(session_id, suffix)
+            await r.rpush(key, *[item.model_dump_json() for item in delta[kind]])
+            await r.expire(key, client.MEMORY_TTL)
+    header_key = client._memory_key(session_id, "header")
+    await r.hset(header_key, mapping=delta["header"])
+    await r.expire(header_key, client.MEMORY_TTL)
+
+
+async def _sequential_load(client: RedisClient, session_id: str):
+    r = client._client
+    client._load_session(await r.get(f"session:{session_id}"))
+    await r.hgetall(client._memory_key(session_id, "header"))
+    for _, (suffix, _) in client.MEMORY_LISTS.items():
+        key = client._memory_key(session_id, suffix)
+        start = 0
+        while True:
+            page = await r.lrange(key, start, start + client.MEMORY_PAGE_SIZE - 1)
+            [json.loads(raw) for raw in page]
+            if len(page) < client.MEMORY_PAGE_SIZE:
+                break
+            start += client.MEMORY_PAGE_SIZE
+
+
+async def _sequential_load_many(client: RedisClient, session_ids: List[str]):
+    for session_id in session_ids:
+        await client._client.get(f"session:{session_id}")
+
+
+async def _sequential_delete(client: RedisClient, session_id: str):
+    r = client._client
+    await r.delete(f"session:{session_id}")
+    await r.srem("active_sessions", session_id)
+    await r.delete(f"memory:{session_id}")
+    await r.delete(*client._memory_keys(session_id)[1:])
+    await r.delete(f"orchestrator:{session_id}")
+
+
+async def _measure(counter: RoundTripCounter, operation: Callable[[], Awaitable], iterations: int):
+    """(round trips per call, ms per call)"""
+    counter.count = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await operation()
+    elapsed = time.perf_counter() - started
+    return counter.count / iterations, elapsed * 1000 / iterations
+
+
+async def run(url: str, n_messages: int, n_sessions: int, iterations: int):
+    client = RedisClient(url)
+    if not await client.connect():
+        print(f"Could not connect to {url}; start a local redis-server first")
+        return
+
+    counter = RoundTripCounter()
+    session_ids = [f"bench-{uuid.uuid4()}" for _ in range(n_sessions)]
+    sessions = [Session(id=sid, mission="round-trip benchmark", panelist_configs=[]) for sid in session_ids]
+    history = _memory_delta(session_ids[0], n_messages)
+    turn = _memory_delta(session_ids[0], 6)
+    header_only = {"messages": [], "synapses": [], "events": [], "header": turn["header"]}
+
+    for session in sessions:
+        await client.save_session_with_memory(session, header_only)
+    await client.append_memory_delta(session_ids[0], history)
+
+    target = session_ids[0]
+    scenarios = [
+        ("create session + memory",
+         lambda: _sequential_save(client, sessions[1], header_only),
+         lambda: client.save_session_with_memory(sessions[1], header_only)),
+        ("append turn delta",
+         lambda: _sequential_append(client, session_ids[1], turn),
+         lambda: client.append_memory_delta(session_ids[1], turn)),
+        (f"load session + {n_messages} msgs",
+         lambda: _sequential_load(client, target),
+         lambda: client.get_session_with_memory(target)),
+        (f"load {n_sessions} sessions",
+         lambda: _sequential_load_many(client, session_ids),
+         lambda: client.get_sessions(session_ids)),
+        ("delete session",
+         lambda: _sequential_delete(client, f"bench-missing-{uuid.uuid4()}"),
+         lambda: client.delete_session(f"bench-missing-{uuid.uuid4()}")),
+    ]
+
+    print(f"{'operation':<28} {'seq RTT':>8} {'pipe RTT':>9} {'seq ms':>8} {'pipe ms':>8} {'speedup':>8}")
+    with counter.installed():
+        for name, sequential, pipelined in scenarios:
+            seq_rtt, seq_ms = await _measure(counter, sequential, iterations)
+            pipe_rtt, pipe_ms = await _measure(counter, pipelined, iterations)
+            print(f"{name:<28} {seq_rtt:>8.0f} {pipe_rtt:>9.0f} {seq_ms:>8.2f} {pipe_ms:>8.2f} "
+                  f"{seq_ms / pipe_ms:>7.2f}x")
+
+    await client.delete_sessions(session_ids)
+    await client.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.getenv("REDIS_BENCH_URL", "redis://localhost:6379/15"))
+    parser.add_argument("--messages", type=int, default=1200, help="history length of the loaded session")
+    parser.add_argument("--sessions", type=int, default=50, help="sessions in the batch load")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    logger.remove()
+    asyncio.run(run(args.url, args.messages, args.sessions, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
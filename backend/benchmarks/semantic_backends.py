@@ -0,0 +1,95 @@
+"""
+Semantic Backend Benchmark
+Encoding throughput of each embedding backend configuration and agreement of
+its synapse decisions with the fp32 baseline on the fixed panel corpus.
+
+Usage (from backend/):
+    python -m benchmarks.semantic_backends [--model all-MiniLM-L6-v2] [--elaborate 4]
+"""
+
+import argparse
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+from benchmarks.corpus import panel_threads
+from memory.semantic_synapse_detector import SemanticSynapseDetector
+from models.schemas import Message, MessageType
+
+# (backend, max_seq_length); the first entry is the reference
+CONFIGURATIONS: List[Tuple[str, Optional[int]]] = [
+    ("torch", None),
+    ("torch-int8", None),
+    ("torch", 128),
+    ("torch-int8", 128),
+    ("torch-int8", 64),
+]
+
+
+def _decisions(detector: SemanticSynapseDetector, threads) -> Tuple[Dict[tuple, str], Dict[tuple, float]]:
+    """Semantic synapse decisions and similarities for every (message, earlier message) pair"""
+    decisions = {}
+    similarities = {}
+    for t, thread in enumerate(threads):
+        messages = [
+            Message(id=f"{t}-{i}", session_id="bench", content=text,
+                    message_type=MessageType.RESPONSE, model_source=speaker)
+            for i, (speaker, text) in enumerate(thread)
+        ]
+        for i, new_message in enumerate(messages[1:], start=1):
+            candidates = [m for m in messages[:i] if m.model_source != new_message.model_source]
+            scores = detector.score_candidates(new_message, candidates, keyword_fallback=False)
+            sims = detector._similarities(new_message.content, [c.content for c in candidates])
+            for candidate, similarity in zip(candidates, sims):
+                pair = (new_message.id, candidate.id)
+                similarities[pair] = float(similarity)
+                score = scores.get(candidate.id)
+                decisions[pair] = score.synapse_type.value if score else "none"
+    return decisions, similarities
+
+
+def _throughput(detector: SemanticSynapseDetector, texts: List[str], repeats: int) -> float:
+    """Sentences per second through the backend, bypassing the embedding cache"""
+    detector.model.encode(texts)  # warm
+    started = time.perf_counter()
+    for _ in range(repeats):
+        detector.model.encode(texts)
+    return repeats * len(texts) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--elaborate", type=int, default=4, help="extra sentences per message")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    logger.remove()
+
+    threads = panel_threads(elaborate=args.elaborate)
+    texts = [text for thread in threads for _, text in thread]
+
+    reference = None
+    print(f"{'backend':>11} {'max_seq':>8} {'sent/s':>8} {'speedup':>8} {'agree':>7} {'mean |dsim|':>12}")
+    for backend, max_seq_length in CONFIGURATIONS:
+        detector = SemanticSynapseDetector(args.model, backend=backend, max_seq_length=max_seq_length)
+        detector._load_model()
+        if not detector.is_ready:
+            print(f"{backend:>11} failed to load: {detector.load_error}")
+            continue
+
+        throughput = _throughput(detector, texts, args.repeats)
+        decisions, similarities = _decisions(detector, threads)
+        if reference is None:
+            reference = (throughput, decisions, similarities)
+
+        base_throughput, base_decisions, base_similarities = reference
+        agreement = np.mean([decisions[pair] == base_decisions[pair] for pair in base_decisions])
+        drift = np.mean([abs(similarities[pair] - base_similarities[pair]) for pair in base_similarities])
+        print(f"{backend:>11} {detector.model.max_seq_length:>8} {throughput:>8.1f} "
+              f"{throughput / base_throughput:>7.2f}x {agreement * 100:>6.1f}% {drift:>12.4f}")
+
+    print(f"\n{len(texts)} messages, {len(reference[1]) if reference else 0} candidate pairs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Session Codec Benchmark
+Payload size and encode/decode time of the binary session codec against the
+formats it replaces: Session JSON (model_dump_json / model_validate_json),
+memory JSON (json.dumps(default=str) of GroupMemory.to_dict-style data) and
+pickle (as used for orchestrator state), on synthetic 1k-message sessions.
+
+Usage (from backend/):
+    python -m benchmarks.session_codec [--messages 1000] [--repeats 5]
+"""
+
+import argparse
+import json
+import pickle
+import time
+from typing import Callable, List, Tuple
+from loguru import logger
+from benchmarks.corpus import panel_threads
+from core.session_codec import SessionCodec
+from models.schemas import (
+    CollaborationEvent, Message, MessageType, ModelPersonality, PanelistConfig,
+    Session, SynapseConnection, SynapseType
+)
+
+
+def synthetic_session(n_messages: int) -> Session:
+    """Session with n corpus messages (each a distinct string), plus synapses and events"""
+    texts = [(speaker, text) for thread in panel_threads(elaborate=3) for speaker, text in thread]
+    panelists = [
+        PanelistConfig(personality=ModelPersonality(
+            provider=provider, model_name=model, role="Panelist", icon="*",
+            prompt_prefix="You are a thoughtful panelist.", collaboration_style="builder",
+            color_theme="blue"))
+        for provider, model in [("openai", "gpt-4o"), ("anthropic", "claude-3.5"), ("google", "gemini-1.5")]
+    ]
+    session = Session(mission="Synthetic codec benchmark", panelist_configs=panelists)
+    for i in range(n_messages):
+        speaker, text = texts[i % len(texts)]
+        message = Message(
+            session_id=session.id, content=f"{text} (turn {i})",
+            message_type=MessageType.RESPONSE if speaker != "user" else MessageType.MISSION,
+            model_source=speaker, metadata={"tokens": len(text) // 4, "panelist_id": panelists[i % 3].id}
+        )
+        if i and i % 3 == 0:
+            previous = session.messages[-1]
+            message.synapse_connections.append(previous.id)
+            session.synapse_connections.append(SynapseConnection(
+                from_message_id=previous.id, to_message_id=message.id,
+                synapse_type=SynapseType.BUILDING, strength=0.72))
+            session.collaboration_events.append(CollaborationEvent(
+                session_id=session.id, event_type="synapse_detected",
+                involved_models=[previous.model_source, speaker],
+                description=f"{speaker} building on {previous.model_source}",
+                metadata={"synapse_type": "building", "strength": 0.72}))
+        session.messages.append(message)
+    return session
+
+
+def _memory_dict(session: Session) -> dict:
+    return {
+        "session_id": session.id,
+        "messages": [m.model_dump() for m in session.messages],
+        "synapse_connections": [s.model_dump() for s in session.synapse_connections],
+        "collaboration_events": [e.model_dump() for e in session.collaboration_events],
+        "context_summary": ""
+    }
+
+
+def _from_memory_dict(data: dict) -> List[Message]:
+    # What GroupMemory.from_dict does with the decoded payload
+    return ([Message(**m) for m in data["messages"]]
+            + [SynapseConnection(**s) for s in data["synapse_connections"]]
+            + [CollaborationEvent(**e) for e in data["collaboration_events"]])
+
+
+def _best_ms(operation: Callable[[], object], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        operation()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    logger.remove()
+
+    session = synthetic_session(args.messages)
+    memory = _memory_dict(session)
+    compressed = SessionCodec()
+    raw = SessionCodec(compress_threshold=0)
+
+    # name -> (payload, encode, decode)
+    formats: List[Tuple[str, Callable[[], bytes], Callable[[bytes], object]]] = [
+        ("session json", lambda: session.model_dump_json().encode(), Session.model_validate_json),
+        ("memory json", lambda: json.dumps(memory, default=str).encode(),
+         lambda data: _from_memory_dict(json.loads(data))),
+        ("pickle", lambda: pickle.dumps(memory), lambda data: _from_memory_dict(pickle.loads(data))),
+        ("codec", lambda: raw.encode(session), raw.decode),
+        ("codec+zlib", lambda: compressed.encode(session), compressed.decode),
+    ]
+
+    print(f"{args.messages} messages, {len(session.synapse_connections)} synapses, "
+          f"{len(session.collaboration_events)} events\n")
+    print(f"{'format':<13} {'bytes':>9} {'ratio':>6} {'encode ms':>10} {'decode ms':>10}")
+    baseline = None
+    for name, encode, decode in formats:
+        payload = encode()
+        baseline = baseline or len(payload)
+        encode_ms = _best_ms(encode, args.repeats)
+        decode_ms = _best_ms(lambda: decode(payload), args.repeats)
+        print(f"{name:<13} {len(payload):>9} {len(payload) / baseline:>6.2f} {encode_ms:>10.2f} {decode_ms:>10.2f}")
+
+    # Per-entry records as stored in the append-only memory lists
+    items = session.messages
+    json_items = [m.model_dump_json().encode() for m in items]
+    codec_items = [compressed.encode(m) for m in items]
+    print(f"\nper-message list entries ({len(items)}):")
+    print(f"{'json':<13} {sum(map(len, json_items)):>9} {'':>6} "
+          f"{_best_ms(lambda: [m.model_dump_json() for m in items], args.repeats):>10.2f} "
+          f"{_best_ms(lambda: [Message.model_validate_json(d) for d in json_items], args.repeats):>10.2f}")
+    print(f"{'codec':<13} {sum(map(len, codec_items)):>9} {'':>6} "
+          f"{_best_ms(lambda: [compressed.encode(m) for m in items], args.repeats):>10.2f} "
+          f"{_best_ms(lambda: [compressed.decode(d) for d in codec_items], args.repeats):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
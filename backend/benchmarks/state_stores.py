@@ -0,0 +1,126 @@
+"""
+State Store Benchmark
+Times the operations SessionManager issues per turn against every StateStore
+backend: create, append a turn delta, load a session with its history, batch
+load and delete. Conformance across backends is covered by
+tests/test_state_stores.py.
+
+Redis is included when reachable (it is the only backend that needs a server).
+The WAL store runs without fsync here, to time the store rather than the disk.
+
+Usage (from backend/):
+    python -m benchmarks.state_stores [--redis-url redis://localhost:6379/15] [--messages 1200]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Tuple
+from loguru import logger
+from benchmarks.corpus import panel_threads
+from core.memory_store import InMemoryStateStore
+from core.redis_client import RedisClient
+from core.sqlite_store import SQLiteStateStore
+from core.state_store import StateStore
+from core.wal_store import WALStateStore
+from memory.group_memory import GroupMemory
+from models.schemas import CollaborationEvent, Message, MessageType, Session, SynapseConnection, SynapseType
+
+
+def _memory(session_id: str, n_messages: int) -> GroupMemory:
+    """GroupMemory with n corpus messages and one synapse/event per six messages"""
+    memory = GroupMemory(session_id)
+    texts = [(speaker, text) for thread in panel_threads(elaborate=2) for speaker, text in thread]
+    for i in range(n_messages):
+        speaker, text = texts[i % len(texts)]
+        memory.messages.append(Message(session_id=session_id, content=f"{text} ({i})",
+                                       message_type=MessageType.RESPONSE, model_source=speaker))
+        if i % 6 == 5:
+            memory.synapse_connections.append(SynapseConnection(
+                from_message_id=memory.messages[i - 1].id, to_message_id=memory.messages[i].id,
+                synapse_type=SynapseType.BUILDING, strength=0.7))
+            memory.collaboration_events.append(CollaborationEvent(
+                session_id=session_id, event_type="synapse_formed",
+                involved_models=[speaker], description="bench"))
+    return memory
+
+
+def _session(session_id: str = None) -> Session:
+    return Session(id=session_id or f"bench-{uuid.uuid4()}", mission="state store benchmark", panelist_configs=[])
+
+
+async def _measure(operation: Callable[[], Awaitable], iterations: int) -> float:
+    """ms per call"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await operation()
+    return (time.perf_counter() - started) * 1000 / iterations
+
+
+async def timings(store: StateStore, n_messages: int, n_sessions: int, iterations: int) -> Dict[str, float]:
+    sessions = [_session() for _ in range(n_sessions)]
+    history = _memory(sessions[0].id, n_messages)
+    turn = _memory(sessions[1].id, 6).take_delta()
+    for session in sessions:
+        await store.save_session_with_memory(session, {**turn, "messages": [], "synapses": [], "events": []})
+    await store.append_memory_delta(sessions[0].id, history.take_delta())
+
+    results = {
+        "create session + memory": await _measure(
+            lambda: store.save_session_with_memory(_session(sessions[2].id), turn), iterations),
+        "append turn delta": await _measure(
+            lambda: store.append_memory_delta(sessions[1].id, turn), iterations),
+        f"load session + {n_messages} msgs": await _measure(
+            lambda: store.get_session_with_memory(sessions[0].id), iterations),
+        f"load {n_sessions} sessions": await _measure(
+            lambda: store.get_sessions([s.id for s in sessions]), iterations),
+        "delete session": await _measure(
+            lambda: store.delete_session(f"bench-missing-{uuid.uuid4()}"), iterations),
+    }
+    await store.delete_sessions([s.id for s in sessions])
+    return results
+
+
+async def run(redis_url: str, n_messages: int, n_sessions: int, iterations: int):
+    workdir = tempfile.mkdtemp(prefix="state-stores-")
+    sqlite_path = os.path.join(workdir, "state.db")
+    backends: List[Tuple[str, Callable[[], StateStore]]] = [
+        ("memory", InMemoryStateStore),
+        ("sqlite", lambda: SQLiteStateStore(sqlite_path)),
+        ("wal", lambda: WALStateStore(os.path.join(workdir, "wal"), fsync=False)),
+        ("redis", lambda: RedisClient(redis_url)),
+    ]
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, factory in backends:
+        store = factory()
+        if not await store.connect():
+            print(f"{name}: unavailable, skipped")
+            continue
+        results[name] = await timings(store, n_messages, n_sessions, iterations)
+        await store.disconnect()
+
+    if not results:
+        return
+    names = list(results)
+    print(f"\n{'operation (ms)':<28}" + "".join(f"{name:>10}" for name in names))
+    for operation in results[names[0]]:
+        print(f"{operation:<28}" + "".join(f"{results[name][operation]:>10.2f}" for name in names))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_BENCH_URL", "redis://localhost:6379/15"))
+    parser.add_argument("--messages", type=int, default=1200, help="history length of the loaded session")
+    parser.add_argument("--sessions", type=int, default=50, help="sessions in the batch load")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    logger.remove()
+    asyncio.run(run(args.redis_url, args.messages, args.sessions, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Stub Provider Server
+A local stand-in for the OpenAI chat-completions and Anthropic messages APIs,
+so the real SDK code paths (HTTP, SSE parsing, retries, usage) run offline.
+
+It answers POST /v1/chat/completions and POST /v1/messages, streamed or not,
+with deterministic filler text. Streams follow each vendor's SSE wire format
+(including OpenAI's trailing usage chunk and Anthropic's message_start /
+content_block_delta / message_delta events) at a configurable time to first
+token and token rate. Any model name is accepted.
+
+Usage (from backend/):
+    python -m benchmarks.stub_provider [--port 8900] [--ttft 0.3] [--tokens-per-second 50]
+
+Then point the backend at it (any non-empty API key works):
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8900
+or set `base_url` on a persona in config/personas.yaml.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "collaborative intelligence emerges when each panelist builds on the "
+    "others while keeping its own perspective and the discussion converges "
+    "on insights no single model would reach alone"
+).split()
+
+
+@dataclass
+class StubSettings:
+    ttft: float = 0.3  # seconds before the first token
+    tokens_per_second: float = 50.0  # 0 = as fast as possible
+    response_tokens: int = 200  # answer length unless max_tokens is lower
+    tokens_per_chunk: int = 1
+
+
+def _prompt_tokens(payload: Dict[str, Any]) -> int:
+    """~4 characters per token over the request's messages and system prompt"""
+    text = json.dumps([payload.get("system", ""), payload.get("messages", [])])
+    return max(1, len(text) // 4)
+
+
+class StubProvider:
+    """Generates paced answers in the OpenAI and Anthropic formats"""
+
+    def __init__(self, settings: StubSettings):
+        self.settings = settings
+        self.requests = 0
+
+    def _tokens(self, payload: Dict[str, Any]) -> List[str]:
+        limit = payload.get("max_tokens") or payload.get("max_completion_tokens") or self.settings.response_tokens
+        count = max(1, min(self.settings.response_tokens, int(limit)))
+        return [(" " if i else "") + word for i, word in enumerate(itertools.islice(itertools.cycle(WORDS), count))]
+
+    async def _paced(self, tokens: List[str]) -> AsyncIterator[str]:
+        """Chunks of `tokens_per_chunk` tokens on the configured schedule"""
+        settings = self.settings
+        started = time.monotonic()
+        step = max(1, settings.tokens_per_chunk)
+        for index in range(0, len(tokens), step):
+            if settings.tokens_per_second > 0:
+                due = settings.ttft + index / settings.tokens_per_second
+            else:
+                due = settings.ttft if index == 0 else 0.0
+            delay = due - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield "".join(tokens[index:index + step])
+
+    async def _full_delay(self, tokens: List[str]):
+        settings = self.settings
+        rate = len(tokens) / settings.tokens_per_second if settings.tokens_per_second > 0 else 0.0
+        await asyncio.sleep(settings.ttft + rate)
+
+    # OpenAI chat completions
+    async def openai(self, payload: Dict[str, Any]):
+        self.requests += 1
+        tokens = self._tokens(payload)
+        prompt_tokens = _prompt_tokens(payload)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+            "prompt_tokens_details": {"cached_tokens": 0}
+        }
+        base = {"id": f"chatcmpl-stub-{uuid.uuid4().hex[:12]}", "created": int(time.time()), "model": payload.get("model")}
+
+        if not payload.get("stream"):
+            await self._full_delay(tokens)
+            return JSONResponse({
+                **base, "object": "chat.completion",
+                "choices": [{
+                    "index": 0, "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": "".join(tokens)}
+                }],
+                "usage": usage
+            })
+
+        include_usage = (payload.get("stream_options") or {}).get("include_usage", False)
+
+        def chunk(delta: Dict[str, Any], finish_reason=None) -> str:
+            body = {**base, "object": "chat.completion.chunk",
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            return f"data: {json.dumps(body)}\n\n"
+
+        async def events():
+            first = True
+            async for text in self._paced(tokens):
+                yield chunk({"role": "assistant", "content": text} if first else {"content": text})
+                first = False
+            yield chunk({}, "stop")
+            if include_usage:
+                yield f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    # Anthropic messages
+    async def anthropic(self, payload: Dict[str, Any]):
+        self.requests += 1
+        tokens = self._tokens(payload)
+        message = {
+            "id": f"msg_stub_{uuid.uuid4().hex[:12]}", "type": "message", "role": "assistant",
+            "model": payload.get("model"), "stop_sequence": None,
+            "usage": {
+                "input_tokens": _prompt_tokens(payload), "output_tokens": len(tokens),
+                "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0
+            }
+        }
+
+        if not payload.get("stream"):
+            await self._full_delay(tokens)
+            return JSONResponse({
+                **message, "stop_reason": "end_turn",
+                "content": [{"type": "text", "text": "".join(tokens)}]
+            })
+
+        def event(name: str, data: Dict[str, Any]) -> str:
+            return f"event: {name}\ndata: {json.dumps({'type': name, **data})}\n\n"
+
+        async def events():
+            start = {**message, "content": [], "stop_reason": None, "usage": {**message["usage"], "output_tokens": 1}}
+            yield event("message_start", {"message": start})
+            yield event("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+            yield event("ping", {})
+            async for text in self._paced(tokens):
+                yield event("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": text}})
+            yield event("content_block_stop", {"index": 0})
+            yield event("message_delta", {
+                "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                "usage": {"output_tokens": len(tokens)}
+            })
+            yield event("message_stop", {})
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def create_app(settings: StubSettings = None) -> FastAPI:
+    stub = StubProvider(settings or StubSettings())
+    app = FastAPI(title="Stub Provider")
+    app.state.stub = stub
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        return await stub.openai(await request.json())
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        return await stub.anthropic(await request.json())
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "requests": stub.requests, "settings": stub.settings.__dict__}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--ttft", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="0 streams as fast as possible")
+    parser.add_argument("--response-tokens", type=int, default=200)
+    parser.add_argument("--tokens-per-chunk", type=int, default=1)
+    args = parser.parse_args()
+
+    import uvicorn
+    settings = StubSettings(
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        tokens_per_chunk=args.tokens_per_chunk
+    )
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Vector Index Benchmark
+Top-k query latency and recall of SessionVectorIndex (float32, int8, IVF)
+on random normalized embeddings, against exact float32 search.
+
+Usage (from backend/):
+    python -m benchmarks.vector_index [--sizes 1000 10000 100000] [--dim 384]
+"""
+
+import argparse
+import time
+import numpy as np
+from loguru import logger
+from memory.vector_index import SessionVectorIndex
+from models.schemas import Message, MessageType
+
+
+def _clustered_vectors(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    """Embeddings grouped around topics, like a real discussion"""
+    topics = rng.standard_normal((max(8, n // 200), dim)).astype(np.float32)
+    vectors = topics[rng.integers(0, len(topics), n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _build(vectors: np.ndarray, messages, **options) -> SessionVectorIndex:
+    index = SessionVectorIndex(**options)
+    index.add_batch(messages, vectors)
+    return index
+
+
+def _run(index: SessionVectorIndex, queries: np.ndarray, k: int):
+    started = time.perf_counter()
+    results = [[m.id for m, _ in index.search(q, k=k)] for q in queries]
+    return (time.perf_counter() - started) / len(queries), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    logger.remove()
+
+    rng = np.random.default_rng(42)
+    print(f"{'rows':>8} {'mode':>8} {'query ms':>9} {'recall@k':>9} {'MB':>7}")
+    for n in args.sizes:
+        vectors = _clustered_vectors(n, args.dim, rng)
+        messages = [Message(id=str(i), session_id="bench", content="", message_type=MessageType.RESPONSE) for i in range(n)]
+        queries = _clustered_vectors(args.queries, args.dim, rng)
+
+        modes = {
+            "float32": dict(approximate_threshold=n + 1),
+            "int8": dict(quantize=True, approximate_threshold=n + 1),
+            "ivf": dict(approximate_threshold=min(n, 1000)),
+        }
+        exact = None
+        for mode, options in modes.items():
+            index = _build(vectors, messages, **options)
+            latency, results = _run(index, queries, args.k)
+            if exact is None:
+                exact = results
+            recall = np.mean([len(set(r) & set(e)) / args.k for r, e in zip(results, exact)])
+            print(f"{n:>8} {mode:>8} {latency * 1000:>9.3f} {recall:>9.3f} {index._matrix.nbytes / 1e6:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+WAL Recovery Benchmark
+Write throughput and recovery time of the local write-ahead log store
+against the Redis state store.
+
+Writes: concurrent sessions each appending turn deltas (6 messages); the WAL
+acknowledges a write once its group commit is fsynced. Recovery: time for a
+fresh process to have every session back in memory, by log replay, by
+snapshot replay, and by loading each session from Redis.
+
+Usage (from backend/):
+    python -m benchmarks.wal_recovery [--sessions 200] [--messages 300] [--redis-url redis://localhost:6379/15]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List
+from loguru import logger
+from benchmarks.corpus import panel_threads
+from core.redis_client import RedisClient
+from core.state_store import StateStore
+from core.wal_store import WALStateStore
+from memory.group_memory import GroupMemory
+from models.schemas import Message, MessageType, Session
+
+
+def _turns(session_id: str, n_messages: int, per_turn: int = 6) -> List[Dict]:
+    """A session's history as turn deltas of `per_turn` messages"""
+    memory = GroupMemory(session_id)
+    texts = [(speaker, text) for thread in panel_threads(elaborate=2) for speaker, text in thread]
+    deltas = []
+    for i in range(n_messages):
+        speaker, text = texts[i % len(texts)]
+        memory.messages.append(Message(session_id=session_id, content=f"{text} ({i})",
+                                       message_type=MessageType.RESPONSE, model_source=speaker))
+        if len(memory.messages) % per_turn == 0 or i == n_messages - 1:
+            deltas.append(memory.take_delta())
+    return deltas
+
+
+async def _write_all(store: StateStore, histories: Dict[str, List[Dict]], concurrency: int) -> float:
+    """Create every session and append its turns, `concurrency` sessions at a time; returns seconds"""
+    queue = list(histories.items())
+
+    async def worker():
+        while queue:
+            session_id, deltas = queue.pop()
+            session = Session(id=session_id, mission="wal benchmark", panelist_configs=[])
+            await store.save_session_with_memory(session, deltas[0])
+            for delta in deltas[1:]:
+                await store.append_memory_delta(session_id, delta)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return time.perf_counter() - started
+
+
+async def _timed(operation: Callable[[], Awaitable]) -> float:
+    started = time.perf_counter()
+    await operation()
+    return time.perf_counter() - started
+
+
+async def run(n_sessions: int, n_messages: int, concurrency: int, redis_url: str):
+    session_ids = [f"bench-{uuid.uuid4()}" for _ in range(n_sessions)]
+    histories = {session_id: _turns(session_id, n_messages) for session_id in session_ids}
+    n_writes = sum(len(deltas) for deltas in histories.values())
+    print(f"{n_sessions} sessions x {n_messages} messages ({n_writes} writes, {concurrency} concurrent)\n")
+
+    print(f"{'writes':<26} {'writes/s':>10} {'fsyncs':>8}")
+    for label, fsync, writers in [
+        ("wal fsync, 1 writer", True, 1),
+        (f"wal fsync, {concurrency} writers", True, concurrency),
+        (f"wal no fsync, {concurrency} writers", False, concurrency),
+    ]:
+        directory = tempfile.mkdtemp(prefix="wal-bench-")
+        store = WALStateStore(directory, fsync=fsync)
+        await store.connect()
+        subset = histories if writers > 1 else dict(list(histories.items())[:max(1, n_sessions // 10)])
+        seconds = await _write_all(store, subset, writers)
+        writes = sum(len(deltas) for deltas in subset.values())
+        print(f"{label:<26} {writes / seconds:>10.0f} {store.stats()['flushes']:>8}")
+        await store.disconnect()
+
+    redis = RedisClient(redis_url)
+    use_redis = await redis.connect()
+    if use_redis:
+        seconds = await _write_all(redis, histories, concurrency)
+        print(f"{f'redis, {concurrency} writers':<26} {n_writes / seconds:>10.0f} {'-':>8}")
+
+    # Recovery
+    directory = tempfile.mkdtemp(prefix="wal-bench-")
+    store = WALStateStore(directory, fsync=False)
+    await store.connect()
+    await _write_all(store, histories, concurrency)
+    await store.disconnect()
+    log_bytes = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+
+    print(f"\n{'recovery':<26} {'ms':>10} {'MB read':>8}")
+    recovered = WALStateStore(directory)
+    seconds = await _timed(recovered.connect)
+    print(f"{'wal log replay':<26} {seconds * 1000:>10.0f} {log_bytes / 1e6:>8.1f}")
+    await recovered.compact()
+    await recovered.disconnect()
+
+    snapshot_bytes = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+    recovered = WALStateStore(directory)
+    seconds = await _timed(recovered.connect)
+    assert len(recovered._sessions) == n_sessions
+    print(f"{'wal snapshot replay':<26} {seconds * 1000:>10.0f} {snapshot_bytes / 1e6:>8.1f}")
+    await recovered.disconnect()
+
+    if use_redis:
+        async def load_all():
+            for session_id in histories:
+                await redis.get_session_with_memory(session_id)
+
+        seconds = await _timed(load_all)
+        print(f"{'redis load every session':<26} {seconds * 1000:>10.0f} {'-':>8}")
+        await redis.delete_sessions(list(histories))
+        await redis.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_BENCH_URL", "redis://localhost:6379/15"))
+    args = parser.parse_args()
+    logger.remove()
+    asyncio.run(run(args.sessions, args.messages, args.concurrency, args.redis_url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+In-Memory State Store
+Single-process StateStore kept in dictionaries
+Updated: 2026-10-19 - Initial in-memory backend (replaces the SessionManager fallback dicts)
+
+Nothing survives a restart and nothing is shared with other workers, so
+ownership leases always succeed. Sessions are copied on the way in and out so
+callers see the same isolation as with a serializing backend; memory entries
+are append-only and not modified once a delta is taken, so they are shared
+rather than duplicated (hibernating a session then frees everything else).
+"""
+
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from models.schemas import Session
+from core.state_store import StateStore, MEMORY_FIELDS
+
+
+class InMemoryStateStore(StateStore):
+    """StateStore backed by process-local dictionaries"""
+
+    name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self._sessions: Dict[str, Session] = {}
+        self._memory: Dict[str, Dict[str, Any]] = {}
+        self._orchestrators: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, str] = {}
+        # session id -> (owner, expires at monotonic time)
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self._workers: Dict[str, str] = {}
+
+    async def connect(self) -> bool:
+        self._connected = True
+        return True
+
+    async def disconnect(self):
+        self._connected = False
+
+    def _stamp(self, session_id: str):
+        version = self._next_version()
+        self._versions[session_id] = version
+        self._written(session_id, version)
+
+    # Sessions
+    def _put_session(self, session: Session):
+        self._sessions[session.id] = session.model_copy(deep=True)
+
+    async def save_session(self, session: Session) -> bool:
+        self._put_session(session)
+        self._stamp(session.id)
+        return True
+
+    async def save_session_with_memory(self, session: Session, delta: Dict[str, Any]) -> bool:
+        self._put_session(session)
+        self._apply_delta(session.id, delta)
+        self._stamp(session.id)
+        return True
+
+    async def get_session(self, session_id: str) -> Optional[Session]:
+        session = self._sessions.get(session_id)
+        return session.model_copy(deep=True) if session else None
+
+    async def get_sessions(self, session_ids: List[str]) -> Dict[str, Session]:
+        return {
+            sid: self._sessions[sid].model_copy(deep=True)
+            for sid in session_ids if sid in self._sessions
+        }
+
+    async def get_session_with_memory(
+        self, session_id: str
+    ) -> Tuple[Optional[Session], Optional[Dict[str, Any]], Optional[str]]:
+        return (
+            await self.get_session(session_id),
+            await self.get_memory_state(session_id),
+            self._versions.get(session_id)
+        )
+
+    async def delete_sessions(self, session_ids: List[str]) -> bool:
+        if not session_ids:
+            return False
+        self._drop_sessions(session_ids)
+        return True
+
+    def _drop_sessions(self, session_ids: List[str]):
+        for session_id in session_ids:
+            self._sessions.pop(session_id, None)
+            self._memory.pop(session_id, None)
+            self._orchestrators.pop(session_id, None)
+            self._leases.pop(session_id, None)
+            self._stamp(session_id)
+            self._versions.pop(session_id, None)
+
+    async def get_active_sessions(self) -> List[str]:
+        return list(self._sessions)
+
+    # Memory
+    def _apply_delta(self, session_id: str, delta: Dict[str, Any]):
+        state = self._memory.setdefault(session_id, {field: [] for field in MEMORY_FIELDS.values()})
+        for kind, field in MEMORY_FIELDS.items():
+            state[field].extend(delta.get(kind) or [])
+        state["session_id"] = delta["header"].get("session_id", session_id)
+        state["context_summary"] = delta["header"].get("context_summary", "")
+
+    async def append_memory_delta(self, session_id: str, delta: Dict[str, Any]) -> bool:
+        self._apply_delta(session_id, delta)
+        self._stamp(session_id)
+        return True
+
+    def _put_memory(self, session_id: str, memory_data: Dict[str, Any]):
+        state = {field: list(memory_data.get(field) or []) for field in MEMORY_FIELDS.values()}
+        state["session_id"] = memory_data.get("session_id", session_id)
+        state["context_summary"] = memory_data.get("context_summary", "")
+        self._memory[session_id] = state
+
+    async def save_memory_state(self, session_id: str, memory_data: Dict[str, Any]) -> bool:
+        self._put_memory(session_id, memory_data)
+        self._stamp(session_id)
+        return True
+
+    async def get_memory_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        state = self._memory.get(session_id)
+        if state is None:
+            return None
+        return {key: list(value) if isinstance(value, list) else value for key, value in state.items()}
+
+    # Orchestrator state
+    async def save_orchestrator_state(self, session_id: str, orchestrator_data: Dict[str, Any]) -> bool:
+        self._orchestrators[session_id] = orchestrator_data
+        return True
+
+    async def get_orchestrator_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self._orchestrators.get(session_id)
+
+    # Ownership leases
+    def _owner(self, session_id: str) -> Optional[str]:
+        lease = self._leases.get(session_id)
+        if lease and lease[1] > time.monotonic():
+            return lease[0]
+        return None
+
+    async def acquire_lease(self, session_id: str, ttl: timedelta) -> Optional[str]:
+        owner = self._owner(session_id)
+        if owner in (None, self.worker_id):
+            self._leases[session_id] = (self.worker_id, time.monotonic() + ttl.total_seconds())
+            return self.worker_id
+        return owner
+
+    async def renew_leases(self, session_ids: List[str], ttl: timedelta) -> List[str]:
+        held = [sid for sid in session_ids if self._owner(sid) == self.worker_id]
+        for session_id in held:
+            self._leases[session_id] = (self.worker_id, time.monotonic() + ttl.total_seconds())
+        return held
+
+    async def release_leases(self, session_ids: List[str]) -> List[str]:
+        held = [sid for sid in session_ids if self._owner(sid) == self.worker_id]
+        for session_id in held:
+            del self._leases[session_id]
+        return held
+
+    async def get_lease_owner(self, session_id: str) -> Optional[str]:
+        return self._owner(session_id)
+
+    async def register_worker(self, url: str, ttl: timedelta) -> bool:
+        self._workers[self.worker_id] = url
+        return True
+
+    async def get_worker_url(self, worker_id: str) -> Optional[str]:
+        return self._workers.get(worker_id)
@@ -2,36 +2,81 @@
 Redis Client for Session State Management
 Provides persistent, scalable storage for GroupChatLLM sessions
 Updated: 2025-07-06 23:15:05
+Updated: 2026-10-19 - Append-only per-session memory lists with paged rehydration
+Updated: 2026-10-19 - Pipelined multi-key operations and batch session loads
+Updated: 2026-10-19 - Sessions stored with the binary session codec
+Updated: 2026-10-19 - Per-write version stamps published for cache invalidation
+Updated: 2026-10-19 - Session ownership leases and worker address registry
+Updated: 2026-10-19 - StateStore backend on a process-wide connection pool
 """
 
 import os
 import json
 import pickle
-from typing import Any, Dict, Optional, List
+from typing import Any, AsyncGenerator, Callable, Dict, Optional, List, Tuple
 from datetime import datetime, timedelta
 import redis.asyncio as redis
+from redis.exceptions import WatchError
 from loguru import logger
 from models.schemas import Session, Message, SynapseConnection, CollaborationEvent
+from core.session_codec import session_codec
+from core.state_store import StateStore, MEMORY_FIELDS
 
-class RedisClient:
+# One connection pool per Redis URL, shared by every client in the process
+_connection_pools: Dict[str, redis.ConnectionPool] = {}
+
+
+def get_connection_pool(redis_url: str) -> redis.ConnectionPool:
+    """Process-wide connection pool for a Redis URL"""
+    if redis_url not in _connection_pools:
+        _connection_pools[redis_url] = redis.ConnectionPool.from_url(
+            redis_url,
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+            decode_responses=False  # We'll handle encoding ourselves
+        )
+    return _connection_pools[redis_url]
+
+
+class RedisClient(StateStore):
     """
-    Redis client wrapper for session state management
+    Redis state store for session state management
     Handles serialization and deserialization of complex objects
+    
+    Memory state layout per session:
+        memory:{id}:header    hash  - session_id, context_summary, counts
+        memory:{id}:messages  list  - one JSON message per entry (append-only)
+        memory:{id}:synapses  list  - one JSON synapse connection per entry
+        memory:{id}:events    list  - one JSON collaboration event per entry
+    
+    Every operation touching more than one key is sent as a single
+    MULTI/EXEC pipeline, i.e. one round trip.
+    
+    Each write also stores a new version stamp in version:{id} and publishes
+    "{id} {stamp}" on INVALIDATION_CHANNEL in the same transaction, so other
+    workers can drop cached copies.
     """
     
+    name = "redis"
+    shared = True
+    supports_invalidation = True
+    
+    INVALIDATION_CHANNEL = "session_invalidations"
+    MEMORY_TTL = timedelta(hours=24)
+    MEMORY_PAGE_SIZE = 500
+    # Delta kind -> (list key suffix, GroupMemory.to_dict field)
+    MEMORY_LISTS = {kind: (kind, field) for kind, field in MEMORY_FIELDS.items()}
+    
     def __init__(self, redis_url: Optional[str] = None):
+        super().__init__()
         self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
         self._client: Optional[redis.Redis] = None
-        self._connected = False
+        # Binary session records; JSON sessions written earlier are still readable
+        self.binary_codec = os.getenv("REDIS_BINARY_CODEC", "true").lower() == "true"
         
     async def connect(self) -> bool:
         """Connect to Redis server"""
         try:
-            self._client = redis.from_url(
-                self.redis_url,
-                encoding="utf-8",
-                decode_responses=False  # We'll handle encoding ourselves
-            )
+            self._client = redis.Redis(connection_pool=get_connection_pool(self.redis_url))
             # Test connection
             await self._client.ping()
             self._connected = True
@@ -48,35 +93,167 @@ class RedisClient:
             await self._client.close()
             self._connected = False
             
-    def is_connected(self) -> bool:
-        """Check if Redis is connected"""
-        return self._connected
+    # Version Stamps
+    def _queue_version(self, pipe, session_id: str) -> str:
+        """Queue a new version stamp and its invalidation message; returns the stamp"""
+        version = self._next_version()
+        pipe.set(f"version:{session_id}", version, ex=self.SESSION_TTL)
+        pipe.publish(self.INVALIDATION_CHANNEL, f"{session_id} {version}")
+        return version
+    
+    async def invalidations(self) -> AsyncGenerator[Tuple[str, str], None]:
+        """Yield (session_id, version) for every write published by any worker"""
+        pubsub = self._client.pubsub()
+        await pubsub.subscribe(self.INVALIDATION_CHANNEL)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                session_id, version = message["data"].decode().split(" ", 1)
+                yield session_id, version
+        finally:
+            await pubsub.reset()
+    
+    # Session Ownership Leases
+    async def acquire_lease(self, session_id: str, ttl: timedelta) -> Optional[str]:
+        """
+        Take (or refresh our own) ownership lease on a session
+        Returns the owner after the attempt: this worker's id on success
+        """
+        if not self._connected:
+            return None
+            
+        try:
+            key = f"lease:{session_id}"
+            if await self._client.set(key, self.worker_id, nx=True, px=ttl):
+                return self.worker_id
+            held = await self.renew_leases([session_id], ttl)
+            if held:
+                return self.worker_id
+            owner = await self._client.get(key)
+            return owner.decode() if owner else None
+        except Exception as e:
+            logger.error(f"Error acquiring lease for {session_id}: {e}")
+            return None
+    
+    async def renew_leases(self, session_ids: List[str], ttl: timedelta) -> List[str]:
+        """Extend the leases this worker still holds; returns those session ids"""
+        return await self._update_leases(session_ids, lambda pipe, key: pipe.pexpire(key, ttl))
+    
+    async def release_leases(self, session_ids: List[str]) -> List[str]:
+        """Give up the leases this worker holds so another worker can take over at once"""
+        return await self._update_leases(session_ids, lambda pipe, key: pipe.delete(key))
+    
+    async def _update_leases(self, session_ids: List[str], update: Callable) -> List[str]:
+        """Apply `update` to the leases owned by this worker, atomically w.r.t. ownership changes"""
+        if not self._connected or not session_ids:
+            return []
+            
+        keys = [f"lease:{session_id}" for session_id in session_ids]
+        try:
+            async with self._client.pipeline(transaction=True) as pipe:
+                # WATCH so a lease taken over between the read and the update isn't touched
+                await pipe.watch(*keys)
+                owners = await pipe.mget(keys)
+                held = [
+                    (session_id, key) for session_id, key, owner in zip(session_ids, keys, owners)
+                    if owner and owner.decode() == self.worker_id
+                ]
+                pipe.multi()
+                for _, key in held:
+                    update(pipe, key)
+                await pipe.execute()
+            return [session_id for session_id, _ in held]
+        except WatchError:
+            # Some lease changed hands mid-update; the next heartbeat retries
+            return []
+        except Exception as e:
+            logger.error(f"Error updating {len(session_ids)} leases: {e}")
+            return []
+    
+    async def get_lease_owner(self, session_id: str) -> Optional[str]:
+        """Worker id currently owning a session, if any"""
+        if not self._connected:
+            return None
+            
+        try:
+            owner = await self._client.get(f"lease:{session_id}")
+            return owner.decode() if owner else None
+        except Exception as e:
+            logger.error(f"Error getting lease owner for {session_id}: {e}")
+            return None
+    
+    async def register_worker(self, url: str, ttl: timedelta) -> bool:
+        """Advertise the address other workers should forward requests to"""
+        if not self._connected:
+            return False
+            
+        try:
+            await self._client.set(f"worker:{self.worker_id}", url, px=ttl)
+            return True
+        except Exception as e:
+            logger.error(f"Error registering worker {self.worker_id}: {e}")
+            return False
+    
+    async def get_worker_url(self, worker_id: str) -> Optional[str]:
+        if not self._connected:
+            return None
             
+        try:
+            url = await self._client.get(f"worker:{worker_id}")
+            return url.decode() if url else None
+        except Exception as e:
+            logger.error(f"Error getting address of worker {worker_id}: {e}")
+            return None
+    
     # Session Management Methods
+    def _dump_session(self, session: Session) -> bytes:
+        if self.binary_codec:
+            return session_codec.encode(session)
+        return session.model_dump_json().encode()
+    
+    def _load_session(self, data: bytes) -> Session:
+        if session_codec.is_encoded(data):
+            return session_codec.decode(data)
+        return Session.model_validate_json(data)
+    
+    def _queue_session(self, pipe, session: Session):
+        pipe.setex(f"session:{session.id}", self.SESSION_TTL, self._dump_session(session))
+        pipe.sadd("active_sessions", session.id)
+    
     async def save_session(self, session: Session) -> bool:
         """Save a session to Redis"""
         if not self._connected:
             return False
             
         try:
-            key = f"session:{session.id}"
-            # Convert Pydantic model to dict and serialize
-            session_data = session.model_dump_json()
-            
-            # Set with expiration (24 hours)
-            await self._client.setex(
-                key, 
-                timedelta(hours=24), 
-                session_data
-            )
-            
-            # Add to active sessions set
-            await self._client.sadd("active_sessions", session.id)
+            async with self._client.pipeline(transaction=True) as pipe:
+                self._queue_session(pipe, session)
+                version = self._queue_version(pipe, session.id)
+                await pipe.execute()
+            self._written(session.id, version)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving session {session.id}: {e}")
+            return False
+    
+    async def save_session_with_memory(self, session: Session, delta: Dict[str, Any]) -> bool:
+        """Save a session and a GroupMemory delta atomically in one round trip"""
+        if not self._connected:
+            return False
             
+        try:
+            async with self._client.pipeline(transaction=True) as pipe:
+                self._queue_session(pipe, session)
+                self._queue_memory_delta(pipe, session.id, delta)
+                version = self._queue_version(pipe, session.id)
+                await pipe.execute()
+            self._written(session.id, version)
             return True
         except Exception as e:
             logger.error(f"Error saving session {session.id}: {e}")
-            return False    
+            return False
+    
     async def get_session(self, session_id: str) -> Optional[Session]:
         """Get a session from Redis"""
         if not self._connected:
@@ -87,36 +264,72 @@ class RedisClient:
             session_data = await self._client.get(key)
             
             if session_data:
-                # Deserialize from JSON
-                return Session.model_validate_json(session_data)
+                return self._load_session(session_data)
             return None
         except Exception as e:
             logger.error(f"Error getting session {session_id}: {e}")
             return None
     
-    async def update_session(self, session: Session) -> bool:
-        """Update an existing session"""
-        return await self.save_session(session)
+    async def get_sessions(self, session_ids: List[str]) -> Dict[str, Session]:
+        """Load many sessions with a single MGET (missing sessions are omitted)"""
+        if not self._connected or not session_ids:
+            return {}
+            
+        try:
+            values = await self._client.mget([f"session:{sid}" for sid in session_ids])
+            return {
+                sid: self._load_session(data)
+                for sid, data in zip(session_ids, values) if data
+            }
+        except Exception as e:
+            logger.error(f"Error getting {len(session_ids)} sessions: {e}")
+            return {}
     
-    async def delete_session(self, session_id: str) -> bool:
-        """Delete a session from Redis"""
+    async def get_session_with_memory(
+        self, session_id: str
+    ) -> Tuple[Optional[Session], Optional[Dict[str, Any]], Optional[str]]:
+        """Get a session, its memory state and their version stamp, normally in one round trip"""
         if not self._connected:
-            return False
+            return None, None, None
             
         try:
-            # Remove from Redis
-            await self._client.delete(f"session:{session_id}")
+            async with self._client.pipeline(transaction=True) as pipe:
+                pipe.get(f"session:{session_id}")
+                pipe.get(f"version:{session_id}")
+                self._queue_memory_reads(pipe, session_id)
+                results = await pipe.execute()
             
-            # Remove from active sessions set
-            await self._client.srem("active_sessions", session_id)
+            session = self._load_session(results[0]) if results[0] else None
+            version = results[1].decode() if results[1] else None
+            return session, await self._finish_memory_state(session_id, results[2:]), version
+        except Exception as e:
+            logger.error(f"Error getting session {session_id}: {e}")
+            return None, None, None
+    
+    async def delete_sessions(self, session_ids: List[str]) -> bool:
+        """Delete several sessions and their related data in one round trip"""
+        if not self._connected or not session_ids:
+            return False
             
-            # Clean up related data
-            await self._client.delete(f"memory:{session_id}")
-            await self._client.delete(f"orchestrator:{session_id}")
+        try:
+            keys = []
+            for session_id in session_ids:
+                keys.append(f"session:{session_id}")
+                keys.append(f"orchestrator:{session_id}")
+                keys.append(f"lease:{session_id}")
+                keys.extend(self._memory_keys(session_id))
             
+            async with self._client.pipeline(transaction=True) as pipe:
+                pipe.srem("active_sessions", *session_ids)
+                versions = {session_id: self._queue_version(pipe, session_id) for session_id in session_ids}
+                # Deleted after the stamps are queued so no version key outlives its session
+                pipe.delete(*keys, *[f"version:{session_id}" for session_id in session_ids])
+                await pipe.execute()
+            for session_id, version in versions.items():
+                self._written(session_id, version)
             return True
         except Exception as e:
-            logger.error(f"Error deleting session {session_id}: {e}")
+            logger.error(f"Error deleting sessions {session_ids}: {e}")
             return False    
     async def get_active_sessions(self) -> List[str]:
         """Get all active session IDs"""
@@ -131,41 +344,136 @@ class RedisClient:
             return []
     
     # Memory State Management
-    async def save_memory_state(self, session_id: str, memory_data: Dict[str, Any]) -> bool:
-        """Save GroupMemory state to Redis"""
+    def _memory_key(self, session_id: str, part: str) -> str:
+        return f"memory:{session_id}:{part}"
+    
+    def _memory_keys(self, session_id: str) -> List[str]:
+        """All memory keys of a session, including the pre-list single key"""
+        return [f"memory:{session_id}"] + [
+            self._memory_key(session_id, part) for part in ("header", "messages", "synapses", "events")
+        ]
+    
+    def _queue_memory_delta(self, pipe, session_id: str, delta: Dict[str, Any]):
+        for kind, (suffix, _) in self.MEMORY_LISTS.items():
+            items = delta.get(kind) or []
+            key = self._memory_key(session_id, suffix)
+            if items:
+                pipe.rpush(key, *[item.model_dump_json() for item in items])
+            # Every list, grown or not: one expiring early would truncate the history
+            pipe.expire(key, self.MEMORY_TTL)
+        
+        header_key = self._memory_key(session_id, "header")
+        pipe.hset(header_key, mapping=delta["header"])
+        pipe.expire(header_key, self.MEMORY_TTL)
+        # The session record is only rewritten on create/hibernate: a session
+        # in use must not expire under its memory
+        pipe.expire(f"session:{session_id}", self.SESSION_TTL)
+    
+    async def append_memory_delta(self, session_id: str, delta: Dict[str, Any]) -> bool:
+        """
+        Append new messages/synapses/events and update the header
+        `delta` is GroupMemory.take_delta(): model lists plus a header dict
+        """
         if not self._connected:
             return False
             
         try:
-            key = f"memory:{session_id}"
-            # Serialize complex objects (messages, synapses, events)
-            serialized_data = json.dumps(memory_data, default=str)
+            async with self._client.pipeline(transaction=True) as pipe:
+                self._queue_memory_delta(pipe, session_id, delta)
+                version = self._queue_version(pipe, session_id)
+                await pipe.execute()
+            self._written(session_id, version)
+            return True
+        except Exception as e:
+            logger.error(f"Error appending memory delta for {session_id}: {e}")
+            return False
+    
+    async def save_memory_state(self, session_id: str, memory_data: Dict[str, Any]) -> bool:
+        """Replace the full GroupMemory state (GroupMemory.to_dict() format)"""
+        if not self._connected:
+            return False
             
-            await self._client.setex(
-                key,
-                timedelta(hours=24),
-                serialized_data
-            )
+        try:
+            async with self._client.pipeline(transaction=True) as pipe:
+                pipe.delete(*self._memory_keys(session_id))
+                
+                for _, (suffix, field) in self.MEMORY_LISTS.items():
+                    items = memory_data.get(field) or []
+                    if items:
+                        key = self._memory_key(session_id, suffix)
+                        pipe.rpush(key, *[json.dumps(item, default=str) for item in items])
+                        pipe.expire(key, self.MEMORY_TTL)
+                
+                header_key = self._memory_key(session_id, "header")
+                pipe.hset(header_key, mapping={
+                    "session_id": memory_data.get("session_id", session_id),
+                    "context_summary": memory_data.get("context_summary", "")
+                })
+                pipe.expire(header_key, self.MEMORY_TTL)
+                version = self._queue_version(pipe, session_id)
+                await pipe.execute()
+            self._written(session_id, version)
             return True
         except Exception as e:
             logger.error(f"Error saving memory state for {session_id}: {e}")
             return False    
     async def get_memory_state(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get GroupMemory state from Redis"""
+        """Get GroupMemory state from Redis, paging through the append-only lists"""
         if not self._connected:
             return None
             
         try:
-            key = f"memory:{session_id}"
-            memory_data = await self._client.get(key)
-            
-            if memory_data:
-                return json.loads(memory_data)
-            return None
+            async with self._client.pipeline(transaction=True) as pipe:
+                self._queue_memory_reads(pipe, session_id)
+                results = await pipe.execute()
+            return await self._finish_memory_state(session_id, results)
         except Exception as e:
             logger.error(f"Error getting memory state for {session_id}: {e}")
             return None
     
+    def _queue_memory_reads(self, pipe, session_id: str):
+        """Header, then (length, first page) of each list"""
+        pipe.hgetall(self._memory_key(session_id, "header"))
+        for _, (suffix, _) in self.MEMORY_LISTS.items():
+            key = self._memory_key(session_id, suffix)
+            pipe.llen(key)
+            pipe.lrange(key, 0, self.MEMORY_PAGE_SIZE - 1)
+    
+    async def _finish_memory_state(self, session_id: str, results: List[Any]) -> Optional[Dict[str, Any]]:
+        """Build the state from _queue_memory_reads results, fetching any remaining pages in one pipeline"""
+        header = results[0]
+        if not header:
+            # Sessions written before the list layout
+            memory_data = await self._client.get(f"memory:{session_id}")
+            return json.loads(memory_data) if memory_data else None
+        
+        header = {k.decode(): v.decode() for k, v in header.items()}
+        state: Dict[str, Any] = {
+            "session_id": header.get("session_id", session_id),
+            "context_summary": header.get("context_summary", "")
+        }
+        
+        # Remaining pages of every list, bounded per reply but sent together
+        remaining = []
+        for i, (_, (suffix, field)) in enumerate(self.MEMORY_LISTS.items()):
+            length, first_page = results[1 + 2 * i], results[2 + 2 * i]
+            state[field] = list(first_page)
+            key = self._memory_key(session_id, suffix)
+            for start in range(self.MEMORY_PAGE_SIZE, length, self.MEMORY_PAGE_SIZE):
+                remaining.append((field, key, start))
+        
+        if remaining:
+            async with self._client.pipeline(transaction=False) as pipe:
+                for _, key, start in remaining:
+                    pipe.lrange(key, start, start + self.MEMORY_PAGE_SIZE - 1)
+                pages = await pipe.execute()
+            for (field, _, _), page in zip(remaining, pages):
+                state[field].extend(page)
+        
+        for _, (_, field) in self.MEMORY_LISTS.items():
+            state[field] = [json.loads(raw) for raw in state[field]]
+        return state
+    
     # Orchestrator State Management
     async def save_orchestrator_state(self, session_id: str, orchestrator_data: Dict[str, Any]) -> bool:
         """Save StreamingOrchestrator state to Redis"""
@@ -0,0 +1,218 @@
+"""
+Response Cache
+Exact-match cache of provider streams, replayed through the normal streaming path
+Updated: 2026-10-19 - Initial LRU/TTL cache with optional Redis tier
+
+The key is a hash of everything that determines a provider's answer: the
+provider, the model, temperature, max tokens and the provider-ready message
+list (AIProvider.cache_payload). Preset panels and fixed missions produce the
+same first turn over and over; a hit replays the recorded chunks instead of
+calling the API. Sampling makes a fresh answer differ, so sessions opt in
+(CreateSessionRequest.response_cache).
+
+Entries keep each chunk's offset from the start of the stream, so a hit can
+be replayed at the original pace (time to first token included) or at once.
+Only streams that finish without error are stored.
+
+Entries live in a process-local LRU with a TTL; with RESPONSE_CACHE_REDIS=true
+they are also written to Redis (same TTL) so every worker shares them, and a
+local miss falls back to Redis.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import Counter, OrderedDict
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+from loguru import logger
+from providers.base_provider import AIProvider
+
+REPLAY_MODES = ("instant", "paced")
+
+
+class ResponseCache:
+    """Exact-match response cache"""
+
+    KEY_PREFIX = "response_cache:"
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        redis_url: Optional[str] = None
+    ):
+        self.max_entries = max_entries or int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+        self.ttl_seconds = ttl_seconds or int(os.getenv("RESPONSE_CACHE_TTL", "86400"))
+        if redis_url is None and os.getenv("RESPONSE_CACHE_REDIS", "false").lower() == "true":
+            redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.redis_url = redis_url
+        self._redis = None
+
+        # key -> (expires at, entry), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.stats_counter: Counter = Counter()
+
+    # Keys and storage
+    @staticmethod
+    def key_for(provider: AIProvider, messages: list, temperature: float, max_tokens: Optional[int]) -> str:
+        payload = json.dumps({
+            "provider": provider.personality.provider,
+            "model": provider.model_name,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": provider.cache_payload(messages)
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _redis_client(self):
+        if self._redis is None and self.redis_url:
+            import redis.asyncio as redis
+            from core.redis_client import get_connection_pool
+            self._redis = redis.Redis(connection_pool=get_connection_pool(self.redis_url))
+        return self._redis
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        cached = self._entries.get(key)
+        if cached:
+            expires_at, entry = cached
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                return entry
+            del self._entries[key]
+            self.stats_counter["expired"] += 1
+
+        client = self._redis_client()
+        if client:
+            try:
+                raw = await client.get(self.KEY_PREFIX + key)
+            except Exception as e:
+                logger.warning(f"Response cache Redis read failed: {e}")
+                return None
+            if raw:
+                entry = json.loads(raw)
+                self._put_local(key, entry, entry["stored_at"] + self.ttl_seconds)
+                return entry
+        return None
+
+    def _put_local(self, key: str, entry: Dict[str, Any], expires_at: float):
+        self._entries[key] = (expires_at, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats_counter["evicted"] += 1
+
+    async def put(self, key: str, entry: Dict[str, Any]):
+        self._put_local(key, entry, entry["stored_at"] + self.ttl_seconds)
+        self.stats_counter["stored"] += 1
+        client = self._redis_client()
+        if client:
+            try:
+                await client.set(self.KEY_PREFIX + key, json.dumps(entry), ex=self.ttl_seconds)
+            except Exception as e:
+                logger.warning(f"Response cache Redis write failed: {e}")
+
+    async def clear(self):
+        self._entries.clear()
+        client = self._redis_client()
+        if client:
+            keys = [key async for key in client.scan_iter(match=self.KEY_PREFIX + "*")]
+            if keys:
+                await client.delete(*keys)
+
+    # Streaming
+    async def stream(
+        self,
+        provider: AIProvider,
+        messages: list,
+        replay: str = "instant",
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        session_stats: Optional[Counter] = None,
+        outcome: Optional[Dict[str, Any]] = None
+    ) -> AsyncGenerator[str, None]:
+        """
+        provider.generate_stream(messages), served from the cache when possible
+        `outcome["response_cache"]` is set to "hit" or "miss"; hits and tokens
+        saved are also counted in `session_stats`
+        """
+        counters = [self.stats_counter] + ([session_stats] if session_stats is not None else [])
+        key = self.key_for(provider, messages, temperature, max_tokens)
+        entry = await self.get(key)
+
+        if entry:
+            for counter in counters:
+                counter["hits"] += 1
+                counter["tokens_saved"] += entry["input_tokens"] + entry["output_tokens"]
+            if outcome is not None:
+                outcome["response_cache"] = "hit"
+            # Nothing was billed for this answer
+            provider.last_usage = None
+            async for chunk in self._replay(entry, replay):
+                yield chunk
+            return
+
+        for counter in counters:
+            counter["misses"] += 1
+        if outcome is not None:
+            outcome["response_cache"] = "miss"
+
+        started = time.monotonic()
+        chunks: List[Tuple[float, str]] = []
+        async for chunk in provider.generate_stream(messages, temperature, max_tokens):
+            chunks.append((round(time.monotonic() - started, 4), chunk))
+            yield chunk
+
+        # Reached only when the stream finished without error
+        if chunks:
+            await self.put(key, self._entry(provider, messages, chunks))
+
+    @staticmethod
+    def _entry(provider: AIProvider, messages: list, chunks: List[Tuple[float, str]]) -> Dict[str, Any]:
+        usage = provider.last_usage
+        if usage:
+            input_tokens, output_tokens = usage["input_tokens"], usage["output_tokens"]
+        else:
+            input_tokens = sum(provider.get_token_count(str(msg.get("content", ""))) for msg in messages)
+            output_tokens = provider.get_token_count("".join(text for _, text in chunks))
+        return {
+            "chunks": chunks,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "model": provider.model_name,
+            "stored_at": time.time()
+        }
+
+    @staticmethod
+    async def _replay(entry: Dict[str, Any], replay: str) -> AsyncGenerator[str, None]:
+        started = time.monotonic()
+        for offset, text in entry["chunks"]:
+            if replay == "paced":
+                delay = offset - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                # Still let other panelists' streams interleave
+                await asyncio.sleep(0)
+            yield text
+
+    def stats(self) -> Dict[str, Any]:
+        return summarize(self.stats_counter, entries=len(self._entries), redis=bool(self.redis_url))
+
+
+def summarize(counter: Counter, **extra) -> Dict[str, Any]:
+    """Hit rate and tokens saved from a hit/miss counter"""
+    lookups = counter["hits"] + counter["misses"]
+    return {
+        "hits": counter["hits"],
+        "misses": counter["misses"],
+        "hit_rate": round(counter["hits"] / lookups, 3) if lookups else None,
+        "tokens_saved": counter["tokens_saved"],
+        **{name: value for name, value in counter.items() if name not in ("hits", "misses", "tokens_saved")},
+        **extra
+    }
+
+
+# Singleton instance
+response_cache = ResponseCache()
@@ -0,0 +1,159 @@
+"""
+Session Cache
+Per-worker read-through cache of deserialized sessions
+Updated: 2026-10-19 - Initial LRU cache with pub/sub invalidation
+Updated: 2026-10-19 - Works against any StateStore that supports invalidation
+Updated: 2026-10-19 - Entries hold only the session (memory lives in SessionManager)
+
+Entries carry the version stamp they were read at. Writes from any worker
+publish a new stamp (see StateStore.invalidations); a cached entry
+whose stamp differs is dropped, and a read that raced with a newer write is
+not cached at all.
+"""
+
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from loguru import logger
+from models.schemas import Session
+
+
+@dataclass
+class CacheEntry:
+    session: Session
+    version: Optional[str]
+    cached_at: float
+
+
+class SessionCache:
+    """LRU of sessions kept coherent across workers through store invalidations (Redis pub/sub)"""
+
+    RECONNECT_DELAY = 1.0
+
+    def __init__(self, max_entries: Optional[int] = None, max_age: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("SESSION_CACHE_SIZE", "256"))
+        # Upper bound on staleness should an invalidation ever be missed
+        self.max_age = max_age if max_age is not None else float(os.getenv("SESSION_CACHE_MAX_AGE", "300"))
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        # Newest version seen per session, to reject reads that raced a write
+        self._latest: "OrderedDict[str, str]" = OrderedDict()
+        self._listener: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.stale_rejections = 0
+        self._load_seconds = 0.0
+        self._loads = 0
+
+    def get(self, session_id: str) -> Optional[CacheEntry]:
+        """Cached entry, or None (counted as a miss)"""
+        entry = self._entries.get(session_id)
+        if entry and time.monotonic() - entry.cached_at > self.max_age:
+            del self._entries[session_id]
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(session_id)
+        self.hits += 1
+        return entry
+
+    def put(
+        self,
+        session_id: str,
+        session: Session,
+        version: Optional[str],
+        load_seconds: float = 0.0
+    ):
+        """Cache what a store read returned; `load_seconds` is what the read cost"""
+        self._load_seconds += load_seconds
+        self._loads += 1
+        latest = self._latest.get(session_id)
+        if latest is not None and latest != version:
+            # A newer write was announced while this read was in flight
+            self.stale_rejections += 1
+            return
+
+        self._entries[session_id] = CacheEntry(session, version, time.monotonic())
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, session_id: str):
+        self._entries.pop(session_id, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._latest.clear()
+
+    def on_local_write(self, session_id: str, version: str):
+        """This worker wrote the session: its cached objects are the written state"""
+        self._remember(session_id, version)
+        entry = self._entries.get(session_id)
+        if entry:
+            entry.version = version
+
+    def on_remote_write(self, session_id: str, version: str):
+        """Some worker wrote the session: drop a cached copy at another version"""
+        self._remember(session_id, version)
+        entry = self._entries.get(session_id)
+        if entry and entry.version != version:
+            del self._entries[session_id]
+            self.invalidations += 1
+
+    def _remember(self, session_id: str, version: str):
+        self._latest[session_id] = version
+        self._latest.move_to_end(session_id)
+        while len(self._latest) > 4 * self.max_entries:
+            self._latest.popitem(last=False)
+
+    async def start(self, store):
+        """Hook into local writes and start listening for remote ones"""
+        store.write_listeners.append(self.on_local_write)
+        self._listener = asyncio.create_task(self._listen(store, f"{store.worker_id}:"))
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self, store, own_prefix: str):
+        while True:
+            try:
+                async for session_id, version in store.invalidations():
+                    # Our own writes were already applied by on_local_write
+                    if not version.startswith(own_prefix):
+                        self.on_remote_write(session_id, version)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Session cache invalidation listener lost: {e}")
+            # Invalidations may have been missed while unsubscribed
+            self.clear()
+            await asyncio.sleep(self.RECONNECT_DELAY)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and the deserialization/fetch time hits avoided"""
+        lookups = self.hits + self.misses
+        average_load = self._load_seconds / self._loads if self._loads else 0.0
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "stale_rejections": self.stale_rejections,
+            "average_load_ms": average_load * 1000,
+            "time_saved_seconds": self.hits * average_load
+        }
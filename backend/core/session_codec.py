@@ -0,0 +1,250 @@
+"""
+Session Codec
+Compact, versioned binary encoding for sessions and memory records
+Updated: 2026-10-19 - Initial binary codec (schema version 1)
+
+Layout: 5-byte header (magic "GC", schema version, flags, record kind)
+followed by the record as positional tuples in `marshal` format, zlib
+compressed above a size threshold. Field names are not stored, enums are
+stored by value and datetimes as integer microseconds since the epoch (UTC).
+
+Decoding trusts its input the same way pickle did: only decode data this
+service wrote to its own Redis.
+"""
+
+import os
+import marshal
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Tuple, Union
+from models.schemas import (
+    Session, Message, SynapseConnection, CollaborationEvent,
+    PanelistConfig, ModelPersonality, MessageType, SynapseType, CollaborationState
+)
+
+MAGIC = b"GC"
+SCHEMA_VERSION = 1
+MARSHAL_VERSION = 4
+
+# Header flags
+FLAG_ZLIB = 0x01
+
+# Record kinds
+KIND_SESSION = 1
+KIND_MESSAGE = 2
+KIND_SYNAPSE = 3
+KIND_EVENT = 4
+
+_HEADER = struct.Struct(">2sBBB")
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_set = object.__setattr__
+
+# Enum value -> member (cheaper than calling the enum)
+_MESSAGE_TYPES = {member.value: member for member in MessageType}
+_SYNAPSE_TYPES = {member.value: member for member in SynapseType}
+_STATES = {member.value: member for member in CollaborationState}
+
+Record = Union[Session, Message, SynapseConnection, CollaborationEvent]
+
+
+class CodecError(ValueError):
+    """Raised when a payload is not a readable codec record"""
+    pass
+
+
+def _micros(value: datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _datetime(micros: int) -> datetime:
+    return _EPOCH + _MICROSECOND * micros
+
+
+def _build(model_class, fields: Dict[str, Any]):
+    """
+    model_construct() for a complete set of already-validated fields, minus its
+    per-field default/alias resolution (the dominant decode cost otherwise)
+    """
+    instance = model_class.__new__(model_class)
+    _set(instance, "__dict__", fields)
+    _set(instance, "__pydantic_fields_set__", set(fields))
+    _set(instance, "__pydantic_extra__", None)
+    _set(instance, "__pydantic_private__", None)
+    return instance
+
+
+def _plain(value: Any) -> Any:
+    """Reduce free-form metadata to marshal-able types (mirrors json default=str)"""
+    if value is None or isinstance(value, (str, int, float, bool, bytes)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [_plain(v) for v in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+# Schema version 1 rows
+def _message_row(message: Message) -> tuple:
+    return (
+        message.id, message.session_id, message.content, message.message_type.value,
+        message.model_source, _micros(message.timestamp), message.metadata,
+        message.synapse_connections
+    )
+
+
+def _message_from_row(row: tuple) -> Message:
+    return _build(Message, {
+        "id": row[0], "session_id": row[1], "content": row[2], "message_type": _MESSAGE_TYPES[row[3]],
+        "model_source": row[4], "timestamp": _datetime(row[5]), "metadata": row[6],
+        "synapse_connections": row[7]
+    })
+
+
+def _synapse_row(synapse: SynapseConnection) -> tuple:
+    return (
+        synapse.id, synapse.from_message_id, synapse.to_message_id,
+        synapse.synapse_type.value, synapse.strength, _micros(synapse.timestamp)
+    )
+
+
+def _synapse_from_row(row: tuple) -> SynapseConnection:
+    return _build(SynapseConnection, {
+        "id": row[0], "from_message_id": row[1], "to_message_id": row[2],
+        "synapse_type": _SYNAPSE_TYPES[row[3]], "strength": row[4], "timestamp": _datetime(row[5])
+    })
+
+
+def _event_row(event: CollaborationEvent) -> tuple:
+    return (
+        event.id, event.session_id, event.event_type, event.involved_models,
+        event.description, _micros(event.timestamp), event.metadata
+    )
+
+
+def _event_from_row(row: tuple) -> CollaborationEvent:
+    return _build(CollaborationEvent, {
+        "id": row[0], "session_id": row[1], "event_type": row[2], "involved_models": row[3],
+        "description": row[4], "timestamp": _datetime(row[5]), "metadata": row[6]
+    })
+
+
+def _panelist_row(config: PanelistConfig) -> tuple:
+    return (config.id, config.personality.model_dump(), config.is_active, config.state.value)
+
+
+def _panelist_from_row(row: tuple) -> PanelistConfig:
+    return _build(PanelistConfig, {
+        "id": row[0], "personality": ModelPersonality.model_validate(row[1]),
+        "is_active": row[2], "state": _STATES[row[3]]
+    })
+
+
+def _session_row(session: Session) -> tuple:
+    return (
+        session.id, session.mission,
+        [_panelist_row(c) for c in session.panelist_configs],
+        [_message_row(m) for m in session.messages],
+        [_synapse_row(s) for s in session.synapse_connections],
+        [_event_row(e) for e in session.collaboration_events],
+        _micros(session.created_at), _micros(session.updated_at),
+        session.is_active, session.metadata
+    )
+
+
+def _session_from_row(row: tuple) -> Session:
+    return _build(Session, {
+        "id": row[0], "mission": row[1],
+        "panelist_configs": [_panelist_from_row(r) for r in row[2]],
+        "messages": [_message_from_row(r) for r in row[3]],
+        "synapse_connections": [_synapse_from_row(r) for r in row[4]],
+        "collaboration_events": [_event_from_row(r) for r in row[5]],
+        "created_at": _datetime(row[6]), "updated_at": _datetime(row[7]),
+        "is_active": row[8], "metadata": row[9]
+    })
+
+
+# Model class -> (kind, row encoder); kind -> row decoder for SCHEMA_VERSION
+_ENCODERS: Dict[type, Tuple[int, Callable[[Any], tuple]]] = {
+    Session: (KIND_SESSION, _session_row),
+    Message: (KIND_MESSAGE, _message_row),
+    SynapseConnection: (KIND_SYNAPSE, _synapse_row),
+    CollaborationEvent: (KIND_EVENT, _event_row)
+}
+_DECODERS: Dict[int, Callable[[tuple], Any]] = {
+    KIND_SESSION: _session_from_row,
+    KIND_MESSAGE: _message_from_row,
+    KIND_SYNAPSE: _synapse_from_row,
+    KIND_EVENT: _event_from_row
+}
+
+
+class SessionCodec:
+    """
+    Encodes Session, Message, SynapseConnection and CollaborationEvent to
+    compact binary records and back
+    """
+
+    def __init__(self, compress_threshold: int = None, compress_level: int = 1):
+        # Payloads at least this large are zlib-compressed (0 disables compression)
+        self.compress_threshold = (
+            compress_threshold if compress_threshold is not None
+            else int(os.getenv("CODEC_COMPRESS_THRESHOLD", "4096"))
+        )
+        self.compress_level = compress_level
+
+    @staticmethod
+    def is_encoded(data: bytes) -> bool:
+        """Whether `data` is a codec record (as opposed to legacy JSON)"""
+        return data[:2] == MAGIC
+
+    def encode(self, record: Record) -> bytes:
+        """Encode a model to a binary record"""
+        encoder = _ENCODERS.get(type(record))
+        if not encoder:
+            raise CodecError(f"No codec for {type(record).__name__}")
+        kind, to_row = encoder
+
+        row = to_row(record)
+        try:
+            body = marshal.dumps(row, MARSHAL_VERSION)
+        except ValueError:
+            # Metadata holding non-primitive values
+            body = marshal.dumps(_plain(row), MARSHAL_VERSION)
+
+        flags = 0
+        if self.compress_threshold and len(body) >= self.compress_threshold:
+            body = zlib.compress(body, self.compress_level)
+            flags |= FLAG_ZLIB
+        return _HEADER.pack(MAGIC, SCHEMA_VERSION, flags, kind) + body
+
+    def decode(self, data: bytes) -> Record:
+        """Decode a binary record back to its model"""
+        if len(data) < _HEADER.size:
+            raise CodecError("Truncated record")
+        magic, version, flags, kind = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise CodecError("Not a codec record")
+        if version != SCHEMA_VERSION:
+            raise CodecError(f"Unsupported schema version {version} (expected {SCHEMA_VERSION})")
+        decoder = _DECODERS.get(kind)
+        if not decoder:
+            raise CodecError(f"Unknown record kind {kind}")
+
+        body = data[_HEADER.size:]
+        try:
+            if flags & FLAG_ZLIB:
+                body = zlib.decompress(body)
+            return decoder(marshal.loads(body))
+        except (ValueError, EOFError, TypeError, IndexError, KeyError, zlib.error) as e:
+            raise CodecError(f"Corrupt record: {e}") from e
+
+
+# Singleton instance
+session_codec = SessionCodec()
@@ -2,6 +2,15 @@
 Session Manager
 Manages collaborative AI sessions and coordinates all components
 Updated: 2025-07-06 23:20:00 - Added Redis support for scalable state management
+Updated: 2026-10-19 - Memory persisted as append-only deltas after each turn
+Updated: 2026-10-19 - Session and memory loaded/saved in single Redis round trips
+Updated: 2026-10-19 - Read-through session cache with cross-worker invalidation
+Updated: 2026-10-19 - Session ownership leases for multi-worker deployments
+Updated: 2026-10-19 - Pluggable state store (Redis, SQLite or in-memory)
+Updated: 2026-10-19 - Idle/LRU hibernation of sessions under a memory budget
+Updated: 2026-10-19 - Per-session opt-in to the response cache
+Updated: 2026-10-19 - Provider streams recorded to cassettes with PROVIDER_CASSETTE_DIR
+Updated: 2026-10-19 - Non-streaming turns under a deadline
 """
 
 from typing import Any, Dict, List, Optional, AsyncGenerator
@@ -9,33 +18,285 @@ from models.schemas import Session, CreateSessionRequest, StreamingResponse, Pan
 from memory.group_memory import GroupMemory
 from streaming.streaming_orchestrator import StreamingOrchestrator
 from providers.model_factory import ModelFactory
-from core.redis_client import redis_client
-from datetime import datetime
+from core.state_store import StateStore, create_state_store
+from core.memory_store import InMemoryStateStore
+from core.session_cache import SessionCache
+from core.response_cache import response_cache, summarize
+from providers.cassette import RecordingProvider, recording_cassette
+from collections import OrderedDict
+from datetime import datetime, timedelta
 from loguru import logger
+import asyncio
+import os
+import time
 import uuid
 
 
+class SessionOwnedElsewhere(Exception):
+    """The session's orchestrator lives on another worker"""
+    
+    def __init__(self, session_id: str, owner: Optional[str], owner_url: Optional[str]):
+        super().__init__(f"Session {session_id} is owned by worker {owner}")
+        self.session_id = session_id
+        self.owner = owner
+        self.owner_url = owner_url
+
+
 class SessionManager:
     """
     Central manager for GroupChatLLM sessions
     Coordinates memory, streaming, and providers
-    Now with Redis support for horizontal scaling and persistence
+    State is persisted through a StateStore (STATE_BACKEND), falling back to
+    the in-memory store if the configured one is unavailable
+    
+    With a shared store (Redis, SQLite), each session's orchestrator runs on
+    the worker holding its lease (renewed by a heartbeat). Another worker
+    either takes over an expired lease, rebuilding the orchestrator from the
+    persisted panelist configs and memory, or reports the owner so the request
+    can be forwarded there.
+    
+    Sessions idle for SESSION_IDLE_TIMEOUT, and the least recently used ones
+    while the estimated footprint exceeds SESSION_MEMORY_BUDGET_MB, are
+    hibernated: flushed to the store and dropped from this process. The next
+    request for one rehydrates it the same way a takeover does.
     """
     
+    # No constructor arguments: the API resolves SessionManager with Depends()
+    # (overridden in main.py), which would turn them into request parameters
     def __init__(self):
-        # Fallback to in-memory if Redis is not available
-        self.use_redis = False
+        self.store: StateStore = create_state_store()
+        # Sessions served by this worker
         self.sessions: Dict[str, Session] = {}
         self.memory_managers: Dict[str, GroupMemory] = {}
         self.orchestrators: Dict[str, StreamingOrchestrator] = {}
+        # Deserialized sessions read from the store (stores with invalidation only)
+        self.session_cache = SessionCache()
+        
+        # Ownership leases held by this worker (shared stores only)
+        self.lease_ttl = timedelta(seconds=float(os.getenv("SESSION_LEASE_TTL", "30")))
+        self.worker_url = os.getenv("WORKER_URL")
+        self.owned_sessions: set = set()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        
+        # Non-streaming turns: default and largest allowed deadline (seconds)
+        self.turn_deadline = float(os.getenv("PANEL_TURN_DEADLINE", "60"))
+        self.max_turn_deadline = float(os.getenv("PANEL_MAX_TURN_DEADLINE", "300"))
+        
+        # Hibernation of idle sessions (0 disables the timeout / budget)
+        self.idle_timeout = float(os.getenv("SESSION_IDLE_TIMEOUT", "1800"))
+        self.memory_budget = int(float(os.getenv("SESSION_MEMORY_BUDGET_MB", "512")) * 1024 * 1024)
+        self.eviction_interval = float(os.getenv("SESSION_EVICTION_INTERVAL", "60"))
+        # Resident session id -> last use (monotonic), least recently used first
+        self._last_used: "OrderedDict[str, float]" = OrderedDict()
+        # Sessions with a response stream in progress (never hibernated)
+        self._streaming: Dict[str, int] = {}
+        self._eviction_task: Optional[asyncio.Task] = None
+        self.hibernated = 0
+        self.rehydrated = 0
         
     async def initialize(self):
-        """Initialize session manager and connect to Redis if available"""
-        self.use_redis = await redis_client.connect()
-        if self.use_redis:
-            logger.info("SessionManager initialized with Redis support")
+        """Initialize session manager and connect its state store"""
+        if not await self.store.connect():
+            logger.warning(f"{self.store.name} state store not available, falling back to in-memory storage")
+            self.store = InMemoryStateStore()
+            await self.store.connect()
+        
+        if self.store.supports_invalidation:
+            await self.session_cache.start(self.store)
+        if self.store.shared:
+            if self.worker_url:
+                await self.store.register_worker(self.worker_url, self.lease_ttl)
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        if self.idle_timeout or self.memory_budget:
+            self._eviction_task = asyncio.create_task(self._evict_periodically())
+        logger.info(f"SessionManager initialized with {self.store.name} state store (worker {self.store.worker_id})")
+    
+    async def shutdown(self):
+        """Hand back leases so other workers can take over immediately"""
+        for task in (self._heartbeat_task, self._eviction_task):
+            if task:
+                task.cancel()
+        self._heartbeat_task = self._eviction_task = None
+        if self.store.shared:
+            await self.store.release_leases(list(self.owned_sessions))
+            self.owned_sessions.clear()
+        await self.session_cache.stop()
+        await self.store.disconnect()
+    
+    async def _heartbeat(self):
+        """Renew owned leases every third of their TTL; drop orchestrators whose lease was lost"""
+        interval = self.lease_ttl.total_seconds() / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if self.worker_url:
+                    await self.store.register_worker(self.worker_url, self.lease_ttl)
+                owned = list(self.owned_sessions)
+                held = set(await self.store.renew_leases(owned, self.lease_ttl))
+                for session_id in owned:
+                    if session_id not in held and await self.store.get_lease_owner(session_id) != self.store.worker_id:
+                        logger.warning(f"Lost lease on session {session_id}; releasing its orchestrator")
+                        self._release_local(session_id)
+            except Exception as e:
+                logger.error(f"Lease heartbeat failed: {e}")
+    
+    def _release_local(self, session_id: str):
+        """Stop serving a session another worker owns; its state here is stale"""
+        self.owned_sessions.discard(session_id)
+        self._forget(session_id)
+    
+    def _touch(self, session_id: str):
+        self._last_used[session_id] = time.monotonic()
+        self._last_used.move_to_end(session_id)
+    
+    def _forget(self, session_id: str):
+        """Drop every in-process reference to a session"""
+        self.sessions.pop(session_id, None)
+        self.memory_managers.pop(session_id, None)
+        self.orchestrators.pop(session_id, None)
+        self._last_used.pop(session_id, None)
+        self.session_cache.discard(session_id)
+    
+    async def _evict_periodically(self):
+        while True:
+            await asyncio.sleep(self.eviction_interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.error(f"Session eviction failed: {e}")
+    
+    async def evict_idle(self) -> List[str]:
+        """Hibernate idle sessions, then least recently used ones until within the memory budget"""
+        evicted = []
+        now = time.monotonic()
+        if self.idle_timeout:
+            for session_id, last_used in list(self._last_used.items()):
+                if now - last_used < self.idle_timeout:
+                    break
+                if await self.hibernate(session_id):
+                    evicted.append(session_id)
+        
+        if self.memory_budget:
+            usage = {
+                session_id: self.memory_managers[session_id].estimated_bytes()
+                for session_id in self._last_used if session_id in self.memory_managers
+            }
+            total = sum(usage.values())
+            for session_id in list(self._last_used):
+                if total <= self.memory_budget:
+                    break
+                if await self.hibernate(session_id):
+                    total -= usage.get(session_id, 0)
+                    evicted.append(session_id)
+        
+        if evicted:
+            logger.info(f"Hibernated {len(evicted)} sessions ({len(self._last_used)} resident)")
+        return evicted
+    
+    async def hibernate(self, session_id: str) -> bool:
+        """
+        Persist a session's unsaved state and drop it from process memory
+        Returns False (and keeps the session resident) if it is streaming, was
+        used while being flushed, or could not be persisted. With a shared
+        store, copies of sessions this worker does not own are dropped unflushed
+        """
+        if self._streaming.get(session_id):
+            return False
+        if self.store.shared and session_id not in self.owned_sessions:
+            # A read-only copy: the owning worker persists this session, not us
+            self._forget(session_id)
+            return True
+        last_used = self._last_used.get(session_id)
+        
+        if not await self._persist_delta(session_id):
+            logger.warning(f"Could not hibernate session {session_id}: memory not persisted")
+            return False
+        session = self.sessions.get(session_id)
+        # History lives in the memory lists, not the session record
+        if session and not await self.store.save_session(session.model_copy(update={
+            "messages": [], "synapse_connections": [], "collaboration_events": []
+        })):
+            logger.warning(f"Could not hibernate session {session_id}: session not persisted")
+            return False
+        
+        if self._streaming.get(session_id) or self._last_used.get(session_id) != last_used:
+            # Picked up again while flushing; what was flushed is still valid
+            return False
+        
+        self._forget(session_id)
+        if self.store.shared and session_id in self.owned_sessions:
+            await self.store.release_leases([session_id])
+            self.owned_sessions.discard(session_id)
+        self.hibernated += 1
+        return True
+    
+    async def _persist_delta(self, session_id: str) -> bool:
+        """
+        Append what the session's memory gained since the last write
+        On failure the delta is put back, so the next write retries it
+        rather than leaving a gap in the stored history
+        """
+        memory = self.memory_managers.get(session_id)
+        if not memory:
+            return True
+        delta = memory.take_delta()
+        if await self.store.append_memory_delta(session_id, delta):
+            return True
+        memory.restore_delta(delta)
+        return False
+    
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """Resident sessions, their estimated footprint and hibernation counts"""
+        return {
+            "resident_sessions": len(self._last_used),
+            "estimated_bytes": sum(memory.estimated_bytes() for memory in self.memory_managers.values()),
+            "memory_budget_bytes": self.memory_budget,
+            "idle_timeout_seconds": self.idle_timeout,
+            "hibernated": self.hibernated,
+            "rehydrated": self.rehydrated
+        }
+    
+    async def claim_session(self, session_id: str):
+        """
+        Make sure this worker can serve the session's orchestrator
+        Raises SessionOwnedElsewhere if another worker holds the lease and
+        ValueError if the session does not exist
+        """
+        if not self.store.shared:
+            if session_id in self.orchestrators:
+                self._touch(session_id)
+                return
         else:
-            logger.warning("Redis not available, falling back to in-memory storage")
+            if session_id in self.owned_sessions and session_id in self.orchestrators:
+                self._touch(session_id)
+                return
+            
+            owner = await self.store.acquire_lease(session_id, self.lease_ttl)
+            if owner != self.store.worker_id:
+                self._release_local(session_id)
+                owner_url = await self.store.get_worker_url(owner) if owner else None
+                raise SessionOwnedElsewhere(session_id, owner, owner_url)
+            self.owned_sessions.add(session_id)
+        
+        if session_id not in self.orchestrators:
+            session = await self.get_session(session_id)
+            if not session:
+                if self.store.shared:
+                    await self.store.release_leases([session_id])
+                    self.owned_sessions.discard(session_id)
+                self._forget(session_id)
+                raise ValueError(f"Session {session_id} not found")
+            
+            memory = self.memory_managers.setdefault(session_id, GroupMemory(session_id))
+            self.orchestrators[session_id] = self._build_orchestrator(
+                memory, session.panelist_configs, session.metadata.get("panelist_models", {}),
+                session.metadata.get("response_cache")
+            )
+            self.sessions[session_id] = session
+            self.rehydrated += 1
+            logger.info(f"Rebuilt orchestrator for session {session_id} on worker {self.store.worker_id}")
+        # Only now: sessions this worker cannot serve must not look resident
+        self._touch(session_id)
         
     async def create_session(self, request: CreateSessionRequest) -> Session:
         """Create a new collaborative session with support for custom personas"""
@@ -112,20 +373,64 @@ class SessionManager:
         memory = GroupMemory(session_id)
         self.memory_managers[session_id] = memory
         
-        # Initialize orchestrator
-        orchestrator = StreamingOrchestrator(memory)
-        
-        # Add providers to orchestrator
+        # Provider selection per panelist, persisted so any worker can rebuild the orchestrator
+        panelist_models = {}
         for config in panelist_configs:
             # Use the stored model_id if available, otherwise use the reverse lookup
             if hasattr(config, '_model_id'):
                 model_identifier = config._model_id
             else:
                 model_identifier = self._get_model_identifier(config.personality.model_name)
+            panelist_models[config.id] = {
+                "model_id": model_identifier,
+                "custom": getattr(config, '_model_id', None) == "custom"
+            }
+        session.metadata["panelist_models"] = panelist_models
+        if request.response_cache:
+            session.metadata["response_cache"] = {"enabled": True, "replay": request.cache_replay}
+        
+        # Initialize orchestrator
+        orchestrator = self._build_orchestrator(
+            memory, panelist_configs, panelist_models, session.metadata.get("response_cache")
+        )
+        
+        self.orchestrators[session_id] = orchestrator
+        self.sessions[session_id] = session
+        self._touch(session_id)
+        
+        # Session and memory header in one transaction (messages are appended as deltas after each turn)
+        await self.store.save_session_with_memory(session, memory.take_delta())
+        if self.store.shared and await self.store.acquire_lease(session_id, self.lease_ttl) == self.store.worker_id:
+            self.owned_sessions.add(session_id)
+        
+        logger.info(f"Created session {session_id} with {len(panelist_configs)} panelists")
+        
+        return session
+    
+    def _build_orchestrator(
+        self,
+        memory: GroupMemory,
+        panelist_configs: List[PanelistConfig],
+        panelist_models: Dict[str, Dict[str, Any]],
+        cache_settings: Optional[Dict[str, Any]] = None
+    ) -> StreamingOrchestrator:
+        """Create an orchestrator with one provider per panelist"""
+        if cache_settings and cache_settings.get("enabled"):
+            orchestrator = StreamingOrchestrator(
+                memory, response_cache=response_cache, cache_replay=cache_settings.get("replay", "instant")
+            )
+        else:
+            orchestrator = StreamingOrchestrator(memory)
+        cassette = recording_cassette(memory.session_id)
+        
+        # Add providers to orchestrator
+        for config in panelist_configs:
+            selection = panelist_models.get(config.id, {})
+            model_identifier = selection.get("model_id") or self._get_model_identifier(config.personality.model_name)
             
             # Check if this is a custom persona
             custom_persona_dict = None
-            if hasattr(config, '_model_id') and config._model_id == "custom":
+            if selection.get("custom"):
                 # Convert personality back to dict for custom personas
                 custom_persona_dict = config.personality.dict()
             
@@ -135,24 +440,15 @@ class SessionManager:
             )
             
             if provider:
+                if cassette:
+                    provider = RecordingProvider(provider, cassette, panelist=config.id)
                 orchestrator.add_provider(config.id, provider)
                 logger.info(f"Added provider for: {model_identifier}")
             else:
                 logger.warning(f"Could not create provider for: {model_identifier}")
         
-        self.orchestrators[session_id] = orchestrator
-        self.sessions[session_id] = session
-        
-        # Save to Redis if available
-        if self.use_redis:
-            await redis_client.save_session(session)
-            # Save memory state
-            memory_state = memory.to_dict()
-            await redis_client.save_memory_state(session_id, memory_state)
-        
-        logger.info(f"Created session {session_id} with {len(panelist_configs)} panelists")
-        
-        return session    
+        return orchestrator
+    
     def _get_model_identifier(self, model_name: str) -> str:
         """Get model identifier from model name"""
         # Reverse lookup from model name to identifier
@@ -173,50 +469,102 @@ class SessionManager:
         user_input: str
     ) -> AsyncGenerator[StreamingResponse, None]:
         """Stream concurrent responses for a session"""
-        if session_id not in self.sessions:
-            raise ValueError(f"Session {session_id} not found")
+        await self.claim_session(session_id)
         
         orchestrator = self.orchestrators[session_id]
         
-        # Stream responses from all models
-        async for response in orchestrator.stream_concurrent_responses(user_input):
-            yield response
+        self._streaming[session_id] = self._streaming.get(session_id, 0) + 1
+        try:
+            # Stream responses from all models
+            async for response in orchestrator.stream_concurrent_responses(user_input):
+                yield response
+                
+            # Update session timestamp
+            self.sessions[session_id].updated_at = datetime.utcnow()
             
-        # Update session timestamp
-        self.sessions[session_id].updated_at = datetime.utcnow()    
+            # Persist only what this turn added (kept for the next write if this one fails)
+            if not await self._persist_delta(session_id):
+                logger.warning(f"Could not persist turn for session {session_id}; will retry with the next write")
+        finally:
+            self._streaming[session_id] -= 1
+            if not self._streaming[session_id]:
+                del self._streaming[session_id]
+            if session_id in self.sessions:
+                self._touch(session_id)
+    
+    async def complete_responses(
+        self,
+        session_id: str,
+        user_input: str,
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """All panelists' answers for one turn in one payload, cut off at the deadline"""
+        await self.claim_session(session_id)
+        
+        orchestrator = self.orchestrators[session_id]
+        deadline = min(deadline or self.turn_deadline, self.max_turn_deadline)
+        
+        self._streaming[session_id] = self._streaming.get(session_id, 0) + 1
+        try:
+            result = await orchestrator.complete_concurrent_responses(user_input, deadline)
+            
+            self.sessions[session_id].updated_at = datetime.utcnow()
+            if not await self._persist_delta(session_id):
+                logger.warning(f"Could not persist turn for session {session_id}; will retry with the next write")
+            
+            result["deadline_seconds"] = deadline
+            result["stats"] = self.get_session_stats(session_id)
+            return result
+        finally:
+            self._streaming[session_id] -= 1
+            if not self._streaming[session_id]:
+                del self._streaming[session_id]
+            if session_id in self.sessions:
+                self._touch(session_id)
+    
     async def get_session(self, session_id: str) -> Optional[Session]:
         """Get session by ID"""
-        # Try Redis first if available
-        if self.use_redis:
-            session = await redis_client.get_session(session_id)
-            if session:
-                # Restore memory state
-                memory_state = await redis_client.get_memory_state(session_id)
-                if memory_state and session_id not in self.memory_managers:
-                    memory = GroupMemory(session_id)
-                    memory.from_dict(memory_state)
-                    self.memory_managers[session_id] = memory
-                
-                # Update with latest memory data
+        # Nobody else writes an unshared store: what this worker holds is current
+        if not self.store.shared and session_id in self.sessions:
+            self._touch(session_id)
+            return self._with_memory(self.sessions[session_id], session_id)
+        
+        if self.store.supports_invalidation:
+            entry = self.session_cache.get(session_id)
+            if entry:
                 if session_id in self.memory_managers:
-                    memory = self.memory_managers[session_id]
-                    session.messages = memory.messages
-                    session.synapse_connections = memory.synapse_connections
-                    session.collaboration_events = memory.collaboration_events
-                
-                return session
-        
-        # Fallback to in-memory
-        if session_id in self.sessions:
-            session = self.sessions[session_id]
-            # Update with latest memory data
-            if session_id in self.memory_managers:
-                memory = self.memory_managers[session_id]
-                session.messages = memory.messages
-                session.synapse_connections = memory.synapse_connections
-                session.collaboration_events = memory.collaboration_events
-            return session
-        return None
+                    self._touch(session_id)
+                return self._with_memory(entry.session, session_id)
+        
+        started = time.perf_counter()
+        session, memory_state, version = await self.store.get_session_with_memory(session_id)
+        if not session:
+            return None
+        
+        # Restore memory state when the store is ahead of this worker (another
+        # worker wrote it); in-place so orchestrators keep their reference
+        memory = self.memory_managers.get(session_id)
+        if memory_state and (
+            memory is None or len(memory_state.get("messages", [])) > len(memory.messages)
+        ):
+            memory = memory or GroupMemory(session_id)
+            memory.from_dict(memory_state)
+            self.memory_managers[session_id] = memory
+        if session_id in self.memory_managers:
+            self._touch(session_id)
+        
+        if self.store.supports_invalidation:
+            self.session_cache.put(session_id, session, version, time.perf_counter() - started)
+        return self._with_memory(session, session_id)
+    
+    def _with_memory(self, session: Session, session_id: str) -> Session:
+        """Attach the latest memory data to a session"""
+        if session_id in self.memory_managers:
+            memory = self.memory_managers[session_id]
+            session.messages = memory.messages
+            session.synapse_connections = memory.synapse_connections
+            session.collaboration_events = memory.collaboration_events
+        return session
     
     def get_active_sessions(self) -> List[Session]:
         """Get all active sessions"""
@@ -228,22 +576,26 @@ class SessionManager:
             return {}
         
         memory = self.memory_managers[session_id]
-        return memory.get_collaboration_stats()
+        stats = memory.get_collaboration_stats()
+        orchestrator = self.orchestrators.get(session_id)
+        if orchestrator and orchestrator.response_cache:
+            stats["response_cache"] = summarize(orchestrator.response_cache_stats)
+        return stats
     
     async def end_session(self, session_id: str):
-        """End a session and clean up resources"""
-        if session_id in self.sessions:
-            self.sessions[session_id].is_active = False
-            
-            # Clean up orchestrator
-            if session_id in self.orchestrators:
-                del self.orchestrators[session_id]
-            
-            # Clean up from Redis if available
-            if self.use_redis:
-                await redis_client.delete_session(session_id)
-            
-            logger.info(f"Ended session: {session_id}")
+        """End a session (resident or hibernated) and release everything it holds"""
+        session = self.sessions.get(session_id)
+        if session:
+            session.is_active = False
+        
+        # Orchestrator, memory and cached copies
+        self._forget(session_id)
+        
+        # Clean up persisted state (including the lease)
+        await self.store.delete_session(session_id)
+        self.owned_sessions.discard(session_id)
+        
+        logger.info(f"Ended session: {session_id}")
     
     def get_available_models(self) -> Dict[str, Any]:
         """Get all available models that can be used"""
@@ -0,0 +1,422 @@
+"""
+SQLite State Store
+StateStore in a local SQLite file, for single-host deployments without Redis
+Updated: 2026-10-19 - Initial SQLite backend
+Updated: 2026-10-19 - Reads serialized with write transactions on the shared connection
+
+Several worker processes on one host can share the file: WAL mode lets
+readers run alongside the single writer, and leases/worker addresses work as
+with Redis (expiry is checked against wall-clock time on read). There is no
+change notification, so sessions are not cached across workers.
+"""
+
+import os
+import json
+import time
+import pickle
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import aiosqlite
+from loguru import logger
+from models.schemas import Session
+from core.session_codec import session_codec
+from core.state_store import StateStore, MEMORY_FIELDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    version TEXT,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memory_headers (
+    session_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memory_items (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_memory_items_session ON memory_items (session_id, kind, seq);
+CREATE TABLE IF NOT EXISTS orchestrators (
+    session_id TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    session_id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteStateStore(StateStore):
+    """StateStore backed by a SQLite database file"""
+
+    name = "sqlite"
+    shared = True
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__()
+        self.path = path or os.getenv("STATE_SQLITE_PATH", "groupchat_state.db")
+        self._db: Optional[aiosqlite.Connection] = None
+        # One transaction at a time on this connection
+        self._transaction_lock = asyncio.Lock()
+
+    async def connect(self) -> bool:
+        try:
+            self._db = await aiosqlite.connect(self.path, isolation_level=None)
+            await self._db.execute("PRAGMA journal_mode=WAL")
+            await self._db.execute("PRAGMA synchronous=NORMAL")
+            await self._db.execute("PRAGMA busy_timeout=5000")
+            await self._db.executescript(SCHEMA)
+            self._connected = True
+            logger.info(f"Connected to SQLite state store at {self.path}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to open SQLite state store {self.path}: {e}")
+            self._connected = False
+            return False
+
+    async def disconnect(self):
+        if self._db:
+            await self._db.close()
+            self._db = None
+            self._connected = False
+
+    async def _write(self, session_ids: List[str], statements: List[Tuple[str, tuple]]) -> bool:
+        """Run statements in one IMMEDIATE transaction, stamping a new version on each session"""
+        if not self._connected:
+            return False
+
+        versions = {session_id: self._next_version() for session_id in session_ids}
+        statements = statements + [
+            ("UPDATE sessions SET version = ? WHERE id = ?", (version, session_id))
+            for session_id, version in versions.items()
+        ]
+        async with self._transaction_lock:
+            try:
+                await self._db.execute("BEGIN IMMEDIATE")
+                for sql, params in statements:
+                    await self._db.execute(sql, params)
+                await self._db.execute("COMMIT")
+            except Exception as e:
+                if self._db.in_transaction:
+                    await self._db.execute("ROLLBACK")
+                logger.error(f"SQLite state write failed for {session_ids}: {e}")
+                return False
+        for session_id, version in versions.items():
+            self._written(session_id, version)
+        return True
+
+    async def _fetchall(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Run a query on the connection as is (callers hold _transaction_lock)"""
+        async with self._db.execute(sql, params) as cursor:
+            return await cursor.fetchall()
+
+    async def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """
+        Run a single read
+        The connection is shared: without the lock a read could see another
+        coroutine's uncommitted (and possibly rolled back) write transaction
+        """
+        async with self._transaction_lock:
+            return await self._fetchall(sql, params)
+
+    @asynccontextmanager
+    async def _read_transaction(self):
+        """Several reads from one consistent snapshot"""
+        async with self._transaction_lock:
+            await self._db.execute("BEGIN")
+            try:
+                yield
+            finally:
+                await self._db.execute("COMMIT")
+
+    # Sessions
+    def _session_statement(self, session: Session) -> Tuple[str, tuple]:
+        return (
+            "INSERT INTO sessions (id, data, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at",
+            (session.id, session_codec.encode(session), time.time() + self.SESSION_TTL.total_seconds())
+        )
+
+    async def save_session(self, session: Session) -> bool:
+        return await self._write([session.id], [self._session_statement(session)])
+
+    async def save_session_with_memory(self, session: Session, delta: Dict[str, Any]) -> bool:
+        return await self._write(
+            [session.id],
+            [self._session_statement(session)] + self._delta_statements(session.id, delta)
+        )
+
+    async def get_session(self, session_id: str) -> Optional[Session]:
+        sessions = await self.get_sessions([session_id])
+        return sessions.get(session_id)
+
+    async def get_sessions(self, session_ids: List[str]) -> Dict[str, Session]:
+        if not self._connected or not session_ids:
+            return {}
+
+        try:
+            placeholders = ",".join("?" * len(session_ids))
+            rows = await self._query(
+                f"SELECT id, data FROM sessions WHERE id IN ({placeholders}) AND expires_at > ?",
+                (*session_ids, time.time())
+            )
+            return {sid: session_codec.decode(data) for sid, data in rows}
+        except Exception as e:
+            logger.error(f"Error getting {len(session_ids)} sessions: {e}")
+            return {}
+
+    async def get_session_with_memory(
+        self, session_id: str
+    ) -> Tuple[Optional[Session], Optional[Dict[str, Any]], Optional[str]]:
+        if not self._connected:
+            return None, None, None
+
+        try:
+            # One read transaction so the session, memory and version agree
+            async with self._read_transaction():
+                rows = await self._fetchall(
+                    "SELECT data, version FROM sessions WHERE id = ? AND expires_at > ?",
+                    (session_id, time.time())
+                )
+                memory = await self._read_memory(session_id)
+            if not rows:
+                return None, memory, None
+            return session_codec.decode(rows[0][0]), memory, rows[0][1]
+        except Exception as e:
+            logger.error(f"Error getting session {session_id}: {e}")
+            return None, None, None
+
+    async def delete_sessions(self, session_ids: List[str]) -> bool:
+        if not session_ids:
+            return False
+
+        placeholders = ",".join("?" * len(session_ids))
+        statements = [
+            (f"DELETE FROM {table} WHERE {column} IN ({placeholders})", tuple(session_ids))
+            for table, column in (
+                ("sessions", "id"), ("memory_headers", "session_id"), ("memory_items", "session_id"),
+                ("orchestrators", "session_id"), ("leases", "session_id")
+            )
+        ]
+        return await self._write(session_ids, statements)
+
+    async def get_active_sessions(self) -> List[str]:
+        if not self._connected:
+            return []
+
+        try:
+            rows = await self._query("SELECT id FROM sessions WHERE expires_at > ?", (time.time(),))
+            return [row[0] for row in rows]
+        except Exception as e:
+            logger.error(f"Error getting active sessions: {e}")
+            return []
+
+    # Memory
+    def _delta_statements(self, session_id: str, delta: Dict[str, Any]) -> List[Tuple[str, tuple]]:
+        statements = [
+            ("INSERT INTO memory_items (session_id, kind, data) VALUES (?, ?, ?)",
+             (session_id, kind, item.model_dump_json()))
+            for kind in MEMORY_FIELDS for item in delta.get(kind) or []
+        ]
+        statements.append(self._header_statement(session_id, delta["header"]))
+        # A session in use must not expire under its memory (the record is only rewritten on create/hibernate)
+        statements.append((
+            "UPDATE sessions SET expires_at = ? WHERE id = ?",
+            (time.time() + self.SESSION_TTL.total_seconds(), session_id)
+        ))
+        return statements
+
+    def _header_statement(self, session_id: str, header: Dict[str, Any]) -> Tuple[str, tuple]:
+        return (
+            "INSERT INTO memory_headers (session_id, data) VALUES (?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data",
+            (session_id, json.dumps(header, default=str))
+        )
+
+    async def append_memory_delta(self, session_id: str, delta: Dict[str, Any]) -> bool:
+        return await self._write([session_id], self._delta_statements(session_id, delta))
+
+    async def save_memory_state(self, session_id: str, memory_data: Dict[str, Any]) -> bool:
+        statements = [("DELETE FROM memory_items WHERE session_id = ?", (session_id,))]
+        for kind, field in MEMORY_FIELDS.items():
+            statements.extend(
+                ("INSERT INTO memory_items (session_id, kind, data) VALUES (?, ?, ?)",
+                 (session_id, kind, json.dumps(item, default=str)))
+                for item in memory_data.get(field) or []
+            )
+        statements.append(self._header_statement(session_id, {
+            "session_id": memory_data.get("session_id", session_id),
+            "context_summary": memory_data.get("context_summary", "")
+        }))
+        return await self._write([session_id], statements)
+
+    async def get_memory_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        if not self._connected:
+            return None
+
+        try:
+            # Header and lists from the same snapshot
+            async with self._read_transaction():
+                return await self._read_memory(session_id)
+        except Exception as e:
+            logger.error(f"Error getting memory state for {session_id}: {e}")
+            return None
+
+    async def _read_memory(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Memory state in GroupMemory.to_dict() format (callers hold a read transaction)"""
+        headers = await self._fetchall("SELECT data FROM memory_headers WHERE session_id = ?", (session_id,))
+        if not headers:
+            return None
+
+        header = json.loads(headers[0][0])
+        state: Dict[str, Any] = {
+            "session_id": header.get("session_id", session_id),
+            "context_summary": header.get("context_summary", "")
+        }
+        for field in MEMORY_FIELDS.values():
+            state[field] = []
+        rows = await self._fetchall(
+            "SELECT kind, data FROM memory_items WHERE session_id = ? ORDER BY seq", (session_id,)
+        )
+        for kind, data in rows:
+            state[MEMORY_FIELDS[kind]].append(json.loads(data))
+        return state
+
+    # Orchestrator state
+    async def save_orchestrator_state(self, session_id: str, orchestrator_data: Dict[str, Any]) -> bool:
+        if not self._connected:
+            return False
+
+        try:
+            async with self._transaction_lock:
+                await self._db.execute(
+                    "INSERT INTO orchestrators (session_id, data) VALUES (?, ?) "
+                    "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data",
+                    (session_id, pickle.dumps(orchestrator_data))
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Error saving orchestrator state for {session_id}: {e}")
+            return False
+
+    async def get_orchestrator_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        if not self._connected:
+            return None
+
+        try:
+            rows = await self._query("SELECT data FROM orchestrators WHERE session_id = ?", (session_id,))
+            return pickle.loads(rows[0][0]) if rows else None
+        except Exception as e:
+            logger.error(f"Error getting orchestrator state for {session_id}: {e}")
+            return None
+
+    # Ownership leases
+    async def acquire_lease(self, session_id: str, ttl: timedelta) -> Optional[str]:
+        if not self._connected:
+            return None
+
+        try:
+            now = time.time()
+            async with self._transaction_lock:
+                # Take a free or expired lease, or refresh our own; otherwise leave it be
+                await self._db.execute(
+                    "INSERT INTO leases (session_id, owner, expires_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(session_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                    "WHERE leases.expires_at <= ? OR leases.owner = excluded.owner",
+                    (session_id, self.worker_id, now + ttl.total_seconds(), now)
+                )
+            return await self.get_lease_owner(session_id)
+        except Exception as e:
+            logger.error(f"Error acquiring lease for {session_id}: {e}")
+            return None
+
+    async def renew_leases(self, session_ids: List[str], ttl: timedelta) -> List[str]:
+        return await self._update_leases(
+            session_ids, "UPDATE leases SET expires_at = ? WHERE session_id = ?",
+            lambda session_id: (time.time() + ttl.total_seconds(), session_id)
+        )
+
+    async def release_leases(self, session_ids: List[str]) -> List[str]:
+        return await self._update_leases(
+            session_ids, "DELETE FROM leases WHERE session_id = ?", lambda session_id: (session_id,)
+        )
+
+    async def _update_leases(self, session_ids: List[str], sql: str, params) -> List[str]:
+        """Apply `sql` to the unexpired leases owned by this worker in one transaction"""
+        if not self._connected or not session_ids:
+            return []
+
+        placeholders = ",".join("?" * len(session_ids))
+        async with self._transaction_lock:
+            try:
+                await self._db.execute("BEGIN IMMEDIATE")
+                rows = await self._fetchall(
+                    f"SELECT session_id FROM leases WHERE session_id IN ({placeholders}) "
+                    "AND owner = ? AND expires_at > ?",
+                    (*session_ids, self.worker_id, time.time())
+                )
+                held = [row[0] for row in rows]
+                for session_id in held:
+                    await self._db.execute(sql, params(session_id))
+                await self._db.execute("COMMIT")
+                return held
+            except Exception as e:
+                if self._db.in_transaction:
+                    await self._db.execute("ROLLBACK")
+                logger.error(f"Error updating {len(session_ids)} leases: {e}")
+                return []
+
+    async def get_lease_owner(self, session_id: str) -> Optional[str]:
+        if not self._connected:
+            return None
+
+        try:
+            rows = await self._query(
+                "SELECT owner FROM leases WHERE session_id = ? AND expires_at > ?", (session_id, time.time())
+            )
+            return rows[0][0] if rows else None
+        except Exception as e:
+            logger.error(f"Error getting lease owner for {session_id}: {e}")
+            return None
+
+    async def register_worker(self, url: str, ttl: timedelta) -> bool:
+        if not self._connected:
+            return False
+
+        try:
+            async with self._transaction_lock:
+                await self._db.execute(
+                    "INSERT INTO workers (id, url, expires_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET url = excluded.url, expires_at = excluded.expires_at",
+                    (self.worker_id, url, time.time() + ttl.total_seconds())
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Error registering worker {self.worker_id}: {e}")
+            return False
+
+    async def get_worker_url(self, worker_id: str) -> Optional[str]:
+        if not self._connected:
+            return None
+
+        try:
+            rows = await self._query(
+                "SELECT url FROM workers WHERE id = ? AND expires_at > ?", (worker_id, time.time())
+            )
+            return rows[0][0] if rows else None
+        except Exception as e:
+            logger.error(f"Error getting address of worker {worker_id}: {e}")
+            return None
@@ -0,0 +1,185 @@
+"""
+State Store
+Common interface for session, memory and ownership state
+Updated: 2026-10-19 - Initial interface with in-memory, Redis and SQLite backends
+Updated: 2026-10-19 - Local write-ahead log backend
+
+Memory state follows GroupMemory: an append-only list per kind (messages,
+synapses, events) plus a header (session_id, context_summary, counts).
+Writes are made as GroupMemory.take_delta() deltas; reads return the
+GroupMemory.to_dict() shape, whose list entries may be dicts or models.
+"""
+
+import os
+import socket
+import asyncio
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple
+from models.schemas import Session
+
+# Delta kind -> GroupMemory.to_dict field
+MEMORY_FIELDS = {
+    "messages": "messages",
+    "synapses": "synapse_connections",
+    "events": "collaboration_events"
+}
+
+
+class StateStore(ABC):
+    """Storage backend for sessions, memory, orchestrator state and ownership leases"""
+
+    name = "base"
+    # Several workers can use the store at once (ownership leases are needed)
+    shared = False
+    # invalidations() reports other workers' writes (local caching is safe)
+    supports_invalidation = False
+
+    SESSION_TTL = timedelta(hours=24)
+
+    def __init__(self):
+        self._connected = False
+        # Version stamps are "{worker_id}:{sequence}", unique across workers
+        self.worker_id = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+        self._version_sequence = 0
+        # Called with (session_id, version) after each successful local write
+        self.write_listeners: List[Callable[[str, str], None]] = []
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def _next_version(self) -> str:
+        self._version_sequence += 1
+        return f"{self.worker_id}:{self._version_sequence}"
+
+    def _written(self, session_id: str, version: str):
+        for listener in self.write_listeners:
+            listener(session_id, version)
+
+    # Lifecycle
+    @abstractmethod
+    async def connect(self) -> bool:
+        """Open the store; False if it is unavailable"""
+        pass
+
+    @abstractmethod
+    async def disconnect(self):
+        pass
+
+    # Sessions
+    @abstractmethod
+    async def save_session(self, session: Session) -> bool:
+        pass
+
+    @abstractmethod
+    async def save_session_with_memory(self, session: Session, delta: Dict[str, Any]) -> bool:
+        """Save a session and a memory delta atomically"""
+        pass
+
+    @abstractmethod
+    async def get_session(self, session_id: str) -> Optional[Session]:
+        pass
+
+    @abstractmethod
+    async def get_sessions(self, session_ids: List[str]) -> Dict[str, Session]:
+        """Load many sessions at once (missing sessions are omitted)"""
+        pass
+
+    @abstractmethod
+    async def get_session_with_memory(
+        self, session_id: str
+    ) -> Tuple[Optional[Session], Optional[Dict[str, Any]], Optional[str]]:
+        """A session, its memory state and their version stamp"""
+        pass
+
+    async def update_session(self, session: Session) -> bool:
+        return await self.save_session(session)
+
+    async def delete_session(self, session_id: str) -> bool:
+        return await self.delete_sessions([session_id])
+
+    @abstractmethod
+    async def delete_sessions(self, session_ids: List[str]) -> bool:
+        """Delete sessions with their memory, orchestrator state and leases"""
+        pass
+
+    @abstractmethod
+    async def get_active_sessions(self) -> List[str]:
+        pass
+
+    # Memory
+    @abstractmethod
+    async def append_memory_delta(self, session_id: str, delta: Dict[str, Any]) -> bool:
+        """Append a GroupMemory.take_delta() delta and update the header"""
+        pass
+
+    @abstractmethod
+    async def save_memory_state(self, session_id: str, memory_data: Dict[str, Any]) -> bool:
+        """Replace the full memory state (GroupMemory.to_dict() format)"""
+        pass
+
+    @abstractmethod
+    async def get_memory_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    # Orchestrator state
+    @abstractmethod
+    async def save_orchestrator_state(self, session_id: str, orchestrator_data: Dict[str, Any]) -> bool:
+        pass
+
+    @abstractmethod
+    async def get_orchestrator_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    # Ownership leases
+    @abstractmethod
+    async def acquire_lease(self, session_id: str, ttl: timedelta) -> Optional[str]:
+        """Take (or refresh our own) lease; returns the owner after the attempt"""
+        pass
+
+    @abstractmethod
+    async def renew_leases(self, session_ids: List[str], ttl: timedelta) -> List[str]:
+        """Extend the leases this worker still holds; returns those session ids"""
+        pass
+
+    @abstractmethod
+    async def release_leases(self, session_ids: List[str]) -> List[str]:
+        """Drop the leases this worker holds; returns those session ids"""
+        pass
+
+    @abstractmethod
+    async def get_lease_owner(self, session_id: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    async def register_worker(self, url: str, ttl: timedelta) -> bool:
+        """Advertise the address other workers should forward requests to"""
+        pass
+
+    @abstractmethod
+    async def get_worker_url(self, worker_id: str) -> Optional[str]:
+        pass
+
+    # Invalidation
+    async def invalidations(self) -> AsyncGenerator[Tuple[str, str], None]:
+        """Yield (session_id, version) for writes by any worker (never, unless supports_invalidation)"""
+        await asyncio.Event().wait()
+        yield  # unreachable; makes this an async generator
+
+
+def create_state_store(backend: Optional[str] = None) -> StateStore:
+    """Instantiate the configured backend: redis, sqlite, wal or memory (STATE_BACKEND)"""
+    backend = (backend or os.getenv("STATE_BACKEND", "redis")).lower()
+    if backend == "redis":
+        from core.redis_client import redis_client
+        return redis_client
+    if backend == "sqlite":
+        from core.sqlite_store import SQLiteStateStore
+        return SQLiteStateStore()
+    if backend == "wal":
+        from core.wal_store import WALStateStore
+        return WALStateStore()
+    if backend == "memory":
+        from core.memory_store import InMemoryStateStore
+        return InMemoryStateStore()
+    raise ValueError(f"Unknown state backend: {backend} (available: redis, sqlite, wal, memory)")
@@ -0,0 +1,476 @@
+"""
+WAL State Store
+In-memory state made durable by a local write-ahead log and snapshots
+Updated: 2026-10-19 - Initial WAL backend with group commit and mmap replay
+Updated: 2026-10-19 - Closing a log waits for the flush in flight instead of cancelling it
+Updated: 2026-10-19 - Frames queued before the in-memory apply; failed writes undone
+
+Every write is appended to the current log (wal.{generation}.log) as a
+frame: length and CRC32 header, then a marshal-encoded (op, session id,
+data) record whose models are session codec records. Appends are group
+committed: writes queued while an fsync is in flight share the next one,
+and each write returns once its frame is on disk.
+
+When the log grows past WAL_COMPACT_BYTES the current state is captured,
+writes move on to the next generation's log and the capture is written as
+snapshot.{generation}.bin (temp file, fsync, rename). Recovery replays the
+newest snapshot and then every log of that generation or later, memory
+mapped, stopping at the first torn or corrupt frame.
+
+Single process only: the directory is locked while open. Leases and worker
+addresses are not logged (nothing else can share the store).
+"""
+
+import os
+import json
+import mmap
+import glob
+import pickle
+import marshal
+import struct
+import zlib
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+from models.schemas import Session
+from core.session_codec import session_codec
+from core.memory_store import InMemoryStateStore
+from core.state_store import MEMORY_FIELDS
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locking
+    fcntl = None
+
+MARSHAL_VERSION = 4
+SNAPSHOT_MAGIC = b"GCSNAP1\n"
+_FRAME = struct.Struct(">II")  # payload length, crc32
+
+# Record ops
+OP_SESSION = 1
+OP_DELTA = 2
+OP_MEMORY = 3
+OP_DELETE = 4
+OP_ORCHESTRATOR = 5
+
+
+def encode_frame(op: int, session_id: str, data: Any) -> bytes:
+    payload = marshal.dumps((op, session_id, data), MARSHAL_VERSION)
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_frames(buffer, start: int = 0):
+    """Yield (op, session_id, data, end offset) up to the first incomplete or corrupt frame"""
+    offset, size = start, len(buffer)
+    while offset + _FRAME.size <= size:
+        length, checksum = _FRAME.unpack_from(buffer, offset)
+        end = offset + _FRAME.size + length
+        if end > size:
+            return
+        payload = buffer[offset + _FRAME.size:end]
+        if zlib.crc32(payload) != checksum:
+            return
+        op, session_id, data = marshal.loads(payload)
+        yield op, session_id, data, end
+        offset = end
+
+
+def _encode_item(item: Any) -> bytes:
+    """Memory entry as a codec record (models) or JSON (dicts from save_memory_state)"""
+    if isinstance(item, dict):
+        return json.dumps(item, default=str).encode()
+    return session_codec.encode(item)
+
+
+def _decode_item(data: bytes) -> Any:
+    if session_codec.is_encoded(data):
+        return session_codec.decode(data)
+    return json.loads(data)
+
+
+class WALWriter:
+    """Append-only log file with group commit"""
+
+    def __init__(self, path: str, fsync: bool = True, batch_delay: float = 0.0):
+        self.path = path
+        self.fsync = fsync
+        # Extra wait before each flush so more writes share one fsync
+        self.batch_delay = batch_delay
+        self._file = open(path, "ab")
+        self.size = self._file.tell()
+        self._pending: List[bytes] = []
+        self._waiters: List[asyncio.Future] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.frames_written = 0
+        self.flushes = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def append(self, frame: bytes) -> asyncio.Future:
+        """Queue a frame; the future resolves to True once it is durable"""
+        waiter = asyncio.get_running_loop().create_future()
+        self._pending.append(frame)
+        self._waiters.append(waiter)
+        self.size += len(frame)
+        self._wakeup.set()
+        return waiter
+
+    async def _run(self):
+        while not self._closing:
+            await self._wakeup.wait()
+            if self.batch_delay:
+                await asyncio.sleep(self.batch_delay)
+            await self._flush()
+
+    async def _flush(self):
+        self._wakeup.clear()
+        if not self._pending:
+            return
+        frames, waiters = self._pending, self._waiters
+        self._pending, self._waiters = [], []
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, b"".join(frames))
+            ok = True
+        except Exception as e:
+            logger.error(f"WAL write to {self.path} failed: {e}")
+            ok = False
+        self.frames_written += len(frames)
+        self.flushes += 1
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(ok)
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    async def close(self):
+        """Flush what is queued and close the file"""
+        # Let the loop finish a flush in flight rather than cancel it: its
+        # frames are already taken off the queue and their writers are waiting
+        self._closing = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+            self._task = None
+        await self._flush()
+        self._file.close()
+
+
+class WALStateStore(InMemoryStateStore):
+    """InMemoryStateStore whose writes are logged to disk and replayed on startup"""
+
+    name = "wal"
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        fsync: Optional[bool] = None,
+        compact_bytes: Optional[int] = None
+    ):
+        super().__init__()
+        self.directory = directory or os.getenv("STATE_WAL_DIR", "groupchat_wal")
+        self.fsync = fsync if fsync is not None else os.getenv("WAL_FSYNC", "true").lower() == "true"
+        self.batch_delay = float(os.getenv("WAL_BATCH_DELAY_MS", "0")) / 1000
+        self.compact_bytes = compact_bytes or int(float(os.getenv("WAL_COMPACT_MB", "64")) * 1024 * 1024)
+
+        self.generation = 0
+        self._writer: Optional[WALWriter] = None
+        self._lock_file = None
+        self._compaction: Optional[asyncio.Task] = None
+        self.recovery: Dict[str, Any] = {}
+
+    def _path(self, kind: str, generation: int) -> str:
+        suffix = "log" if kind == "wal" else "bin"
+        return os.path.join(self.directory, f"{kind}.{generation}.{suffix}")
+
+    def _generations(self, kind: str) -> List[int]:
+        paths = glob.glob(os.path.join(self.directory, f"{kind}.*.*"))
+        return sorted(int(os.path.basename(p).split(".")[1]) for p in paths if not p.endswith(".tmp"))
+
+    async def connect(self) -> bool:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._lock_file = open(os.path.join(self.directory, "LOCK"), "w")
+            if fcntl:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._recover()
+            self._writer = WALWriter(self._path("wal", self.generation), self.fsync, self.batch_delay)
+            self._writer.start()
+            self._connected = True
+            logger.info(
+                f"WAL state store at {self.directory}: recovered {self.recovery['sessions']} sessions "
+                f"in {self.recovery['seconds'] * 1000:.0f}ms"
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to open WAL state store {self.directory}: {e}")
+            if self._lock_file:
+                self._lock_file.close()
+                self._lock_file = None
+            return False
+
+    async def disconnect(self):
+        if self._compaction:
+            await self._compaction
+        if self._writer:
+            await self._writer.close()
+            self._writer = None
+        if self._lock_file:
+            self._lock_file.close()
+            self._lock_file = None
+        self._connected = False
+
+    # Recovery
+    def _recover(self):
+        started = asyncio.get_running_loop().time()
+        snapshots = self._generations("snapshot")
+        frames = 0
+        if snapshots:
+            self.generation = snapshots[-1]
+            frames += self._replay(self._path("snapshot", self.generation), len(SNAPSHOT_MAGIC))
+        logs = [g for g in self._generations("wal") if g >= self.generation]
+        for generation in logs:
+            frames += self._replay(self._path("wal", generation), 0, truncate=True)
+        if logs:
+            self.generation = logs[-1]
+        self.recovery = {
+            "sessions": len(self._sessions),
+            "frames": frames,
+            "seconds": asyncio.get_running_loop().time() - started
+        }
+
+    def _replay(self, path: str, start: int, truncate: bool = False) -> int:
+        size = os.path.getsize(path)
+        if size <= start:
+            return 0
+        frames, valid_end = 0, start
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for op, session_id, data, end in read_frames(memoryview(buffer), start):
+                self._apply(op, session_id, data)
+                frames += 1
+                valid_end = end
+        if valid_end < size:
+            logger.warning(f"{path}: discarding {size - valid_end} bytes after the last complete record")
+            if truncate:
+                os.truncate(path, valid_end)
+        return frames
+
+    def _apply(self, op: int, session_id: str, data: Any):
+        if op == OP_SESSION:
+            self._sessions[session_id] = session_codec.decode(data)
+        elif op == OP_DELTA:
+            header, lists = data
+            delta = {kind: [_decode_item(item) for item in items] for kind, items in zip(MEMORY_FIELDS, lists)}
+            delta["header"] = header
+            self._apply_delta(session_id, delta)
+        elif op == OP_MEMORY:
+            context_summary, lists = data
+            state = {
+                field: [_decode_item(item) for item in items]
+                for field, items in zip(MEMORY_FIELDS.values(), lists)
+            }
+            state["session_id"] = session_id
+            state["context_summary"] = context_summary
+            self._memory[session_id] = state
+        elif op == OP_DELETE:
+            for store in (self._sessions, self._memory, self._orchestrators, self._versions):
+                store.pop(session_id, None)
+        elif op == OP_ORCHESTRATOR:
+            self._orchestrators[session_id] = pickle.loads(data)
+
+    # Logging
+    def _enqueue(self, frames: List[bytes]) -> Optional[List[asyncio.Future]]:
+        """Queue frames on the current log; None if the store is closed"""
+        if not self._connected:
+            return None
+        waiters = [self._writer.append(frame) for frame in frames]
+        if self._writer.size >= self.compact_bytes and not self._compaction:
+            self._compaction = asyncio.create_task(self.compact())
+        return waiters
+
+    async def _acknowledge(self, waiters: List[asyncio.Future], undo: Callable[[], None]) -> bool:
+        """True once the frames are durable; otherwise their in-memory change is undone"""
+        if all(await asyncio.gather(*waiters)):
+            return True
+        undo()
+        return False
+
+    def _delta_frame(self, session_id: str, delta: Dict[str, Any]) -> bytes:
+        lists = [[_encode_item(item) for item in delta.get(kind) or []] for kind in MEMORY_FIELDS]
+        header = {key: value for key, value in delta["header"].items()}
+        return encode_frame(OP_DELTA, session_id, (header, lists))
+
+    def _memory_frame(self, session_id: str, state: Dict[str, Any]) -> bytes:
+        lists = [[_encode_item(item) for item in state.get(field) or []] for field in MEMORY_FIELDS.values()]
+        return encode_frame(OP_MEMORY, session_id, (state.get("context_summary", ""), lists))
+
+    # Undo of an applied write whose frames never reached the log. Only
+    # entries still holding what the failed write put there are restored,
+    # so writes applied after it are kept
+    @staticmethod
+    def _restore(table: Dict[str, Any], key: str, ours: Any, previous: Any):
+        if table.get(key) is ours:
+            if previous is None:
+                table.pop(key, None)
+            else:
+                table[key] = previous
+
+    def _delta_marks(self, session_id: str) -> Dict[str, int]:
+        state = self._memory.get(session_id) or {}
+        return {field: len(state.get(field) or []) for field in MEMORY_FIELDS.values()}
+
+    def _undo_delta(self, session_id: str, delta: Dict[str, Any], marks: Dict[str, int]):
+        state = self._memory.get(session_id)
+        if state is None:
+            return
+        for kind, field in MEMORY_FIELDS.items():
+            items = delta.get(kind) or []
+            start = marks[field]
+            applied = state[field][start:start + len(items)]
+            if len(applied) == len(items) and all(a is b for a, b in zip(applied, items)):
+                del state[field][start:start + len(items)]
+
+    # Writes: the frames are queued first, then applied in memory with
+    # nothing awaited in between (so the log, and any snapshot taken by
+    # compaction, sees writes in the order they were applied), then
+    # acknowledged once durable or undone if the log write failed
+    async def save_session(self, session: Session) -> bool:
+        waiters = self._enqueue([encode_frame(OP_SESSION, session.id, session_codec.encode(session))])
+        if waiters is None:
+            return False
+        previous = self._sessions.get(session.id)
+        self._put_session(session)
+        self._stamp(session.id)
+        ours = self._sessions[session.id]
+        return await self._acknowledge(waiters, lambda: self._restore(self._sessions, session.id, ours, previous))
+
+    async def save_session_with_memory(self, session: Session, delta: Dict[str, Any]) -> bool:
+        waiters = self._enqueue([
+            encode_frame(OP_SESSION, session.id, session_codec.encode(session)),
+            self._delta_frame(session.id, delta)
+        ])
+        if waiters is None:
+            return False
+        previous, marks = self._sessions.get(session.id), self._delta_marks(session.id)
+        self._put_session(session)
+        self._apply_delta(session.id, delta)
+        self._stamp(session.id)
+        ours = self._sessions[session.id]
+
+        def undo():
+            self._restore(self._sessions, session.id, ours, previous)
+            self._undo_delta(session.id, delta, marks)
+        return await self._acknowledge(waiters, undo)
+
+    async def delete_sessions(self, session_ids: List[str]) -> bool:
+        if not session_ids:
+            return False
+        waiters = self._enqueue([encode_frame(OP_DELETE, session_id, None) for session_id in session_ids])
+        if waiters is None:
+            return False
+        tables = (self._sessions, self._memory, self._orchestrators)
+        previous = {session_id: [table.get(session_id) for table in tables] for session_id in session_ids}
+        self._drop_sessions(session_ids)
+
+        def undo():
+            for session_id, values in previous.items():
+                for table, value in zip(tables, values):
+                    if value is not None:
+                        table.setdefault(session_id, value)
+        return await self._acknowledge(waiters, undo)
+
+    async def append_memory_delta(self, session_id: str, delta: Dict[str, Any]) -> bool:
+        waiters = self._enqueue([self._delta_frame(session_id, delta)])
+        if waiters is None:
+            return False
+        marks = self._delta_marks(session_id)
+        self._apply_delta(session_id, delta)
+        self._stamp(session_id)
+        # Callers restore the delta and retry it: it must not stay applied
+        return await self._acknowledge(waiters, lambda: self._undo_delta(session_id, delta, marks))
+
+    async def save_memory_state(self, session_id: str, memory_data: Dict[str, Any]) -> bool:
+        waiters = self._enqueue([self._memory_frame(session_id, memory_data)])
+        if waiters is None:
+            return False
+        previous = self._memory.get(session_id)
+        self._put_memory(session_id, memory_data)
+        self._stamp(session_id)
+        ours = self._memory[session_id]
+        return await self._acknowledge(waiters, lambda: self._restore(self._memory, session_id, ours, previous))
+
+    async def save_orchestrator_state(self, session_id: str, orchestrator_data: Dict[str, Any]) -> bool:
+        waiters = self._enqueue([encode_frame(OP_ORCHESTRATOR, session_id, pickle.dumps(orchestrator_data))])
+        if waiters is None:
+            return False
+        previous = self._orchestrators.get(session_id)
+        self._orchestrators[session_id] = orchestrator_data
+        return await self._acknowledge(
+            waiters, lambda: self._restore(self._orchestrators, session_id, orchestrator_data, previous)
+        )
+
+    # Compaction
+    def _snapshot_frames(self) -> List[bytes]:
+        frames = []
+        for session_id, session in self._sessions.items():
+            frames.append(encode_frame(OP_SESSION, session_id, session_codec.encode(session)))
+        for session_id, state in self._memory.items():
+            frames.append(self._memory_frame(session_id, state))
+        for session_id, data in self._orchestrators.items():
+            frames.append(encode_frame(OP_ORCHESTRATOR, session_id, pickle.dumps(data)))
+        return frames
+
+    async def compact(self):
+        """Snapshot the current state and start a new log generation"""
+        try:
+            # Capture and switch logs without yielding, so every write lands
+            # either in the snapshot's predecessor log or in the new one
+            frames = self._snapshot_frames()
+            previous = self._writer
+            self.generation += 1
+            self._writer = WALWriter(self._path("wal", self.generation), self.fsync, self.batch_delay)
+            self._writer.start()
+
+            await previous.close()
+            await asyncio.get_running_loop().run_in_executor(None, self._write_snapshot, self.generation, frames)
+            for kind in ("wal", "snapshot"):
+                for generation in self._generations(kind):
+                    if generation < self.generation:
+                        os.remove(self._path(kind, generation))
+            logger.info(f"Compacted WAL into snapshot generation {self.generation} ({len(frames)} records)")
+        except Exception as e:
+            logger.error(f"WAL compaction failed: {e}")
+        finally:
+            self._compaction = None
+
+    def _write_snapshot(self, generation: int, frames: List[bytes]):
+        path = self._path("snapshot", generation)
+        with open(path + ".tmp", "wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(b"".join(frames))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        if hasattr(os, "O_DIRECTORY"):
+            directory = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+    def stats(self) -> Dict[str, Any]:
+        writer = self._writer
+        return {
+            "generation": self.generation,
+            "log_bytes": writer.size if writer else 0,
+            "frames_written": writer.frames_written if writer else 0,
+            "flushes": writer.flushes if writer else 0,
+            "recovery": self.recovery
+        }
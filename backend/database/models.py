@@ -1,11 +1,11 @@
 """
 Database Models for User Personas
 Supports persistent storage of custom AI personas
+Updated: 2026-10-19 - Composite indexes for the persona list queries
 """
 
-from sqlalchemy import Column, String, JSON, DateTime, Boolean, ForeignKey, Text
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, JSON, DateTime, Boolean, ForeignKey, Text, Index
+from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime
 import uuid
 
@@ -15,6 +15,11 @@ Base = declarative_base()
 class UserPersona(Base):
     """Store user-created AI personas"""
     __tablename__ = 'user_personas'
+    __table_args__ = (
+        # Newest-first pages of a user's own personas, and of public ones
+        Index('ix_user_personas_owner_page', 'user_id', 'is_active', 'created_at', 'id'),
+        Index('ix_user_personas_public_page', 'is_public', 'is_active', 'created_at', 'id'),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False, index=True)  # User who created this
@@ -34,7 +39,7 @@ class UserPersona(Base):
     # Metadata
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    is_public = Column(Boolean, default=False)  # Can other users see/use this?
+    is_public = Column(Boolean, default=False, index=True)  # Can other users see/use this?
     is_active = Column(Boolean, default=True)
     
     def to_dict(self):
@@ -0,0 +1,151 @@
+"""
+Persona Store
+Async SQLAlchemy persistence for user-created personas (database/models.py)
+Updated: 2026-10-19 - Initial SQLite store with cursor pagination
+
+Lists are newest first and paged by an opaque cursor over (created_at, id).
+A user's own personas and other users' public personas are read with one
+index range scan each (see UserPersona.__table_args__) and merged, so the
+cost of a page does not grow with the number of stored personas.
+"""
+
+import os
+import base64
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from loguru import logger
+from database.models import Base, UserPersona
+
+# Fields a persona's owner may change
+UPDATABLE_FIELDS = (
+    "name", "role", "icon", "prompt_prefix", "collaboration_style",
+    "color_theme", "custom_settings", "is_public"
+)
+
+
+def encode_cursor(persona: UserPersona) -> str:
+    raw = f"{persona.created_at.isoformat()}|{persona.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """(created_at, id) of the last persona on the previous page"""
+    try:
+        created_at, persona_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), persona_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+class PersonaStore:
+    """CRUD and paged listing of user personas"""
+
+    def __init__(self, database_url: Optional[str] = None):
+        self.database_url = database_url or os.getenv(
+            "PERSONA_DATABASE_URL", "sqlite+aiosqlite:///./groupchat_personas.db"
+        )
+        self._engine: Optional[AsyncEngine] = None
+        self._sessions: Optional[async_sessionmaker] = None
+
+    async def initialize(self):
+        """Create the engine and any missing tables/indexes"""
+        if self._engine:
+            return
+        self._engine = create_async_engine(self.database_url)
+        self._sessions = async_sessionmaker(self._engine, expire_on_commit=False)
+        async with self._engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        logger.info(f"Persona store ready at {self.database_url}")
+
+    async def close(self):
+        if self._engine:
+            await self._engine.dispose()
+            self._engine = None
+            self._sessions = None
+
+    def _session(self) -> AsyncSession:
+        if not self._sessions:
+            raise RuntimeError("Persona store is not initialized")
+        return self._sessions()
+
+    async def create(self, user_id: str, fields: Dict[str, Any]) -> UserPersona:
+        persona = UserPersona(user_id=user_id, **fields)
+        async with self._session() as session:
+            session.add(persona)
+            await session.commit()
+        return persona
+
+    async def get(self, persona_id: str) -> Optional[UserPersona]:
+        async with self._session() as session:
+            return await session.get(UserPersona, persona_id)
+
+    async def update(self, persona_id: str, changes: Dict[str, Any]) -> Optional[UserPersona]:
+        """Apply `changes` (a subset of UPDATABLE_FIELDS); None if the persona doesn't exist"""
+        async with self._session() as session:
+            persona = await session.get(UserPersona, persona_id)
+            if not persona:
+                return None
+            for field, value in changes.items():
+                if field in UPDATABLE_FIELDS:
+                    setattr(persona, field, value)
+            persona.updated_at = datetime.utcnow()
+            await session.commit()
+            return persona
+
+    async def deactivate(self, persona_id: str) -> Optional[UserPersona]:
+        """Soft delete"""
+        async with self._session() as session:
+            persona = await session.get(UserPersona, persona_id)
+            if not persona:
+                return None
+            persona.is_active = False
+            persona.updated_at = datetime.utcnow()
+            await session.commit()
+            return persona
+
+    async def list_for_user(
+        self,
+        user_id: str,
+        include_public: bool = True,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[UserPersona], Optional[str]]:
+        """
+        One page of the user's active personas (plus other users' public ones),
+        newest first; returns the page and the cursor for the next one
+        """
+        after = decode_cursor(cursor) if cursor else None
+        queries = [self._page_query(UserPersona.user_id == user_id, after, limit)]
+        if include_public:
+            queries.append(self._page_query(
+                and_(UserPersona.is_public.is_(True), UserPersona.user_id != user_id), after, limit
+            ))
+
+        async with self._session() as session:
+            personas = []
+            for query in queries:
+                personas.extend((await session.execute(query)).scalars())
+
+        # Each query is already ordered; merge and keep one page
+        personas.sort(key=lambda p: (p.created_at, p.id), reverse=True)
+        page = personas[:limit]
+        next_cursor = encode_cursor(page[-1]) if len(personas) > limit else None
+        return page, next_cursor
+
+    @staticmethod
+    def _page_query(condition, after: Optional[Tuple[datetime, str]], limit: int):
+        query = select(UserPersona).where(condition, UserPersona.is_active.is_(True))
+        if after:
+            created_at, persona_id = after
+            query = query.where(or_(
+                UserPersona.created_at < created_at,
+                and_(UserPersona.created_at == created_at, UserPersona.id < persona_id)
+            ))
+        # One extra row tells whether there is a next page
+        return query.order_by(UserPersona.created_at.desc(), UserPersona.id.desc()).limit(limit + 1)
+
+
+# Singleton instance
+persona_store = PersonaStore()
@@ -28,6 +28,11 @@ from api.test_sse import router as test_sse_router
 
 # Import core services
 from core.session_manager import SessionManager
+from database.persona_store import persona_store
+from providers.client_pool import client_pool
+from providers.resilience import retry_stats
+from core.response_cache import response_cache
+from memory.semantic_synapse_detector import semantic_detector
 
 # Global session manager instance
 session_manager = None
@@ -50,6 +55,12 @@ async def lifespan(app: FastAPI):
     
     # Initialize Redis connection
     await session_manager.initialize()
+    await persona_store.initialize()
+    
+    # Load the semantic model in the background so startup isn't blocked;
+    # keyword detection is used until it is ready
+    if os.getenv("SEMANTIC_WARMUP", "true").lower() == "true":
+        semantic_detector.start_warmup()
     
     # Test API keys
     api_status = {
@@ -69,7 +80,9 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down GroupChatLLM v3 Backend...")
-    # Cleanup resources here if needed
+    await session_manager.shutdown()
+    await persona_store.close()
+    await client_pool.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -119,7 +132,17 @@ async def health_check():
                 "anthropic": bool(os.getenv("ANTHROPIC_API_KEY")),
                 "google": bool(os.getenv("GOOGLE_API_KEY"))
             },
-            "available_models": list(available_models.keys())
+            "available_models": list(available_models.keys()),
+            "semantic_detector": semantic_detector.status(),
+            "provider_connections": client_pool.stats(),
+            "provider_retries": dict(retry_stats),
+            "response_cache": response_cache.stats(),
+            "state_store": session_manager.store.name if session_manager else None,
+            "sessions": session_manager.get_memory_stats() if session_manager else None,
+            "session_cache": (
+                session_manager.session_cache.stats()
+                if session_manager and session_manager.store.supports_invalidation else None
+            )
         }
     }
 
@@ -0,0 +1,90 @@
+"""
+Embedding Backends
+Pluggable inference backends for the semantic synapse detector
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Type
+from loguru import logger
+import numpy as np
+
+
+class EmbeddingBackend(ABC):
+    """Loads a sentence embedding model and encodes text to normalized vectors"""
+
+    name = "base"
+
+    def __init__(self, model_name: str, max_seq_length: Optional[int] = None):
+        self.model_name = model_name
+        self.max_seq_length = max_seq_length
+
+    @abstractmethod
+    def load(self) -> None:
+        """Load the model (called once, off the request path)"""
+        pass
+
+    @abstractmethod
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """L2-normalized float32 embeddings, one row per text"""
+        pass
+
+    def describe(self) -> Dict[str, Optional[object]]:
+        return {
+            "backend": self.name,
+            "max_seq_length": self.max_seq_length
+        }
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """fp32 sentence-transformers / torch inference"""
+
+    name = "torch"
+
+    def __init__(self, model_name: str, max_seq_length: Optional[int] = None):
+        super().__init__(model_name, max_seq_length)
+        self.model = None
+
+    def load(self) -> None:
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(self.model_name, device="cpu")
+        if self.max_seq_length:
+            # Attention cost grows with sequence length; long messages are truncated
+            self.model.max_seq_length = min(self.max_seq_length, self.model.max_seq_length)
+        else:
+            self.max_seq_length = self.model.max_seq_length
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        embeddings = self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+        return embeddings.astype(np.float32, copy=False)
+
+
+class QuantizedSentenceTransformerBackend(SentenceTransformerBackend):
+    """int8 dynamically-quantized Linear layers (CPU only)"""
+
+    name = "torch-int8"
+
+    def load(self) -> None:
+        import torch
+
+        super().load()
+        # Weights are quantized once; activations are quantized per batch at runtime
+        self.model = torch.ao.quantization.quantize_dynamic(
+            self.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        logger.info(f"Quantized {self.model_name} to int8 (dynamic)")
+
+
+# Backend name -> implementation
+embedding_backends: Dict[str, Type[EmbeddingBackend]] = {
+    "torch": SentenceTransformerBackend,
+    "torch-int8": QuantizedSentenceTransformerBackend
+}
+
+
+def create_backend(name: str, model_name: str, max_seq_length: Optional[int] = None) -> EmbeddingBackend:
+    """Instantiate a registered embedding backend"""
+    backend_class = embedding_backends.get(name)
+    if not backend_class:
+        raise ValueError(f"Unknown embedding backend: {name} (available: {', '.join(embedding_backends)})")
+    return backend_class(model_name, max_seq_length=max_seq_length)
@@ -3,16 +3,26 @@ Group Memory System
 Manages shared context and instant propagation across all models
 Updated: 2025-07-06 23:35:00 - Added semantic synapse detection
 Updated: 2025-07-07 04:35:00 - Added dynamic context summarization
+Updated: 2026-10-19 - Single-pass synapse scoring across candidate messages
+Updated: 2026-10-19 - Long-range synapse detection via session vector index
+Updated: 2026-10-19 - Delta tracking for append-only persistence
+Updated: 2026-10-19 - Working to_dict/from_dict round trip and memory estimate
+Updated: 2026-10-19 - Token-aware window advances in steps (cache-stable prompt prefixes)
+Updated: 2026-10-19 - Actual provider usage and throughput aggregated in collaboration stats
+Updated: 2026-10-19 - Response reserve supplied by the caller's context budget
+Updated: 2026-10-19 - Vector index backlog embedded in batches off the event loop
 """
 
 from typing import List, Dict, Any, Optional
 from models.schemas import Message, SynapseConnection, CollaborationEvent, MessageType, SynapseType
-from memory.semantic_synapse_detector import semantic_detector
+from memory.semantic_synapse_detector import semantic_detector, SemanticScore
+from memory.vector_index import SessionVectorIndex
 from services.context_summarizer import ContextSummarizer
 from datetime import datetime
 import asyncio
 from loguru import logger
 import json
+import os
 
 
 class GroupMemory:
@@ -21,6 +31,23 @@ class GroupMemory:
     Enables instant context propagation and synapse detection
     """
     
+    # Nearest older messages considered for long-range synapses
+    LONG_RANGE_TOP_K = 3
+    
+    # Messages embedded per worker-thread call when catching the vector index
+    # up (e.g. the whole history after a rehydrate), so the event loop and
+    # on-loop scoring never wait on more than one batch
+    INDEX_BATCH_SIZE = 32
+    
+    # Rough per-object cost of the models beyond their text (for memory budgets)
+    MESSAGE_OVERHEAD_BYTES = 1200
+    RECORD_OVERHEAD_BYTES = 600
+    
+    # Once history overflows the token budget, its oldest messages are dropped
+    # this many at a time, so the prompt prefix (and provider prompt caches)
+    # stays the same for several turns instead of shifting every message
+    CONTEXT_WINDOW_STEP = int(os.getenv("CONTEXT_WINDOW_STEP", "8"))
+    
     def __init__(self, session_id: str, max_context_length: int = 10000):
         self.session_id = session_id
         self.messages: List[Message] = []
@@ -38,6 +65,19 @@ class GroupMemory:
         # Initialize summarizer
         self.summarizer = ContextSummarizer()
         
+        # Embeddings of the whole history for long-range synapse detection
+        self.vector_index = SessionVectorIndex(
+            quantize=os.getenv("SYNAPSE_INDEX_INT8", "false").lower() == "true"
+        )
+        # Concurrent responses catch the index up one at a time, keeping it in history order
+        self._index_lock = asyncio.Lock()
+        
+        # How many messages/synapses/events have already been persisted
+        self._persisted = {"messages": 0, "synapses": 0, "events": 0}
+        
+        # Estimated prompt tokens of the latest token-aware context, per model
+        self.context_token_estimates: Dict[str, int] = {}
+        
         logger.info(f"GroupMemory initialized for session: {session_id}")
     
     async def add_message(self, message: Message, model_source: str):
@@ -73,80 +113,96 @@ class GroupMemory:
             return
         
         # Look at recent messages for potential connections
-        recent_messages = self.messages[-5:-1]  # Last 4 messages before current        
-        for prev_message in recent_messages:
-            # Skip if same model or not a model message
-            if (prev_message.model_source == new_message.model_source or 
-                not prev_message.model_source):
-                continue
-            
-            # Detect building patterns (simplified for now)
-            synapse_type, strength = self._analyze_connection(prev_message, new_message)
+        recent_messages = self.messages[-5:-1]  # Last 4 messages before current
+        
+        # Skip if same model or not a model message
+        candidates = [
+            prev_message for prev_message in recent_messages
+            if prev_message.model_source and prev_message.model_source != new_message.model_source
+        ]
+        if not candidates:
+            return
+        
+        # Score the new message against all candidates at once
+        scores = semantic_detector.score_candidates(new_message, candidates)
+        
+        for prev_message in candidates:
+            score = scores.get(prev_message.id)
             
-            if synapse_type and strength > 0.3:  # Threshold for meaningful connection
-                connection = SynapseConnection(
-                    from_message_id=prev_message.id,
-                    to_message_id=new_message.id,
-                    synapse_type=synapse_type,
-                    strength=strength
-                )
-                
-                self.synapse_connections.append(connection)
-                new_message.synapse_connections.append(prev_message.id)
-                
-                # Log collaboration event
-                event = CollaborationEvent(
-                    session_id=self.session_id,
-                    event_type="synapse_detected",
-                    involved_models=[prev_message.model_source, new_message.model_source],
-                    description=f"{new_message.model_source} {synapse_type.value} {prev_message.model_source}'s idea"
-                )
-                self.collaboration_events.append(event)
-                
-                await self._trigger_updates("synapse_detected", connection)
-                
-                logger.info(f"Synapse detected: {synapse_type.value} between {prev_message.model_source} and {new_message.model_source}")    
-    def _analyze_connection(self, prev_message: Message, new_message: Message) -> tuple[Optional[SynapseType], float]:
-        """
-        Analyze the connection between two messages using semantic analysis
-        Returns synapse type and strength (0-1)
-        """
-        # Use semantic detector for advanced analysis
-        result = semantic_detector.detect_synapse(new_message, self.messages[-10:])
+            if score and score.confidence > 0.3:  # Threshold for meaningful connection
+                await self._record_synapse(prev_message, new_message, score)
         
-        if result:
-            synapse_type, confidence, _ = result
-            return synapse_type, confidence
+        # Older ideas anywhere in the session (semantic only)
+        if semantic_detector.is_ready:
+            await self._detect_long_range_synapses(new_message, {m.id for m in recent_messages})
+    
+    async def _detect_long_range_synapses(self, new_message: Message, recent_ids: set):
+        """Connect the new message to strongly similar messages outside the recent window"""
+        await self._sync_vector_index()
+        
+        query = semantic_detector.embed([new_message.content])[0]
+        hits = self.vector_index.search(
+            query,
+            k=self.LONG_RANGE_TOP_K,
+            exclude_ids=recent_ids | {new_message.id},
+            exclude_source=new_message.model_source
+        )
+        candidates = [
+            message for message, similarity in hits
+            if message.model_source and similarity >= semantic_detector.thresholds["medium_similarity"]
+        ]
+        if not candidates:
+            return
+        
+        scores = semantic_detector.score_candidates(new_message, candidates, keyword_fallback=False)
+        for prev_message in candidates:
+            score = scores.get(prev_message.id)
+            if score:
+                await self._record_synapse(prev_message, new_message, score)
+    
+    async def _sync_vector_index(self):
+        """Embed and index any messages not yet in the vector index, in batches off the event loop"""
+        async with self._index_lock:
+            # Messages are append-only and always indexed in order, so the
+            # unindexed ones form the tail of the history
+            pending = []
+            for message in reversed(self.messages):
+                if message.id in self.vector_index:
+                    break
+                pending.append(message)
+            pending.reverse()
             
-        # Fallback: Simple keyword detection if semantic analysis fails
-        # Keywords indicating different types of connections
-        building_keywords = ["building on", "expanding", "adding to", "furthermore", "additionally"]
-        synthesis_keywords = ["combining", "synthesizing", "bringing together", "integrating"]
-        reinforcement_keywords = ["agree", "absolutely", "exactly", "reinforcing", "supporting"]
-        clarification_keywords = ["clarifying", "specifically", "precisely", "to be clear"]
-        
-        content_lower = new_message.content.lower()
-        
-        # Check for explicit references
-        if any(keyword in content_lower for keyword in building_keywords):
-            return SynapseType.BUILDING, 0.8
-        elif any(keyword in content_lower for keyword in synthesis_keywords):
-            return SynapseType.SYNTHESIS, 0.9
-        elif any(keyword in content_lower for keyword in reinforcement_keywords):
-            return SynapseType.REINFORCEMENT, 0.7
-        elif any(keyword in content_lower for keyword in clarification_keywords):
-            return SynapseType.CLARIFICATION, 0.6
-        
-        # Check for implicit connections (simplified - could use embeddings in production)
-        # For now, check if messages share significant terms
-        prev_terms = set(prev_message.content.lower().split())
-        new_terms = set(content_lower.split())
-        overlap = len(prev_terms & new_terms) / max(len(prev_terms), len(new_terms))
-        
-        if overlap > 0.3:  # Significant term overlap
-            return SynapseType.BUILDING, overlap
-        
-        return None, 0.0    
+            for start in range(0, len(pending), self.INDEX_BATCH_SIZE):
+                batch = pending[start:start + self.INDEX_BATCH_SIZE]
+                vectors = await semantic_detector.embed_async([m.content for m in batch])
+                self.vector_index.add_batch(batch, vectors)
+    
+    async def _record_synapse(self, prev_message: Message, new_message: Message, score: SemanticScore):
+        """Store a detected synapse and notify listeners"""
+        synapse_type = score.synapse_type
+        connection = SynapseConnection(
+            from_message_id=prev_message.id,
+            to_message_id=new_message.id,
+            synapse_type=synapse_type,
+            strength=score.confidence
+        )
+        
+        self.synapse_connections.append(connection)
+        new_message.synapse_connections.append(prev_message.id)
+        
+        # Log collaboration event
+        event = CollaborationEvent(
+            session_id=self.session_id,
+            event_type="synapse_detected",
+            involved_models=[prev_message.model_source, new_message.model_source],
+            description=f"{new_message.model_source} {synapse_type.value} {prev_message.model_source}'s idea"
+        )
+        self.collaboration_events.append(event)
+        
+        await self._trigger_updates("synapse_detected", connection)
+        
+        logger.info(f"Synapse detected: {synapse_type.value} between {prev_message.model_source} and {new_message.model_source}")
+    
     async def _update_context_summary(self):
         """
         Update the context summary using intelligent LLM summarization
@@ -226,10 +282,17 @@ class GroupMemory:
         
         return context
     
-    def get_token_aware_context(self, model_name: str, token_limit: int = 4000) -> List[Dict[str, Any]]:
+    def get_token_aware_context(
+        self,
+        model_name: str,
+        token_limit: int = 4000,
+        response_reserve: int = 200
+    ) -> List[Dict[str, Any]]:
         """
         Get context that fits within token limits for specific models
-        Uses dynamic summarization when needed
+        Uses dynamic summarization when needed; `response_reserve` tokens of
+        the limit are left for the answer (0 when the caller's budget already
+        excludes it, see AIProvider.context_budget)
         """
         context = []
         
@@ -247,20 +310,29 @@ class GroupMemory:
             summary_tokens = 0
         
         # Calculate remaining token budget
-        remaining_tokens = token_limit - summary_tokens - 200  # Reserve tokens for response
+        remaining_tokens = token_limit - summary_tokens - response_reserve
         
         # Add messages from most recent, backwards
-        messages_to_include = []
+        start = len(self.messages)
         current_tokens = 0
+        message_tokens = []
         
         for msg in reversed(self.messages):
             msg_tokens = self.summarizer.estimate_tokens([msg], model_name)
             if current_tokens + msg_tokens <= remaining_tokens:
-                messages_to_include.insert(0, msg)
+                start -= 1
                 current_tokens += msg_tokens
+                message_tokens.append(msg_tokens)
             else:
                 break
         
+        # Start the window on a step boundary once anything was dropped
+        step = max(1, self.CONTEXT_WINDOW_STEP)
+        if start > 0 and start < len(self.messages):
+            start = min(-(-start // step) * step, len(self.messages) - 1)
+        messages_to_include = self.messages[start:]
+        self.context_token_estimates[model_name] = summary_tokens + sum(message_tokens[:len(messages_to_include)])
+        
         # Format included messages
         for msg in messages_to_include:
             # Determine role based on message source and type
@@ -325,28 +397,106 @@ class GroupMemory:
             "synapse_breakdown": synapse_counts,
             "message_breakdown": message_counts,
             "collaboration_events": len(self.collaboration_events),
-            "collaboration_density": len(self.synapse_connections) / max(len(self.messages), 1)
+            "collaboration_density": len(self.synapse_connections) / max(len(self.messages), 1),
+            "usage": self.get_usage_stats()
         }
     
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """
+        Provider-reported token usage (Message.metadata["usage"]) for the session,
+        per provider, per panelist and for the latest turn, with throughput
+        """
+        session_totals = _UsageTotals()
+        by_provider: Dict[str, _UsageTotals] = {}
+        by_panelist: Dict[str, _UsageTotals] = {}
+        last_turn = _UsageTotals()
+        
+        for msg in self.messages:
+            if not msg.model_source or msg.model_source in ("user", "system"):
+                if msg.message_type != MessageType.SYSTEM:
+                    # A user message starts a new turn
+                    last_turn = _UsageTotals()
+                continue
+            if "usage" not in msg.metadata and "timing" not in msg.metadata:
+                continue
+            for totals in (
+                session_totals, last_turn,
+                by_provider.setdefault(msg.metadata.get("provider", "unknown"), _UsageTotals()),
+                by_panelist.setdefault(msg.model_source, _UsageTotals())
+            ):
+                totals.add(msg.metadata)
+        
+        return {
+            **session_totals.summary(),
+            "last_turn": last_turn.summary(),
+            "by_provider": {name: totals.summary() for name, totals in by_provider.items()},
+            "by_panelist": {name: totals.summary() for name, totals in by_panelist.items()}
+        }
+    
+    def estimated_bytes(self) -> int:
+        """Approximate process memory held by this session's history and index"""
+        return (
+            sum(len(msg.content) for msg in self.messages)
+            + len(self.messages) * self.MESSAGE_OVERHEAD_BYTES
+            + (len(self.synapse_connections) + len(self.collaboration_events)) * self.RECORD_OVERHEAD_BYTES
+            + len(self.context_summary)
+            + self.vector_index.nbytes
+        )
+    
+    def take_delta(self) -> Dict[str, Any]:
+        """
+        Collect everything added since the last call (for append-only persistence)
+        and advance the persisted cursors
+        """
+        delta = {
+            "messages": self.messages[self._persisted["messages"]:],
+            "synapses": self.synapse_connections[self._persisted["synapses"]:],
+            "events": self.collaboration_events[self._persisted["events"]:],
+            "header": {
+                "session_id": self.session_id,
+                "context_summary": self.context_summary,
+                "message_count": len(self.messages),
+                "synapse_count": len(self.synapse_connections),
+                "event_count": len(self.collaboration_events)
+            }
+        }
+        self._persisted = {
+            "messages": len(self.messages),
+            "synapses": len(self.synapse_connections),
+            "events": len(self.collaboration_events)
+        }
+        return delta
+    
+    def restore_delta(self, delta: Dict[str, Any]):
+        """Undo take_delta() for a delta that could not be persisted"""
+        for kind in self._persisted:
+            self._persisted[kind] -= len(delta[kind])
+    
     def to_dict(self) -> Dict[str, Any]:
-        """Serialize GroupMemory to dictionary for Redis storage"""
+        """Serialize GroupMemory to dictionary for state store storage (round-trips through from_dict)"""
         return {
             "session_id": self.session_id,
             "messages": [msg.model_dump() for msg in self.messages],
             "synapse_connections": [syn.model_dump() for syn in self.synapse_connections],
             "collaboration_events": [evt.model_dump() for evt in self.collaboration_events],
-            "context_summary": self.context_summary,
-            "model_contexts": self.model_contexts
+            "context_summary": self.context_summary
         }
     
     def from_dict(self, data: Dict[str, Any]):
-        """Restore GroupMemory from dictionary"""
+        """Restore GroupMemory from dictionary (entries may be dicts or already-built models)"""
         self.session_id = data.get("session_id", self.session_id)
-        self.messages = [Message(**msg) for msg in data.get("messages", [])]
-        self.synapse_connections = [SynapseConnection(**syn) for syn in data.get("synapse_connections", [])]
-        self.collaboration_events = [CollaborationEvent(**evt) for evt in data.get("collaboration_events", [])]
+        self.messages = [Message.model_validate(msg) for msg in data.get("messages", [])]
+        self.synapse_connections = [SynapseConnection.model_validate(syn) for syn in data.get("synapse_connections", [])]
+        self.collaboration_events = [CollaborationEvent.model_validate(evt) for evt in data.get("collaboration_events", [])]
         self.context_summary = data.get("context_summary", "")
-        self.model_contexts = data.get("model_contexts", {})
+        # Restored state is already persisted
+        self._persisted = {
+            "messages": len(self.messages),
+            "synapses": len(self.synapse_connections),
+            "events": len(self.collaboration_events)
+        }
+        # Rebuilt from the restored history on the next detection, off the event loop
+        self.vector_index = SessionVectorIndex(quantize=self.vector_index.quantize)
         return {
             "total_messages": len(self.messages),
             "total_synapses": len(self.synapse_connections),
@@ -357,3 +507,61 @@ class GroupMemory:
             },
             "average_synapse_strength": sum(s.strength for s in self.synapse_connections) / len(self.synapse_connections) if self.synapse_connections else 0
         }
+
+
+class _UsageTotals:
+    """Running sums of per-message usage metadata"""
+    
+    FIELDS = ("input_tokens", "output_tokens", "cached_input_tokens", "cache_write_tokens")
+    
+    def __init__(self):
+        self.responses = 0
+        self.tokens = dict.fromkeys(self.FIELDS, 0)
+        self.estimated_input_tokens = 0
+        self.estimated_for_input_tokens = 0  # actual input tokens of responses that had an estimate
+        self.cache_hits = 0
+        self.generation_seconds = 0.0
+        self.timed_output_tokens = 0
+        self.first_token_ms: List[float] = []
+    
+    def add(self, metadata: Dict[str, Any]):
+        self.responses += 1
+        usage = metadata.get("usage") or {}
+        for field in self.FIELDS:
+            self.tokens[field] += usage.get(field, 0)
+        if usage and metadata.get("estimated_input_tokens"):
+            self.estimated_input_tokens += metadata["estimated_input_tokens"]
+            self.estimated_for_input_tokens += usage.get("input_tokens", 0)
+        if metadata.get("response_cache") == "hit":
+            self.cache_hits += 1
+        
+        timing = metadata.get("timing") or {}
+        if timing.get("generation_ms"):
+            self.generation_seconds += timing["generation_ms"] / 1000
+            self.timed_output_tokens += timing.get("output_tokens", 0)
+        if timing.get("time_to_first_token_ms") is not None:
+            self.first_token_ms.append(timing["time_to_first_token_ms"])
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "responses": self.responses,
+            **self.tokens,
+            "cache_hit_ratio": (
+                round(self.tokens["cached_input_tokens"] / self.tokens["input_tokens"], 3)
+                if self.tokens["input_tokens"] else None
+            ),
+            "response_cache_hits": self.cache_hits,
+            # Actual / estimated prompt tokens: >1 means context budgets are underestimated
+            "input_estimate_ratio": (
+                round(self.estimated_for_input_tokens / self.estimated_input_tokens, 3)
+                if self.estimated_input_tokens else None
+            ),
+            "output_tokens_per_second": (
+                round(self.timed_output_tokens / self.generation_seconds, 1)
+                if self.generation_seconds else None
+            ),
+            "avg_time_to_first_token_ms": (
+                round(sum(self.first_token_ms) / len(self.first_token_ms))
+                if self.first_token_ms else None
+            )
+        }
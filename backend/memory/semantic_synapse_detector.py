@@ -2,15 +2,27 @@
 Semantic Synapse Detector
 Advanced collaboration detection using semantic analysis
 Updated: 2025-07-06 23:30:00
+Updated: 2026-10-19 - Lazy model loading with background warmup
+Updated: 2026-10-19 - Batched per-candidate scoring with cached embeddings
+Updated: 2026-10-19 - Session-wide vector index search
+Updated: 2026-10-19 - Pluggable inference backends (fp32, int8, max sequence length)
+Updated: 2026-10-19 - Off-loop provisional previews for partially streamed messages
+Updated: 2026-10-19 - Off-loop batch embedding for rebuilding session vector indexes
 """
 
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from models.schemas import Message, SynapseType
-from sentence_transformers import SentenceTransformer
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from memory.synapse_patterns import SynapsePatternEngine
+from memory.vector_index import SessionVectorIndex
+from memory.embedding_backends import EmbeddingBackend, create_backend
 from loguru import logger
-import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import numpy as np
+import os
+import threading
+import time
 from dataclasses import dataclass
 
 
@@ -29,16 +41,44 @@ class SemanticSynapseDetector:
     Improves upon keyword-based detection with true semantic understanding
     """
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        """Initialize with a lightweight sentence embedding model"""
-        try:
-            self.model = SentenceTransformer(model_name)
-            self.enabled = True
-            logger.info(f"Semantic synapse detector initialized with {model_name}")
-        except Exception as e:
-            logger.warning(f"Failed to load semantic model: {e}. Falling back to keyword detection.")
-            self.model = None
-            self.enabled = False        
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        backend: Optional[str] = None,
+        max_seq_length: Optional[int] = None
+    ):
+        """
+        Configure the detector without loading the embedding model.
+        The model is loaded by start_warmup() in a background thread; until it
+        is ready, detection uses keyword analysis only.
+        backend / max_seq_length default to SEMANTIC_BACKEND / SEMANTIC_MAX_SEQ_LENGTH
+        """
+        self.model_name = model_name
+        self.backend_name = backend or os.getenv("SEMANTIC_BACKEND", "torch")
+        self.max_seq_length = max_seq_length or int(os.getenv("SEMANTIC_MAX_SEQ_LENGTH", "0")) or None
+        self.model: Optional[EmbeddingBackend] = None
+        self.enabled = False
+        
+        # Model lifecycle: not_loaded -> loading -> ready | failed
+        self.state = "not_loaded"
+        self.load_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._load_lock = threading.Lock()
+        self._ready_event = threading.Event()
+        
+        # Normalized embeddings by message content, so each message is encoded once
+        self._embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._embedding_cache_size = 2048
+        self._embed_lock = threading.Lock()
+        
+        # Mid-stream previews and vector index backlogs are encoded on one
+        # worker thread; when more than max_preview_backlog previews are
+        # queued, new previews are skipped
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._preview_backlog = 0
+        self.max_preview_backlog = 2
+        self.previews_skipped = 0
+        
         # Configurable thresholds
         self.thresholds = {
             "high_similarity": 0.85,
@@ -69,46 +109,299 @@ class SemanticSynapseDetector:
                 "patterns": [r"to clarify", r"more specifically", r"what I mean is"],
                 "weight": 0.6
             }
-        }    
-    def detect_synapse(self, new_message: Message, recent_messages: List[Message]) -> Optional[Tuple[SynapseType, float, str]]:
+        }
+        
+        # Compiled single-pass matcher over all of the above
+        self.pattern_engine = SynapsePatternEngine(self.synapse_patterns)
+    
+    def start_warmup(self) -> None:
+        """Load the embedding model in a background thread (idempotent)"""
+        with self._load_lock:
+            if self.state != "not_loaded":
+                return
+            self.state = "loading"
+        
+        thread = threading.Thread(
+            target=self._load_model,
+            name="semantic-model-warmup",
+            daemon=True
+        )
+        thread.start()
+    
+    def _load_model(self) -> None:
+        """Import the heavy ML stack, build the model and run a warmup encode"""
+        started = time.perf_counter()
+        try:
+            model = create_backend(self.backend_name, self.model_name, self.max_seq_length)
+            model.load()
+            # First encode allocates buffers; do it here rather than on a live request
+            model.encode(["warmup"])
+            
+            self.model = model
+            self.enabled = True
+            self.state = "ready"
+            self.load_seconds = time.perf_counter() - started
+            logger.info(f"Semantic synapse detector initialized with {self.model_name} ({self.backend_name}) in {self.load_seconds:.2f}s")
+        except Exception as e:
+            logger.warning(f"Failed to load semantic model: {e}. Falling back to keyword detection.")
+            self.model = None
+            self.enabled = False
+            self.state = "failed"
+            self.load_error = str(e)
+        finally:
+            self._ready_event.set()
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the model finished loading (or failed). Returns True if usable"""
+        self._ready_event.wait(timeout)
+        return self.is_ready
+    
+    @property
+    def is_ready(self) -> bool:
+        """Whether semantic analysis is available"""
+        return self.state == "ready" and self.model is not None
+    
+    def status(self) -> Dict[str, Any]:
+        """Readiness information for health checks"""
+        return {
+            "state": self.state,
+            "ready": self.is_ready,
+            "model": self.model_name,
+            "backend": self.backend_name,
+            "max_seq_length": self.model.max_seq_length if self.model else self.max_seq_length,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "error": self.load_error,
+            "mode": "semantic" if self.is_ready else "keyword"
+        }
+    
+    def detect_synapse(
+        self,
+        new_message: Message,
+        recent_messages: List[Message],
+        index: Optional[SessionVectorIndex] = None,
+        top_k: int = 5
+    ) -> Optional[Tuple[SynapseType, float, str]]:
         """
         Detect synapses using semantic analysis
+        With an index, the semantic pass also considers the top_k nearest
+        messages from the entire session history, not just recent_messages
         Returns: (synapse_type, confidence, building_on_message_id) or None
         """
-        if not recent_messages:
+        if not recent_messages and not index:
             return None
+        
+        # Lazy path: first use kicks off loading without blocking this call
+        if self.state == "not_loaded":
+            self.start_warmup()
             
-        # First try semantic analysis if available
-        if self.enabled and self.model:
-            semantic_result = self._semantic_analysis(new_message, recent_messages)
+        # First try semantic analysis if the model is ready
+        if self.is_ready:
+            candidates = list(recent_messages)
+            if index is not None and len(index):
+                query = self.embed([new_message.content])[0]
+                known = {m.id for m in candidates}
+                for message, _ in index.search(query, k=top_k, exclude_ids={new_message.id}):
+                    if message.id not in known:
+                        candidates.append(message)
+            semantic_result = self._semantic_analysis(new_message, candidates, window=len(candidates))
             if semantic_result:
                 return semantic_result
         
         # Fallback to enhanced keyword detection
         return self._enhanced_keyword_detection(new_message, recent_messages)
     
-    def _semantic_analysis(self, new_message: Message, recent_messages: List[Message]) -> Optional[Tuple[SynapseType, float, str]]:
+    def score_candidates(
+        self,
+        new_message: Message,
+        candidates: List[Message],
+        keyword_fallback: bool = True
+    ) -> Dict[str, SemanticScore]:
+        """
+        Score a new message against every candidate in a single pass
+        Returns a SemanticScore per candidate message id that shows a synapse;
+        candidates without a meaningful connection are omitted.
+        keyword_fallback=False restricts scoring to the semantic pass
+        """
+        candidates = [c for c in candidates if c.id != new_message.id]
+        if not candidates:
+            return {}
+        
+        if self.state == "not_loaded":
+            self.start_warmup()
+        
+        results: Dict[str, SemanticScore] = {}
+        
+        # Semantic pass: one batched encode and one matrix-vector product
+        if self.is_ready:
+            try:
+                similarities = self._similarities(new_message.content, [c.content for c in candidates])
+                for candidate, similarity in zip(candidates, similarities):
+                    similarity = float(similarity)
+                    if similarity < self.thresholds["minimum_similarity"]:
+                        continue
+                    synapse_type, confidence = self._classify_synapse_type(
+                        new_message.content, candidate.content, similarity
+                    )
+                    if confidence > 0.5:  # Confidence threshold
+                        results[candidate.id] = SemanticScore(
+                            similarity=similarity,
+                            synapse_type=synapse_type,
+                            confidence=min(confidence, 1.0),
+                            evidence=self.pattern_engine.analyze(new_message.content)[synapse_type].evidence
+                        )
+            except Exception as e:
+                logger.error(f"Error in semantic analysis: {e}")
+        
+        if not keyword_fallback:
+            return results
+        
+        # Keyword pass for the candidates the semantic pass did not connect
+        matches = self.pattern_engine.analyze(new_message.content)
+        for candidate in candidates:
+            if candidate.id in results:
+                continue
+            overlap = self.pattern_engine.term_overlap(candidate.content, new_message.content)
+            scores = {
+                synapse_type: (match.score + overlap * 0.3) * self.pattern_engine.weights[synapse_type]
+                for synapse_type, match in matches.items()
+            }
+            best_type = max(scores, key=scores.get)
+            if scores[best_type] > 0.3:  # Minimum threshold
+                results[candidate.id] = SemanticScore(
+                    similarity=overlap,
+                    synapse_type=best_type,
+                    confidence=min(scores[best_type], 1.0),
+                    evidence=matches[best_type].evidence
+                )
+                continue
+            
+            # Explicit references: first type with a keyword, at its type weight
+            explicit_type = next((t for t, match in matches.items() if match.keywords), None)
+            if explicit_type:
+                results[candidate.id] = SemanticScore(
+                    similarity=overlap,
+                    synapse_type=explicit_type,
+                    confidence=self.pattern_engine.weights[explicit_type],
+                    evidence=matches[explicit_type].evidence
+                )
+            elif overlap > 0.3:  # Significant term overlap
+                results[candidate.id] = SemanticScore(
+                    similarity=overlap,
+                    synapse_type=SynapseType.BUILDING,
+                    confidence=overlap,
+                    evidence=[f"term overlap: {overlap:.2f}"]
+                )
+        
+        return results
+    
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Normalized embeddings for texts, encoding only cache misses in one batch"""
+        with self._embed_lock:
+            missing = [text for text in dict.fromkeys(texts) if text not in self._embedding_cache]
+            if missing:
+                encoded = self.model.encode(missing)
+                for text, vector in zip(missing, encoded):
+                    self._embedding_cache[text] = vector.astype(np.float32, copy=False)
+            
+            vectors = []
+            for text in texts:
+                self._embedding_cache.move_to_end(text)
+                vectors.append(self._embedding_cache[text])
+            
+            while len(self._embedding_cache) > self._embedding_cache_size:
+                self._embedding_cache.popitem(last=False)
+        
+        return np.stack(vectors)
+    
+    def _worker(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="synapse-embed")
+        return self._executor
+    
+    async def embed_async(self, texts: List[str]) -> np.ndarray:
+        """embed() on the worker thread, for batches too large to encode on the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._worker(), self.embed, texts)
+    
+    @property
+    def preview_backlogged(self) -> bool:
+        """Whether the preview embedding queue is full"""
+        return self._preview_backlog >= self.max_preview_backlog
+    
+    async def preview_synapses(self, partial_content: str, candidates: List[Message]) -> Dict[str, SemanticScore]:
+        """
+        Provisional semantic scores for a message that is still streaming
+        Encoding runs on the preview worker thread so the event loop keeps
+        streaming; returns {} without encoding when the queue is backed up
+        """
+        if not self.is_ready or not candidates:
+            return {}
+        if self.preview_backlogged:
+            self.previews_skipped += 1
+            return {}
+        
+        self._preview_backlog += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._worker(), self._score_preview, partial_content, candidates
+            )
+        except Exception as e:
+            logger.error(f"Error in synapse preview: {e}")
+            return {}
+        finally:
+            self._preview_backlog -= 1
+    
+    def _score_preview(self, partial_content: str, candidates: List[Message]) -> Dict[str, SemanticScore]:
+        """Semantic-only scoring; the partial text is not added to the embedding cache"""
+        candidate_vectors = self.embed([c.content for c in candidates])
+        partial_vector = self.model.encode([partial_content])[0]
+        similarities = candidate_vectors @ partial_vector
+        
+        results = {}
+        for candidate, similarity in zip(candidates, similarities):
+            similarity = float(similarity)
+            if similarity < self.thresholds["minimum_similarity"]:
+                continue
+            synapse_type, confidence = self._classify_synapse_type(partial_content, candidate.content, similarity)
+            if confidence > 0.5:  # Confidence threshold
+                results[candidate.id] = SemanticScore(
+                    similarity=similarity,
+                    synapse_type=synapse_type,
+                    confidence=min(confidence, 1.0),
+                    evidence=self.pattern_engine.analyze(partial_content)[synapse_type].evidence
+                )
+        return results
+    
+    def _similarities(self, new_content: str, candidate_contents: List[str]) -> np.ndarray:
+        """Cosine similarity of new_content against each candidate"""
+        embeddings = self.embed([new_content] + candidate_contents)
+        return embeddings[1:] @ embeddings[0]
+    
+    def _semantic_analysis(
+        self,
+        new_message: Message,
+        recent_messages: List[Message],
+        window: int = 10
+    ) -> Optional[Tuple[SynapseType, float, str]]:
         """Perform semantic similarity analysis between messages"""
         try:
-            # Encode the new message
-            new_embedding = self.model.encode(new_message.content)
+            # Look at the last `window` messages (10 by default)
+            window = [
+                prev_msg for prev_msg in recent_messages[-window:]
+                if prev_msg.id != new_message.id and prev_msg.model_source
+            ]
+            if not window:
+                return None
             
-            # Encode recent messages and calculate similarities
-            best_match = None
-            highest_similarity = 0
+            # Encode everything in one batch and compare in one product
+            similarities = self._similarities(new_message.content, [m.content for m in window])
+            best_index = int(np.argmax(similarities))
+            highest_similarity = float(similarities[best_index])
             
-            for prev_msg in recent_messages[-10:]:  # Look at last 10 messages
-                if prev_msg.id == new_message.id or not prev_msg.model_source:
-                    continue
-                    
-                prev_embedding = self.model.encode(prev_msg.content)
-                similarity = cosine_similarity([new_embedding], [prev_embedding])[0][0]                
-                if similarity > highest_similarity and similarity >= self.thresholds["minimum_similarity"]:
-                    highest_similarity = similarity
-                    best_match = prev_msg
-                    
-            if not best_match:
+            if highest_similarity < self.thresholds["minimum_similarity"]:
                 return None
+            best_match = window[best_index]
                 
             # Determine synapse type based on similarity and content analysis
             synapse_type, confidence = self._classify_synapse_type(
@@ -126,45 +419,30 @@ class SemanticSynapseDetector:
         return None    
     def _classify_synapse_type(self, new_content: str, prev_content: str, similarity: float) -> Tuple[SynapseType, float]:
         """Classify the type of synapse based on content and similarity"""
-        new_lower = new_content.lower()
-        scores = {}
+        # Factor in semantic similarity (same bonus for every type)
+        if similarity >= self.thresholds["high_similarity"]:
+            similarity_bonus = 0.3
+        elif similarity >= self.thresholds["medium_similarity"]:
+            similarity_bonus = 0.2
+        elif similarity >= self.thresholds["low_similarity"]:
+            similarity_bonus = 0.1
+        else:
+            similarity_bonus = 0.0
         
-        # Check each synapse type's patterns
-        for synapse_type, patterns in self.synapse_patterns.items():
-            score = 0.0
-            evidence = []
-            
-            # Check keywords
-            for keyword in patterns["keywords"]:
-                if keyword in new_lower:
-                    score += 0.3
-                    evidence.append(f"keyword: {keyword}")
-                    
-            # Check regex patterns
-            for pattern in patterns["patterns"]:
-                if re.search(pattern, new_lower):
-                    score += 0.4
-                    evidence.append(f"pattern: {pattern}")
-                    
-            # Factor in semantic similarity
-            if similarity >= self.thresholds["high_similarity"]:
-                score += 0.3
-            elif similarity >= self.thresholds["medium_similarity"]:
-                score += 0.2
-            elif similarity >= self.thresholds["low_similarity"]:
-                score += 0.1
-                
-            # Apply type-specific weight
-            score *= patterns["weight"]
-            scores[synapse_type] = (score, evidence)
+        # One scan of the message covers every synapse type
+        matches = self.pattern_engine.analyze(new_content)
+        scores = {
+            synapse_type: (match.score + similarity_bonus) * self.pattern_engine.weights[synapse_type]
+            for synapse_type, match in matches.items()
+        }
             
         # Get the highest scoring type
         if scores:
-            best_type = max(scores.keys(), key=lambda k: scores[k][0])
-            best_score, evidence = scores[best_type]
+            best_type = max(scores.keys(), key=lambda k: scores[k])
+            best_score = scores[best_type]
             
             if best_score > 0:
-                logger.debug(f"Classified as {best_type} with score {best_score:.2f}. Evidence: {evidence}")
+                logger.debug(f"Classified as {best_type} with score {best_score:.2f}. Evidence: {matches[best_type].evidence}")
                 return best_type, min(best_score, 1.0)
                 
         # Default to building if high similarity but no specific pattern
@@ -174,35 +452,23 @@ class SemanticSynapseDetector:
         return SynapseType.BUILDING, 0.0    
     def _enhanced_keyword_detection(self, new_message: Message, recent_messages: List[Message]) -> Optional[Tuple[SynapseType, float, str]]:
         """Enhanced keyword-based detection as fallback"""
-        new_lower = new_message.content.lower()
         best_match = None
         best_score = 0
         best_type = None
         
+        # Keyword/pattern scores depend only on the new message: compute once
+        type_scores = self.pattern_engine.analyze(new_message.content)
+        
         for prev_msg in recent_messages[-10:]:
             if prev_msg.id == new_message.id or not prev_msg.model_source:
                 continue
+            
+            # Term sets are cached per message content
+            overlap = self.pattern_engine.term_overlap(prev_msg.content, new_message.content)
                 
             # Check for each synapse type
-            for synapse_type, patterns in self.synapse_patterns.items():
-                score = 0
-                
-                # Check keywords
-                keyword_matches = sum(1 for kw in patterns["keywords"] if kw in new_lower)
-                score += keyword_matches * 0.3
-                
-                # Check patterns
-                pattern_matches = sum(1 for p in patterns["patterns"] if re.search(p, new_lower))
-                score += pattern_matches * 0.4
-                
-                # Check term overlap
-                prev_terms = set(prev_msg.content.lower().split())
-                new_terms = set(new_lower.split())
-                overlap = len(prev_terms & new_terms) / max(len(prev_terms), len(new_terms), 1)
-                score += overlap * 0.3
-                
-                # Apply weight
-                score *= patterns["weight"]
+            for synapse_type, match in type_scores.items():
+                score = (match.score + overlap * 0.3) * self.pattern_engine.weights[synapse_type]
                 
                 if score > best_score:
                     best_score = score
@@ -219,5 +485,5 @@ class SemanticSynapseDetector:
         self.thresholds.update(thresholds)
         logger.info(f"Updated semantic thresholds: {self.thresholds}")
 
-# Singleton instance
-semantic_detector = SemanticSynapseDetector()
\ No newline at end of file
+# Singleton instance (cheap to construct; call start_warmup() to load the model)
+semantic_detector = SemanticSynapseDetector()
@@ -0,0 +1,224 @@
+"""
+Session Vector Index
+Per-session store of message embeddings for long-range synapse detection
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+from models.schemas import Message
+from loguru import logger
+import numpy as np
+
+
+class SessionVectorIndex:
+    """
+    Normalized message embeddings for one session
+
+    Rows live in a single contiguous matrix (float32, or int8 with a per-row
+    scale) so a query is one BLAS matrix-vector product. Past
+    `approximate_threshold` rows an IVF coarse quantizer (spherical k-means)
+    restricts each query to the closest clusters (`n_probe`, or one in eight
+    clusters by default).
+    """
+
+    QUANTIZED_BLOCK_ROWS = 1024
+
+    def __init__(
+        self,
+        quantize: bool = False,
+        approximate_threshold: int = 20000,
+        n_probe: Optional[int] = None,
+        initial_capacity: int = 256
+    ):
+        self.quantize = quantize
+        self.approximate_threshold = approximate_threshold
+        self.n_probe = n_probe
+
+        self._capacity = initial_capacity
+        self._size = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None  # int8 mode only
+        self._messages: List[Message] = []
+        self._positions: Dict[str, int] = {}
+
+        # Source codes let searches exclude a model's own messages without a Python loop
+        self._source_codes: Dict[Optional[str], int] = {}
+        self._sources = np.zeros(initial_capacity, dtype=np.int32)
+
+        # IVF state (built lazily once the index is large)
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments: Optional[np.ndarray] = None
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, message_id: str) -> bool:
+        return message_id in self._positions
+
+    @property
+    def is_approximate(self) -> bool:
+        return self._centroids is not None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the index arrays"""
+        arrays = (self._matrix, self._scales, self._sources, self._centroids, self._assignments)
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def add(self, message: Message, vector: np.ndarray):
+        """Add one message embedding (expects a normalized vector)"""
+        self.add_batch([message], np.asarray(vector)[None, :])
+
+    def add_batch(self, messages: List[Message], vectors: np.ndarray):
+        """Add several message embeddings at once"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        new_rows = [(m, v) for m, v in zip(messages, vectors) if m.id not in self._positions]
+        if not new_rows:
+            return
+
+        if self._matrix is None:
+            self._allocate(vectors.shape[1])
+        self._reserve(self._size + len(new_rows))
+
+        start = self._size
+        block = np.stack([v for _, v in new_rows])
+        if self.quantize:
+            scales = np.abs(block).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self._matrix[start:start + len(new_rows)] = np.round(block / scales[:, None]).astype(np.int8)
+            self._scales[start:start + len(new_rows)] = scales
+        else:
+            self._matrix[start:start + len(new_rows)] = block
+
+        for offset, (message, _) in enumerate(new_rows):
+            self._positions[message.id] = start + offset
+            self._messages.append(message)
+            self._sources[start + offset] = self._source_code(message.model_source)
+        self._size += len(new_rows)
+
+        if self._centroids is not None:
+            self._assignments = np.concatenate([self._assignments, self._assign(block)])
+
+        # (Re)build the coarse quantizer on crossing the threshold and whenever the index doubles
+        if self._size >= self.approximate_threshold and self._size >= 2 * self._trained_size:
+            self._train()
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 5,
+        exclude_ids: Optional[Set[str]] = None,
+        exclude_source: Optional[str] = None
+    ) -> List[Tuple[Message, float]]:
+        """Top-k most similar messages as (message, cosine similarity), best first"""
+        if self._size == 0 or k <= 0:
+            return []
+
+        query = np.asarray(query, dtype=np.float32)
+        if self._centroids is not None:
+            rows = self._probe_rows(query)
+        else:
+            rows = None
+
+        scores = self._scores(query, rows)
+
+        # Mask excluded rows in bulk
+        row_ids = rows if rows is not None else np.arange(self._size)
+        mask = np.zeros(len(row_ids), dtype=bool)
+        if exclude_source is not None and exclude_source in self._source_codes:
+            mask |= self._sources[row_ids] == self._source_codes[exclude_source]
+        if exclude_ids:
+            excluded = np.array([self._positions[i] for i in exclude_ids if i in self._positions], dtype=np.int64)
+            if excluded.size:
+                mask |= np.isin(row_ids, excluded)
+        scores[mask] = -np.inf
+
+        available = int((~mask).sum())
+        k = min(k, available)
+        if k == 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._messages[row_ids[i]], float(scores[i])) for i in top]
+
+    def _scores(self, query: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """Dot products of the query with all (or the given) rows"""
+        matrix = self._matrix[:self._size] if rows is None else self._matrix[rows]
+        if not self.quantize:
+            return matrix @ query
+
+        # Dequantize in cache-sized blocks rather than materializing a float copy
+        scales = self._scales[:self._size] if rows is None else self._scales[rows]
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), self.QUANTIZED_BLOCK_ROWS):
+            block = matrix[start:start + self.QUANTIZED_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ query
+        return scores * scales
+
+    def _allocate(self, dim: int):
+        dtype = np.int8 if self.quantize else np.float32
+        self._matrix = np.zeros((self._capacity, dim), dtype=dtype)
+        if self.quantize:
+            self._scales = np.zeros(self._capacity, dtype=np.float32)
+
+    def _reserve(self, needed: int):
+        """Grow storage geometrically so appends stay amortized O(1)"""
+        if needed <= self._capacity:
+            return
+        while self._capacity < needed:
+            self._capacity *= 2
+        self._matrix = self._grow(self._matrix)
+        self._sources = self._grow(self._sources)
+        if self.quantize:
+            self._scales = self._grow(self._scales)
+
+    def _grow(self, array: np.ndarray) -> np.ndarray:
+        grown = np.zeros((self._capacity,) + array.shape[1:], dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def _source_code(self, source: Optional[str]) -> int:
+        if source not in self._source_codes:
+            self._source_codes[source] = len(self._source_codes)
+        return self._source_codes[source]
+
+    def _dense(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Float32 view of the stored vectors"""
+        matrix = self._matrix[:self._size] if rows is None else self._matrix[rows]
+        if self.quantize:
+            scales = self._scales[:self._size] if rows is None else self._scales[rows]
+            return matrix.astype(np.float32) * scales[:, None]
+        return matrix
+
+    def _train(self, iterations: int = 8, sample_size: int = 20000):
+        """Spherical k-means over a sample to build the IVF coarse quantizer"""
+        n_lists = max(1, int(np.sqrt(self._size)))
+        rng = np.random.default_rng(0)
+        sample_rows = rng.choice(self._size, size=min(sample_size, self._size), replace=False)
+        sample = self._dense(sample_rows)
+
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(n_lists):
+                members = sample[labels == cluster]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    if norm > 0:
+                        centroids[cluster] = centroid / norm
+
+        self._centroids = centroids.astype(np.float32)
+        self._assignments = self._assign(self._dense())
+        self._trained_size = self._size
+        logger.debug(f"Vector index switched to IVF with {n_lists} lists over {self._size} rows")
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _probe_rows(self, query: np.ndarray) -> np.ndarray:
+        """Rows in the n_probe clusters closest to the query"""
+        n_probe = min(self.n_probe or max(8, len(self._centroids) // 8), len(self._centroids))
+        closest = np.argpartition(-(self._centroids @ query), n_probe - 1)[:n_probe]
+        return np.flatnonzero(np.isin(self._assignments, closest))
@@ -49,6 +49,7 @@ class ModelPersonality(BaseModel):
     prompt_prefix: str
     collaboration_style: str
     color_theme: str  # For frontend styling
+    base_url: Optional[str] = None  # API endpoint override, e.g. a local stub server
 
 
 class PanelistConfig(BaseModel):
@@ -112,14 +113,24 @@ class CreateSessionRequest(BaseModel):
     mission: str
     selected_models: List[str] = Field(default=None)  # Model identifiers like "gpt-4o", "claude-3.5"
     panelists: Optional[List[Dict[str, Any]]] = Field(default=None)  # New: support custom personas
+    response_cache: bool = False  # Serve identical provider requests from the response cache
+    cache_replay: str = "instant"  # Cache hits replayed "instant" or "paced" (original timing)
     
     def validate_request(self):
         """Validate that either selected_models or panelists is provided"""
         if not self.selected_models and not self.panelists:
             raise ValueError("Either selected_models or panelists must be provided")
+        if self.cache_replay not in ("instant", "paced"):
+            raise ValueError("cache_replay must be 'instant' or 'paced'")
         return self
 
 
+class CompleteTurnRequest(BaseModel):
+    """Request for a non-streaming turn (all panelists answered in one payload)"""
+    message: str
+    deadline_seconds: Optional[float] = Field(default=None, gt=0)  # Default: PANEL_TURN_DEADLINE
+
+
 class StreamingResponse(BaseModel):
     """Format for SSE streaming responses"""
     session_id: str
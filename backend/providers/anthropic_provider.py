@@ -1,12 +1,21 @@
 """
 Anthropic Provider Implementation
 Handles Claude 3.5 Sonnet and other Claude models
+Updated: 2026-10-19 - Borrows its client from the shared client pool
+Updated: 2026-10-19 - cache_control breakpoints and cached-token usage
+Updated: 2026-10-19 - Single attempts in _stream/_complete; retries and errors in AIProvider
+Updated: 2026-10-19 - Configurable API base URL (persona or environment)
+
+Prompt caching uses up to four breakpoints: the persona system prompt (shared
+by every session with this persona), the conversation summary, the previous
+user turn (the prefix written by this panelist's last call, so it is read
+back now) and the newest message (written for the next turn).
 """
 
 from typing import AsyncGenerator, Optional
 import anthropic
-from anthropic import AsyncAnthropic
 from providers.base_provider import AIProvider
+from providers.client_pool import client_pool
 from models.schemas import ModelPersonality
 from loguru import logger
 
@@ -14,79 +23,110 @@ from loguru import logger
 class AnthropicProvider(AIProvider):
     """Anthropic API provider for Claude models"""
     
-    def __init__(self, api_key: str, model_name: str, personality: ModelPersonality):
-        super().__init__(api_key, model_name, personality)
-        self.client = AsyncAnthropic(api_key=api_key)
-        
-    async def generate_stream(
+    def __init__(
         self,
-        messages: list,
-        temperature: float = 0.7,
-        max_tokens: Optional[int] = None
-    ) -> AsyncGenerator[str, None]:
+        api_key: str,
+        model_name: str,
+        personality: ModelPersonality,
+        base_url: Optional[str] = None
+    ):
+        super().__init__(api_key, model_name, personality, base_url)
+        self.client = client_pool.anthropic(api_key, base_url)
+        
+    async def _stream(self, messages: list, temperature: float, max_tokens: Optional[int]) -> AsyncGenerator[str, None]:
         """Stream response from Anthropic"""
-        try:
-            # Convert messages to Anthropic format
-            prepared_messages = self._convert_to_anthropic_format(messages)
-            
-            async with self.client.messages.stream(
-                model=self.model_name,
-                messages=prepared_messages["messages"],
-                system=prepared_messages["system"],
-                temperature=temperature,
-                max_tokens=max_tokens or 4096
-            ) as stream:
-                async for text in stream.text_stream:
-                    yield text
-                    
-        except Exception as e:
-            logger.error(f"Anthropic streaming error: {e}")
-            yield f"[Error: {str(e)}]"
+        self.last_usage = None
+        # Convert messages to Anthropic format
+        prepared_messages = self._convert_to_anthropic_format(messages)
+        
+        async with self.client.messages.stream(
+            model=self.model_name,
+            messages=prepared_messages["messages"],
+            system=prepared_messages["system"],
+            max_tokens=max_tokens or 4096,
+            # Request-body field; newer SDKs no longer take it as an argument
+            extra_body={"temperature": temperature}
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+            self._record_anthropic_usage((await stream.get_final_message()).usage)
     
-    async def generate_complete(
-        self,
-        messages: list,
-        temperature: float = 0.7,
-        max_tokens: Optional[int] = None
-    ) -> str:
+    async def _complete(self, messages: list, temperature: float, max_tokens: Optional[int]) -> str:
         """Get complete response from Anthropic"""
-        try:
-            prepared_messages = self._convert_to_anthropic_format(messages)
-            
-            response = await self.client.messages.create(
-                model=self.model_name,
-                messages=prepared_messages["messages"],
-                system=prepared_messages["system"],
-                temperature=temperature,
-                max_tokens=max_tokens or 4096
-            )
-            
-            return response.content[0].text
-            
-        except Exception as e:
-            logger.error(f"Anthropic completion error: {e}")
-            return f"[Error: {str(e)}]"
+        self.last_usage = None
+        prepared_messages = self._convert_to_anthropic_format(messages)
+        
+        response = await self.client.messages.create(
+            model=self.model_name,
+            messages=prepared_messages["messages"],
+            system=prepared_messages["system"],
+            max_tokens=max_tokens or 4096,
+            # Request-body field; newer SDKs no longer take it as an argument
+            extra_body={"temperature": temperature}
+        )
+        
+        self._record_anthropic_usage(response.usage)
+        return response.content[0].text
     
     def _convert_to_anthropic_format(self, messages: list) -> dict:
         """Convert messages to Anthropic's expected format"""
         # Extract system message
         system_content = f"{self.personality.prompt_prefix}\n\n" \
                         f"You are participating in a collaborative panel discussion. " \
-                        f"Build on other responses when relevant, showing your {self.personality.collaboration_style} approach."        
-        # Filter out system messages and prepare for Anthropic
-        anthropic_messages = []
-        for msg in messages:
-            if msg["role"] != "system":
-                anthropic_messages.append({
-                    "role": msg["role"],
-                    "content": msg["content"]
-                })
+                        f"Build on other responses when relevant, showing your {self.personality.collaboration_style} approach."
+        system = [{"type": "text", "text": system_content}]
+        
+        # Leading system messages (the conversation summary) extend the system prompt;
+        # later ones are filtered out
+        index = 0
+        while index < len(messages) and messages[index]["role"] == "system":
+            system.append({"type": "text", "text": messages[index]["content"]})
+            index += 1
+        
+        anthropic_messages = [
+            {"role": msg["role"], "content": msg["content"]}
+            for msg in messages[index:] if msg["role"] != "system"
+        ]
+        
+        if self.prompt_caching:
+            self._add_cache_breakpoints(system, anthropic_messages)
         
         return {
-            "system": system_content,
+            "system": system,
             "messages": anthropic_messages
         }
     
+    def cache_payload(self, context: list) -> dict:
+        return self._convert_to_anthropic_format(context)
+    
+    @staticmethod
+    def _add_cache_breakpoints(system: list, messages: list):
+        """Mark the persona prompt, the summary, the previous user turn and the newest message"""
+        system[0]["cache_control"] = {"type": "ephemeral"}
+        if len(system) > 1:
+            system[-1]["cache_control"] = {"type": "ephemeral"}
+        
+        user_turns = [i for i, msg in enumerate(messages) if msg["role"] == "user"]
+        marked = {len(messages) - 1} if messages else set()
+        if len(user_turns) > 1:
+            marked.add(user_turns[-2])
+        for i in marked:
+            messages[i] = {
+                "role": messages[i]["role"],
+                "content": [{"type": "text", "text": messages[i]["content"], "cache_control": {"type": "ephemeral"}}]
+            }
+    
+    def _record_anthropic_usage(self, usage):
+        # input_tokens excludes what was read from or written to the cache
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        self._record_usage(
+            input_tokens=usage.input_tokens + cache_read + cache_write,
+            output_tokens=usage.output_tokens,
+            cached_input_tokens=cache_read,
+            cache_write_tokens=cache_write
+        )
+    
     def get_token_count(self, text: str) -> int:
         """Estimate token count for Claude models"""
         # Rough estimation: ~4 characters per token
@@ -1,48 +1,91 @@
 """
 Base AI Provider Interface
 Defines the contract for all AI model providers
+Updated: 2026-10-19 - Cache-stable message prefixes and cached-token usage
+Updated: 2026-10-19 - Retries and classified ProviderErrors (providers/resilience.py)
+Updated: 2026-10-19 - Per-turn context budgets from model capabilities
+Updated: 2026-10-19 - Optional API base URL per provider instance
+
+Prompts are laid out so that consecutive turns share the longest possible
+prefix, which is what provider-side prompt caches match on: the persona's
+system prompt (identical on every call) first, then the conversation summary,
+then the history oldest first, and the new input last. Message metadata is
+never sent, so nothing per-call leaks into the prefix.
 """
 
 from abc import ABC, abstractmethod
-from typing import AsyncGenerator, Dict, Any, Optional
+from typing import AsyncGenerator, Dict, Any, List, Optional
 from models.schemas import ModelPersonality, CollaborationState
+from providers.resilience import call_with_retries, stream_with_retries
+from providers.model_capabilities import ContextBudget, model_capabilities
 import asyncio
 from loguru import logger
+import os
+
+# Ask providers to cache stable prompt prefixes (Anthropic cache_control, OpenAI prompt_cache_key)
+PROMPT_CACHING = os.getenv("PROMPT_CACHING", "true").lower() == "true"
 
 
 class AIProvider(ABC):
     """Abstract base class for AI model providers"""
     
-    def __init__(self, api_key: str, model_name: str, personality: ModelPersonality):
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str,
+        personality: ModelPersonality,
+        base_url: Optional[str] = None
+    ):
         self.api_key = api_key
         self.model_name = model_name
         self.personality = personality
+        # None means the SDK's default endpoint
+        self.base_url = base_url
         self.state = CollaborationState.STANDBY
+        self.prompt_caching = PROMPT_CACHING
+        # Token usage reported by the API for the latest call
+        self.last_usage: Optional[Dict[str, int]] = None
         
-    @abstractmethod
     async def generate_stream(
         self,
         messages: list,
         temperature: float = 0.7,
         max_tokens: Optional[int] = None
     ) -> AsyncGenerator[str, None]:
-        """Generate streaming response from the model"""
-        pass
+        """
+        Generate streaming response from the model
+        Retried on transient errors until the first chunk; raises ProviderError
+        """
+        async for chunk in stream_with_retries(
+            lambda: self._stream(messages, temperature, max_tokens), label=repr(self)
+        ):
+            yield chunk
     
-    @abstractmethod
     async def generate_complete(
         self,
         messages: list,
         temperature: float = 0.7,
         max_tokens: Optional[int] = None
     ) -> str:
-        """Generate complete response (non-streaming)"""
+        """Generate complete response (non-streaming); raises ProviderError"""
+        return await call_with_retries(
+            lambda: self._complete(messages, temperature, max_tokens), label=repr(self)
+        )
+    
+    @abstractmethod
+    def _stream(self, messages: list, temperature: float, max_tokens: Optional[int]) -> AsyncGenerator[str, None]:
+        """One streaming attempt against the provider API (errors propagate)"""
+        pass
+    
+    @abstractmethod
+    async def _complete(self, messages: list, temperature: float, max_tokens: Optional[int]) -> str:
+        """One non-streaming attempt against the provider API (errors propagate)"""
         pass
 
     
-    def prepare_messages(self, context: list, current_input: str) -> list:
+    def prepare_messages(self, context: list, current_input: Optional[str] = None) -> list:
         """Prepare messages with personality prefix"""
-        # Add system message with personality
+        # Add system message with personality (first, so every call shares it)
         system_message = {
             "role": "system",
             "content": f"{self.personality.prompt_prefix}\n\n"
@@ -51,13 +94,48 @@ class AIProvider(ABC):
                       f"Be concise but insightful."
         }
         
-        # Combine context and current input
-        messages = [system_message] + context + [
-            {"role": "user", "content": current_input}
-        ]
+        # Combine context and current input (unless the context already ends with it)
+        messages = [system_message] + self.strip_metadata(context)
+        if current_input is not None and not (
+            context and context[-1]["role"] == "user" and context[-1]["content"] == current_input
+        ):
+            messages.append({"role": "user", "content": current_input})
         
         return messages
     
+    def context_budget(self) -> ContextBudget:
+        """Token budget for one turn of this model (config/models.yaml)"""
+        return model_capabilities.budget(self.model_name, self.prepare_messages([])[0]["content"])
+    
+    def cache_payload(self, context: list) -> Any:
+        """The provider-ready request for `context` (what a response cache keys on)"""
+        return self.prepare_messages(context)
+    
+    @staticmethod
+    def strip_metadata(context: list) -> List[Dict[str, str]]:
+        """Only role and content; anything else would differ between calls"""
+        return [{"role": msg["role"], "content": msg["content"]} for msg in context]
+    
+    def _record_usage(
+        self,
+        input_tokens: Optional[int],
+        output_tokens: Optional[int],
+        cached_input_tokens: Optional[int] = 0,
+        cache_write_tokens: Optional[int] = 0
+    ):
+        """
+        Keep the API-reported usage of the latest call; input_tokens is the
+        whole prompt, cached_input_tokens the part served from the prompt cache
+        """
+        self.last_usage = {
+            "input_tokens": input_tokens or 0,
+            "output_tokens": output_tokens or 0,
+            "cached_input_tokens": cached_input_tokens or 0,
+            "cache_write_tokens": cache_write_tokens or 0
+        }
+        if cached_input_tokens:
+            logger.debug(f"{self.model_name}: {cached_input_tokens}/{input_tokens} prompt tokens from cache")
+    
     def set_state(self, state: CollaborationState):
         """Update the provider's collaboration state"""
         self.state = state
@@ -0,0 +1,218 @@
+"""
+Provider Cassettes
+Recorded provider streams, replayed deterministically with their timing
+Updated: 2026-10-19 - Initial recorder, replay provider and JSON-lines cassettes
+
+A cassette holds one session: one JSON line per provider call,
+
+    {"panelist": "...", "call": 0, "provider": "openai", "model": "gpt-4o",
+     "role": "...", "input": "<latest user message>", "usage": {...},
+     "chunks": [[ms since the previous chunk, "text"], ...]}
+
+The first chunk's delay is the time to first token. Files ending in .gz are
+gzip-compressed. Calls with the same index across panelists make up a turn.
+
+RecordingProvider wraps any provider and appends an entry when a stream
+finishes without error (a failed stream would replay as a short answer).
+With PROVIDER_CASSETTE_DIR set, every session's panelists are recorded to
+<dir>/<session id>.jsonl.
+
+ReplayProvider plays a panelist's entries back in order through the normal
+AIProvider path (retry wrapper included): at the recorded pace (speed 1),
+N times faster (speed N) or with no delays at all (speed 0).
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional, Union
+from providers.base_provider import AIProvider
+from providers.model_capabilities import model_capabilities
+from models.schemas import ModelPersonality
+
+CASSETTE_DIR = os.getenv("PROVIDER_CASSETTE_DIR") or None
+
+
+class Cassette:
+    """Entries of one recorded session, appended to its file as they finish"""
+
+    def __init__(self, path: Union[str, Path], entries: Optional[List[Dict[str, Any]]] = None):
+        self.path = Path(path)
+        self.entries: List[Dict[str, Any]] = entries or []
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "Cassette":
+        path = Path(path)
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        return cls(path, entries)
+
+    @classmethod
+    def load_corpus(cls, paths: List[Union[str, Path]]) -> List["Cassette"]:
+        """Cassettes from files and directories of .jsonl / .jsonl.gz files"""
+        cassettes = []
+        for path in map(Path, paths):
+            files = sorted([*path.glob("*.jsonl"), *path.glob("*.jsonl.gz")]) if path.is_dir() else [path]
+            cassettes.extend(cls.load(file) for file in files)
+        return cassettes
+
+    def append(self, entry: Dict[str, Any]):
+        self.entries.append(entry)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        opener = gzip.open if self.path.suffix == ".gz" else open
+        # One write per line; gzip appends a new member, which readers concatenate
+        with opener(self.path, "at", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def save(self):
+        """Write all entries (replacing the file)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        opener = gzip.open if self.path.suffix == ".gz" else open
+        with opener(self.path, "wt", encoding="utf-8") as f:
+            for entry in self.entries:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def panelists(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Entries per panelist, in call order"""
+        by_panelist = defaultdict(list)
+        for entry in sorted(self.entries, key=lambda e: e["call"]):
+            by_panelist[entry["panelist"]].append(entry)
+        return dict(by_panelist)
+
+    def turns(self) -> List[Dict[str, Dict[str, Any]]]:
+        """Entries grouped by call index: {panelist: entry} per turn"""
+        turns = defaultdict(dict)
+        for entry in self.entries:
+            turns[entry["call"]][entry["panelist"]] = entry
+        return [turns[call] for call in sorted(turns)]
+
+
+class RecordingProvider(AIProvider):
+    """Passes calls through to `provider`, recording each finished stream"""
+
+    def __init__(self, provider: AIProvider, cassette: Cassette, panelist: str):
+        super().__init__(provider.api_key, provider.model_name, provider.personality, provider.base_url)
+        self.provider = provider
+        self.cassette = cassette
+        self.panelist = panelist
+        # A reloaded session continues its cassette where it left off
+        self.calls = sum(1 for entry in cassette.entries if entry["panelist"] == panelist)
+
+    async def generate_stream(
+        self,
+        messages: list,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> AsyncGenerator[str, None]:
+        call = self.calls
+        self.calls += 1
+        chunks = []
+        last = time.monotonic()
+        async for chunk in self.provider.generate_stream(messages, temperature, max_tokens):
+            now = time.monotonic()
+            chunks.append([round((now - last) * 1000, 2), chunk])
+            last = now
+            yield chunk
+
+        self.last_usage = self.provider.last_usage
+        user_messages = [msg["content"] for msg in messages if msg["role"] == "user"]
+        self.cassette.append({
+            "panelist": self.panelist,
+            "call": call,
+            "provider": self.personality.provider,
+            "model": self.model_name,
+            "role": self.personality.role,
+            "input": user_messages[-1] if user_messages else "",
+            "usage": self.last_usage,
+            "chunks": chunks
+        })
+
+    def _stream(self, messages: list, temperature: float, max_tokens: Optional[int]) -> AsyncGenerator[str, None]:
+        return self.provider._stream(messages, temperature, max_tokens)
+
+    async def _complete(self, messages: list, temperature: float, max_tokens: Optional[int]) -> str:
+        response = await self.provider._complete(messages, temperature, max_tokens)
+        self.last_usage = self.provider.last_usage
+        return response
+
+    def cache_payload(self, context: list) -> Any:
+        return self.provider.cache_payload(context)
+
+    def get_token_count(self, text: str) -> int:
+        return self.provider.get_token_count(text)
+
+
+class ReplayProvider(AIProvider):
+    """Plays recorded streams back in order, cycling when they run out"""
+
+    def __init__(self, entries: List[Dict[str, Any]], speed: float = 1.0):
+        first = entries[0]
+        personality = ModelPersonality(
+            provider=first["provider"],
+            model_name=first["model"],
+            role=first.get("role") or first["panelist"],
+            icon="▶",
+            prompt_prefix=f"Replay of {first['panelist']}",
+            collaboration_style="recorded",
+            color_theme="gray"
+        )
+        super().__init__("replay", first["model"], personality)
+        self.entries = entries
+        self.speed = speed
+        self.calls = 0
+
+    @classmethod
+    def for_cassette(cls, cassette: Cassette, speed: float = 1.0) -> Dict[str, "ReplayProvider"]:
+        """One replay provider per recorded panelist"""
+        return {panelist: cls(entries, speed) for panelist, entries in cassette.panelists().items()}
+
+    def _next_entry(self) -> Dict[str, Any]:
+        entry = self.entries[self.calls % len(self.entries)]
+        self.calls += 1
+        return entry
+
+    def _finish(self, entry: Dict[str, Any]):
+        usage = entry.get("usage")
+        if usage:
+            self._record_usage(**usage)
+
+    async def _stream(self, messages: list, temperature: float, max_tokens: Optional[int]) -> AsyncGenerator[str, None]:
+        self.last_usage = None
+        entry = self._next_entry()
+        started = time.monotonic()
+        offset = 0.0
+        for delay_ms, text in entry["chunks"]:
+            offset += delay_ms / 1000
+            if self.speed > 0:
+                # Against the recording's schedule, so sleep overshoot doesn't accumulate
+                delay = offset / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)
+            yield text
+        self._finish(entry)
+
+    async def _complete(self, messages: list, temperature: float, max_tokens: Optional[int]) -> str:
+        self.last_usage = None
+        entry = self._next_entry()
+        if self.speed > 0:
+            await asyncio.sleep(sum(delay_ms for delay_ms, _ in entry["chunks"]) / 1000 / self.speed)
+        self._finish(entry)
+        return "".join(text for _, text in entry["chunks"])
+
+    def get_token_count(self, text: str) -> int:
+        return model_capabilities.count_tokens(text, self.model_name)
+
+
+def recording_cassette(session_id: str) -> Optional[Cassette]:
+    """The cassette a session records to, if PROVIDER_CASSETTE_DIR is set"""
+    if not CASSETTE_DIR:
+        return None
+    path = Path(CASSETTE_DIR) / f"{session_id}.jsonl"
+    return Cassette.load(path) if path.exists() else Cassette(path)
@@ -0,0 +1,227 @@
+"""
+Provider Client Pool
+Process-wide SDK clients shared by every provider instance
+Updated: 2026-10-19 - Initial pool keyed by (provider, api key, base URL)
+Updated: 2026-10-19 - SDK retries disabled in favour of the resilience layer
+Updated: 2026-10-19 - Google API endpoint override
+Updated: 2026-10-19 - One Gemini endpoint per process (GOOGLE_API_ENDPOINT)
+
+Panelists are created per session, so building an AsyncOpenAI/AsyncAnthropic
+client in each provider gave every panelist its own connection pool and TLS
+handshakes. Providers now borrow a client from this pool instead; clients for
+the same (provider, api key, base URL) share one tuned httpx connection pool,
+negotiating HTTP/2 when the `h2` package is installed.
+
+Connection reuse is measured with httpcore's trace extension: every request
+is counted, and so is every TCP connect, so reused = requests - connections.
+
+The HTTP client is built with whichever httpx package the SDK itself uses
+(recent openai/anthropic releases moved to `httpx2`, an API-compatible fork
+that rejects or mishandles plain httpx clients).
+
+SDK-level retries are off (max_retries=0): providers/resilience.py retries
+instead, and only where it is safe for a stream.
+
+The Google SDK has no client object; `genai.configure` sets process-global
+state, so it is only called again when the key changes. For the same reason
+there is one Gemini endpoint per process: GOOGLE_API_ENDPOINT. A persona
+`base_url` for a google model is rejected unless it names that endpoint, so
+no session can redirect another's Gemini traffic. The override switches the
+SDK to its REST transport (plain HTTP(S) to that host instead of gRPC to
+Google), whose "async" calls block on `requests`; GoogleProvider runs them in
+worker threads (see `google_rest`).
+"""
+
+import os
+import asyncio
+import importlib
+import threading
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Any, Dict, Optional, Tuple
+from loguru import logger
+
+try:
+    import h2  # noqa: F401 - httpx only needs it importable
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# (provider, api key, base URL)
+PoolKey = Tuple[str, str, Optional[str]]
+
+
+def http_library(sdk: ModuleType) -> ModuleType:
+    """The httpx(-compatible) package an SDK module is built on"""
+    default_client = getattr(sdk, "DefaultAsyncHttpxClient", None)
+    if default_client is not None:
+        for cls in default_client.__mro__:
+            if cls.__name__ == "AsyncClient":
+                return importlib.import_module(cls.__module__.split(".")[0])
+    return importlib.import_module("httpx")
+
+
+@dataclass
+class ConnectionStats:
+    """Counters for one pooled HTTP client"""
+    requests: int = 0
+    connections: int = 0
+    tls_handshakes: int = 0
+    http2_responses: int = 0
+
+    @property
+    def reused(self) -> int:
+        return max(0, self.requests - self.connections)
+
+
+class ClientPool:
+    """Borrowed, never-closed-by-the-borrower provider clients"""
+
+    def __init__(self):
+        self.max_connections = int(os.getenv("PROVIDER_MAX_CONNECTIONS", "100"))
+        self.max_keepalive = int(os.getenv("PROVIDER_MAX_KEEPALIVE", "20"))
+        self.keepalive_expiry = float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY", "60"))
+        self.http2 = HTTP2_AVAILABLE and os.getenv("PROVIDER_HTTP2", "true").lower() == "true"
+
+        self._http: Dict[PoolKey, Any] = {}
+        self._clients: Dict[PoolKey, Any] = {}
+        self._stats: Dict[PoolKey, ConnectionStats] = {}
+        # Providers are constructed from sync code, possibly in worker threads
+        self._lock = threading.Lock()
+        self._google_config: Optional[Tuple[str, Optional[str]]] = None
+
+    def _http_client(self, key: PoolKey, httpx: ModuleType):
+        stats = self._stats.setdefault(key, ConnectionStats())
+
+        async def trace(event: str, info: Dict[str, Any]):
+            if event == "connection.connect_tcp.complete":
+                stats.connections += 1
+            elif event == "connection.start_tls.complete":
+                stats.tls_handshakes += 1
+
+        async def on_request(request):
+            stats.requests += 1
+            request.extensions["trace"] = trace
+
+        async def on_response(response):
+            if response.http_version == "HTTP/2":
+                stats.http2_responses += 1
+
+        return httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            # Same as the SDK defaults
+            timeout=httpx.Timeout(600.0, connect=5.0),
+            follow_redirects=True,
+            event_hooks={"request": [on_request], "response": [on_response]}
+        )
+
+    def _borrow(self, key: PoolKey, sdk: ModuleType, factory) -> Any:
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            if key not in self._clients:
+                self._http[key] = self._http_client(key, http_library(sdk))
+                self._clients[key] = factory(self._http[key])
+                logger.info(f"Pooled {key[0]} client created for {key[2] or 'default endpoint'} "
+                            f"(http2={self.http2})")
+            return self._clients[key]
+
+    def openai(self, api_key: str, base_url: Optional[str] = None):
+        """Shared AsyncOpenAI client"""
+        import openai
+        return self._borrow(
+            ("openai", api_key, base_url), openai,
+            lambda http: openai.AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http, max_retries=0)
+        )
+
+    def anthropic(self, api_key: str, base_url: Optional[str] = None):
+        """Shared AsyncAnthropic client"""
+        import anthropic
+        return self._borrow(
+            ("anthropic", api_key, base_url), anthropic,
+            lambda http: anthropic.AsyncAnthropic(
+                api_key=api_key, base_url=base_url, http_client=http, max_retries=0
+            )
+        )
+
+    @staticmethod
+    def google_endpoint() -> Optional[str]:
+        """The process-wide Gemini endpoint override, if any"""
+        return os.getenv("GOOGLE_API_ENDPOINT") or None
+
+    @property
+    def google_rest(self) -> bool:
+        """Whether the Gemini SDK is on its (blocking) REST transport"""
+        return bool(self._google_config and self._google_config[1])
+
+    def configure_google(self, api_key: str, api_endpoint: Optional[str] = None):
+        """
+        Configure the Gemini SDK for `api_key` unless it already is
+        Raises ValueError if `api_endpoint` is not the process-wide endpoint
+        """
+        if api_endpoint != self.google_endpoint():
+            raise ValueError(
+                f"Gemini endpoint {api_endpoint or 'default'} is not the process-wide "
+                f"GOOGLE_API_ENDPOINT ({self.google_endpoint() or 'default'}); "
+                f"google personas cannot set their own base_url"
+            )
+        config = (api_key, api_endpoint)
+        if self._google_config == config:
+            return
+        import google.generativeai as genai
+        with self._lock:
+            if self._google_config != config:
+                if self._google_config is not None:
+                    logger.warning("Gemini SDK reconfigured; its API key is process-wide")
+                if api_endpoint:
+                    genai.configure(api_key=api_key, transport="rest",
+                                    client_options={"api_endpoint": api_endpoint})
+                else:
+                    genai.configure(api_key=api_key)
+                self._google_config = config
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection reuse per (provider, base URL); API keys are not reported"""
+        clients = []
+        totals = ConnectionStats()
+        for (provider, _, base_url), stats in list(self._stats.items()):
+            clients.append({
+                "provider": provider,
+                "base_url": base_url,
+                "requests": stats.requests,
+                "new_connections": stats.connections,
+                "reused_connections": stats.reused,
+                "tls_handshakes": stats.tls_handshakes,
+                "http2_responses": stats.http2_responses
+            })
+            totals.requests += stats.requests
+            totals.connections += stats.connections
+            totals.tls_handshakes += stats.tls_handshakes
+        return {
+            "http2": self.http2,
+            "clients": len(self._clients),
+            "requests": totals.requests,
+            "new_connections": totals.connections,
+            "reused_connections": totals.reused,
+            "reuse_ratio": round(totals.reused / totals.requests, 3) if totals.requests else None,
+            "tls_handshakes": totals.tls_handshakes,
+            "per_client": clients
+        }
+
+    async def close(self):
+        """Close every pooled connection (on shutdown, from the loop that used them)"""
+        with self._lock:
+            http_clients = list(self._http.values())
+            self._http.clear()
+            self._clients.clear()
+        await asyncio.gather(*[client.aclose() for client in http_clients], return_exceptions=True)
+
+
+# Singleton instance
+client_pool = ClientPool()
@@ -1,11 +1,17 @@
 """
 Google Provider Implementation
 Handles Gemini 1.5 Pro and other Google models
+Updated: 2026-10-19 - SDK configured once per key through the client pool
+Updated: 2026-10-19 - Cached-token usage (Gemini caches repeated prefixes implicitly)
+Updated: 2026-10-19 - Single attempts in _stream/_complete; retries and errors in AIProvider
+Updated: 2026-10-19 - Configurable API base URL (persona or environment)
+Updated: 2026-10-19 - REST transport calls run in worker threads
 """
 
 from typing import AsyncGenerator, Optional
 import google.generativeai as genai
 from providers.base_provider import AIProvider
+from providers.client_pool import client_pool
 from models.schemas import ModelPersonality
 from loguru import logger
 import asyncio
@@ -14,66 +20,98 @@ import asyncio
 class GoogleProvider(AIProvider):
     """Google API provider for Gemini models"""
     
-    def __init__(self, api_key: str, model_name: str, personality: ModelPersonality):
-        super().__init__(api_key, model_name, personality)
-        genai.configure(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str,
+        personality: ModelPersonality,
+        base_url: Optional[str] = None
+    ):
+        super().__init__(api_key, model_name, personality, base_url)
+        client_pool.configure_google(api_key, base_url)
         self.model = genai.GenerativeModel(model_name)
         
-    async def generate_stream(
-        self,
-        messages: list,
-        temperature: float = 0.7,
-        max_tokens: Optional[int] = None
-    ) -> AsyncGenerator[str, None]:
+    async def _stream(self, messages: list, temperature: float, max_tokens: Optional[int]) -> AsyncGenerator[str, None]:
         """Stream response from Google Gemini"""
-        try:
-            # Convert messages to Gemini format
-            chat_history = self._convert_to_gemini_format(messages)
-            
-            # Create chat session
-            chat = self.model.start_chat(history=chat_history[:-1])
-            
-            # Stream the response
-            response = await chat.send_message_async(
+        self.last_usage = None
+        # Convert messages to Gemini format
+        chat_history = self._convert_to_gemini_format(messages)
+        
+        # Create chat session
+        chat = self.model.start_chat(history=chat_history[:-1])
+        
+        generation_config = genai.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens
+        )
+        
+        # Stream the response
+        if client_pool.google_rest:
+            response = await asyncio.to_thread(
+                chat.send_message, chat_history[-1]["parts"][0],
+                generation_config=generation_config, stream=True
+            )
+            chunks = self._iterate_in_thread(response)
+        else:
+            chunks = await chat.send_message_async(
                 chat_history[-1]["parts"][0],
-                generation_config=genai.GenerationConfig(
-                    temperature=temperature,
-                    max_output_tokens=max_tokens
-                ),
+                generation_config=generation_config,
                 stream=True
-            )            
-            async for chunk in response:
-                if chunk.text:
-                    yield chunk.text
-                    
-        except Exception as e:
-            logger.error(f"Google Gemini streaming error: {e}")
-            yield f"[Error: {str(e)}]"
+            )
+        usage = None
+        async for chunk in chunks:
+            # Each chunk reports the usage so far
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            if chunk.text:
+                yield chunk.text
+        if usage:
+            self._record_gemini_usage(usage)
     
-    async def generate_complete(
-        self,
-        messages: list,
-        temperature: float = 0.7,
-        max_tokens: Optional[int] = None
-    ) -> str:
+    async def _complete(self, messages: list, temperature: float, max_tokens: Optional[int]) -> str:
         """Get complete response from Google Gemini"""
-        try:
-            chat_history = self._convert_to_gemini_format(messages)
-            chat = self.model.start_chat(history=chat_history[:-1])
-            
+        self.last_usage = None
+        chat_history = self._convert_to_gemini_format(messages)
+        chat = self.model.start_chat(history=chat_history[:-1])
+        
+        generation_config = genai.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens
+        )
+        if client_pool.google_rest:
+            # The REST transport's async methods block on requests
+            response = await asyncio.to_thread(
+                chat.send_message, chat_history[-1]["parts"][0], generation_config=generation_config
+            )
+        else:
             response = await chat.send_message_async(
-                chat_history[-1]["parts"][0],
-                generation_config=genai.GenerationConfig(
-                    temperature=temperature,
-                    max_output_tokens=max_tokens
-                )
+                chat_history[-1]["parts"][0], generation_config=generation_config
             )
-            
-            return response.text
-            
-        except Exception as e:
-            logger.error(f"Google Gemini completion error: {e}")
-            return f"[Error: {str(e)}]"    
+        
+        if getattr(response, "usage_metadata", None):
+            self._record_gemini_usage(response.usage_metadata)
+        return response.text
+    
+    @staticmethod
+    async def _iterate_in_thread(response) -> AsyncGenerator:
+        """Chunks of a blocking (REST) stream, each read in a worker thread"""
+        chunks = iter(response)
+        done = object()
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, done)
+            if chunk is done:
+                return
+            yield chunk
+    
+    def _record_gemini_usage(self, usage):
+        self._record_usage(
+            input_tokens=usage.prompt_token_count,
+            output_tokens=usage.candidates_token_count,
+            cached_input_tokens=getattr(usage, "cached_content_token_count", 0)
+        )
+    
+    def cache_payload(self, context: list) -> list:
+        return self._convert_to_gemini_format(context)
+    
     def _convert_to_gemini_format(self, messages: list) -> list:
         """Convert messages to Gemini's expected format"""
         gemini_messages = []
@@ -0,0 +1,198 @@
+"""
+Model Capabilities
+Context window, output limit, tokenizer and streaming traits per model
+Updated: 2026-10-19 - Initial registry backed by config/models.yaml
+
+Panelist context budgets used to be guessed from the model name (8000 tokens
+for anything called gpt-4, 4000 otherwise) with a flat 200-token response
+reserve: 128k-200k+ windows were barely used and gpt-4's 8k could overflow
+once the system prompt and a real answer were added. Budgets are now
+computed from the model's declared capabilities:
+
+    response_tokens = min(max_output_tokens, PANEL_RESPONSE_TOKENS)
+    context_tokens  = min(window * (1 - CONTEXT_SAFETY_MARGIN)
+                          - response_tokens - system prompt tokens,
+                          context_budget or CONTEXT_TOKEN_CAP)
+
+The cap keeps a 1M-token window from meaning a 1M-token prompt every turn.
+
+Token counts use the model's tokenizer family: a tiktoken encoding (loaded
+once per process) or characters-per-token for providers without a public
+tokenizer. An encoding that cannot be loaded (e.g. offline) falls back to
+the approximation.
+
+models.yaml is reloaded when its mtime or size changes, like personas.yaml.
+"""
+
+import math
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import yaml
+from loguru import logger
+
+MODELS_CONFIG = Path(__file__).parent.parent / "config" / "models.yaml"
+
+APPROXIMATE = "approximate"
+
+
+@dataclass(frozen=True)
+class StreamingTraits:
+    """Typical streaming behaviour of a model (benchmark pacing only; no timeout reads it)"""
+    usage_in_stream: bool = True
+    time_to_first_token_ms: int = 1000
+    tokens_per_second: float = 40.0
+
+
+@dataclass(frozen=True)
+class ModelCapabilities:
+    """What one model accepts and produces"""
+    name: str
+    context_window: int = 8192
+    max_output_tokens: int = 4096
+    tokenizer: str = "cl100k_base"
+    chars_per_token: float = 4.0
+    context_budget: Optional[int] = None
+    streaming: StreamingTraits = field(default_factory=StreamingTraits)
+
+
+@dataclass(frozen=True)
+class ContextBudget:
+    """Token budget for one panelist's turn"""
+    model_name: str
+    context_window: int
+    response_tokens: int
+    system_tokens: int
+    context_tokens: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "context_window": self.context_window,
+            "response_tokens": self.response_tokens,
+            "system_tokens": self.system_tokens,
+            "context_tokens": self.context_tokens
+        }
+
+
+class ModelCapabilityRegistry:
+    """Resolves model names to capabilities from models.yaml"""
+
+    def __init__(self, path: Path = MODELS_CONFIG):
+        self.path = path
+        self.response_tokens = int(os.getenv("PANEL_RESPONSE_TOKENS", "2048"))
+        self.context_cap = int(os.getenv("CONTEXT_TOKEN_CAP", "32000"))
+        self.safety_margin = float(os.getenv("CONTEXT_SAFETY_MARGIN", "0.05"))
+
+        self._defaults = ModelCapabilities(name="default")
+        self._models: Dict[str, ModelCapabilities] = {}
+        self._resolved: Dict[str, ModelCapabilities] = {}
+        self._signature: Optional[Tuple[int, int]] = None
+        self._encodings: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    # Loading
+    def _refresh(self):
+        try:
+            stat = self.path.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    self._reload(signature)
+
+    def _reload(self, signature: Optional[Tuple[int, int]]):
+        self._signature = signature
+        if signature is None:
+            logger.warning(f"Model capabilities not found at {self.path}; using defaults")
+            self._models, self._resolved = {}, {}
+            return
+
+        try:
+            config = yaml.safe_load(self.path.read_text()) or {}
+            defaults = self._parse("default", config.get("defaults") or {}, ModelCapabilities(name="default"))
+            models = {
+                name: self._parse(name, data or {}, defaults)
+                for name, data in (config.get("models") or {}).items()
+            }
+        except Exception as e:
+            logger.error(f"Error loading model capabilities, keeping the previous ones: {e}")
+            return
+
+        self._defaults, self._models, self._resolved = defaults, models, {}
+        logger.info(f"Loaded capabilities for {len(models)} models")
+
+    @staticmethod
+    def _parse(name: str, data: Dict[str, Any], base: ModelCapabilities) -> ModelCapabilities:
+        streaming = {**base.streaming.__dict__, **(data.get("streaming") or {})}
+        return ModelCapabilities(
+            name=name,
+            context_window=int(data.get("context_window", base.context_window)),
+            max_output_tokens=int(data.get("max_output_tokens", base.max_output_tokens)),
+            tokenizer=str(data.get("tokenizer", base.tokenizer)),
+            chars_per_token=float(data.get("chars_per_token", base.chars_per_token)),
+            context_budget=data.get("context_budget", base.context_budget),
+            streaming=StreamingTraits(**streaming)
+        )
+
+    # Lookups
+    def get(self, model_name: str) -> ModelCapabilities:
+        """Capabilities by exact name, else longest matching prefix, else defaults"""
+        self._refresh()
+        capabilities = self._resolved.get(model_name)
+        if capabilities is None:
+            capabilities = self._models.get(model_name)
+            if capabilities is None:
+                prefixes = [name for name in self._models if model_name.startswith(name)]
+                if prefixes:
+                    capabilities = self._models[max(prefixes, key=len)]
+                else:
+                    logger.warning(f"No capabilities configured for {model_name}; using defaults")
+                    capabilities = self._defaults
+            self._resolved[model_name] = capabilities
+        return capabilities
+
+    def count_tokens(self, text: str, model_name: str) -> int:
+        """Token count of `text` with the model's tokenizer family"""
+        capabilities = self.get(model_name)
+        encoding = self._encoding(capabilities.tokenizer)
+        if encoding is None:
+            return math.ceil(len(text) / capabilities.chars_per_token)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def _encoding(self, tokenizer: str):
+        if tokenizer == APPROXIMATE:
+            return None
+        if tokenizer not in self._encodings:
+            try:
+                import tiktoken
+                self._encodings[tokenizer] = tiktoken.get_encoding(tokenizer)
+            except Exception as e:
+                logger.warning(f"Tokenizer {tokenizer} unavailable, approximating token counts: {e}")
+                self._encodings[tokenizer] = None
+        return self._encodings[tokenizer]
+
+    def budget(self, model_name: str, system_prompt: str = "") -> ContextBudget:
+        """Per-turn budget for a panelist running `model_name` with `system_prompt`"""
+        capabilities = self.get(model_name)
+        window = capabilities.context_window
+        response_tokens = min(capabilities.max_output_tokens, self.response_tokens)
+        system_tokens = self.count_tokens(system_prompt, model_name) if system_prompt else 0
+
+        usable = int(window * (1 - self.safety_margin)) - response_tokens - system_tokens
+        cap = capabilities.context_budget or self.context_cap
+        return ContextBudget(
+            model_name=model_name,
+            context_window=window,
+            response_tokens=response_tokens,
+            system_tokens=system_tokens,
+            context_tokens=max(0, min(usable, cap))
+        )
+
+
+# Singleton instance
+model_capabilities = ModelCapabilityRegistry()
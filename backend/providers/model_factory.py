@@ -2,6 +2,8 @@
 Model Factory
 Creates appropriate AI provider instances based on model selection
 Now loads personas from configuration file for flexibility
+Updated: 2026-10-19 - Personas served from the cached persona registry
+Updated: 2026-10-19 - API base URL from the persona or OPENAI_BASE_URL/ANTHROPIC_BASE_URL/GOOGLE_API_ENDPOINT
 """
 
 from typing import Dict, Optional
@@ -9,10 +11,9 @@ from providers.base_provider import AIProvider
 from providers.openai_provider import OpenAIProvider
 from providers.anthropic_provider import AnthropicProvider
 from providers.google_provider import GoogleProvider
+from providers.persona_registry import persona_registry
 from models.schemas import ModelPersonality
 import os
-import yaml
-from pathlib import Path
 from loguru import logger
 
 
@@ -26,45 +27,11 @@ class ModelFactory:
         "google": GoogleProvider
     }
     
-    # Cache for loaded personas
-    _personas_cache: Optional[Dict[str, ModelPersonality]] = None
-    
     @classmethod
     def load_personas(cls) -> Dict[str, ModelPersonality]:
-        """Load personas from configuration file"""
-        # Always reload in development to catch changes
-        # if cls._personas_cache is not None:
-        #     return cls._personas_cache
-        
-        # Find personas.yaml
-        config_path = Path(__file__).parent.parent / "config" / "personas.yaml"
-        
-        if not config_path.exists():
-            logger.error(f"Personas config not found at {config_path}")
-            return {}
-        
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-                
-            personas = {}
-            for model_id, persona_data in config.get('personas', {}).items():
-                try:
-                    personas[model_id] = ModelPersonality(**persona_data)
-                    logger.info(f"Successfully loaded persona: {model_id}")
-                except Exception as e:
-                    logger.error(f"Error creating ModelPersonality for {model_id}: {e}")
-                    logger.error(f"Persona data: {persona_data}")
-                    # Skip this persona if it fails to load
-                    continue
-            
-            cls._personas_cache = personas
-            logger.info(f"Loaded {len(personas)} personas from configuration")
-            return personas
-            
-        except Exception as e:
-            logger.error(f"Error loading personas: {e}")
-            return {}    
+        """Personas from the configuration file (cached until the file changes)"""
+        return persona_registry.personas()
+    
     @classmethod
     def create_model(cls, model_identifier: str, custom_persona: Optional[dict] = None) -> Optional[AIProvider]:
         """
@@ -90,6 +57,11 @@ class ModelFactory:
                 return None
             personality = personas[model_identifier]
         
+        # Custom personas come from API clients: they must not redirect our API keys
+        if custom_persona and personality.base_url:
+            logger.warning(f"Ignoring base_url on custom persona for {model_identifier}")
+            personality = personality.model_copy(update={"base_url": None})
+        
         provider_name = personality.provider
         
         # Get API key
@@ -109,7 +81,8 @@ class ModelFactory:
             provider = provider_class(
                 api_key=api_key,
                 model_name=personality.model_name,
-                personality=personality
+                personality=personality,
+                base_url=cls._get_base_url(provider_name, personality)
             )
             logger.info(f"Successfully created provider for {model_identifier}")
             return provider
@@ -119,16 +92,7 @@ class ModelFactory:
     @classmethod
     def get_available_models(cls) -> Dict[str, ModelPersonality]:
         """Get all available models with their configurations"""
-        personas = cls.load_personas()
-        available = {}
-        
-        for model_id, personality in personas.items():
-            # Check if API key exists for this provider
-            api_key = cls._get_api_key(personality.provider)
-            if api_key:
-                available[model_id] = personality
-        
-        return available
+        return persona_registry.available(lambda provider: bool(cls._get_api_key(provider)))
     
     @classmethod
     def _get_api_key(cls, provider_name: str) -> Optional[str]:
@@ -143,4 +107,22 @@ class ModelFactory:
         if not env_var:
             return None
             
-        return os.getenv(env_var)
\ No newline at end of file
+        return os.getenv(env_var)
+    
+    @classmethod
+    def _get_base_url(cls, provider_name: str, personality: ModelPersonality) -> Optional[str]:
+        """API endpoint for a persona: its own base_url, else the provider's environment variable"""
+        if personality.base_url:
+            return personality.base_url
+        
+        url_mapping = {
+            "openai": "OPENAI_BASE_URL",
+            "anthropic": "ANTHROPIC_BASE_URL",
+            "google": "GOOGLE_API_ENDPOINT"
+        }
+        
+        env_var = url_mapping.get(provider_name)
+        if not env_var:
+            return None
+            
+        return os.getenv(env_var) or None
\ No newline at end of file
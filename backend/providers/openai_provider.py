@@ -1,75 +1,95 @@
 """
 OpenAI Provider Implementation
 Handles GPT-4, GPT-4o, and o1 models
+Updated: 2026-10-19 - Borrows its client from the shared client pool
+Updated: 2026-10-19 - Prompt cache routing key and cached-token usage
+Updated: 2026-10-19 - Single attempts in _stream/_complete; retries and errors in AIProvider
+Updated: 2026-10-19 - Configurable API base URL (persona or environment)
+
+OpenAI caches prompt prefixes automatically (1024+ tokens); prepare_messages
+keeps the prefix stable and prompt_cache_key routes a persona's calls to the
+same cache.
 """
 
+import hashlib
+
 from typing import AsyncGenerator, Optional
 import openai
-from openai import AsyncOpenAI
 from providers.base_provider import AIProvider
+from providers.client_pool import client_pool
+from providers.model_capabilities import model_capabilities
 from models.schemas import ModelPersonality
 from loguru import logger
-import tiktoken
 
 
 class OpenAIProvider(AIProvider):
     """OpenAI API provider for GPT models"""
     
-    def __init__(self, api_key: str, model_name: str, personality: ModelPersonality):
-        super().__init__(api_key, model_name, personality)
-        self.client = AsyncOpenAI(api_key=api_key)
-        self.encoding = tiktoken.encoding_for_model(model_name)
-        
-    async def generate_stream(
+    def __init__(
         self,
-        messages: list,
-        temperature: float = 0.7,
-        max_tokens: Optional[int] = None
-    ) -> AsyncGenerator[str, None]:
+        api_key: str,
+        model_name: str,
+        personality: ModelPersonality,
+        base_url: Optional[str] = None
+    ):
+        super().__init__(api_key, model_name, personality, base_url)
+        self.client = client_pool.openai(api_key, base_url)
+        
+    async def _stream(self, messages: list, temperature: float, max_tokens: Optional[int]) -> AsyncGenerator[str, None]:
         """Stream response from OpenAI"""
-        try:
-            prepared_messages = self.prepare_messages(messages, messages[-1]["content"])
-            
-            stream = await self.client.chat.completions.create(
-                model=self.model_name,
-                messages=prepared_messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                stream=True
-            )
-            
-            async for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
-                    
-        except Exception as e:
-            logger.error(f"OpenAI streaming error: {e}")
-            yield f"[Error: {str(e)}]"
+        self.last_usage = None
+        prepared_messages = self.prepare_messages(messages)
+        
+        stream = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=prepared_messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+            **self._cache_options(prepared_messages)
+        )
+        
+        async for chunk in stream:
+            # The final chunk carries usage and no choices
+            if chunk.usage:
+                self._record_openai_usage(chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
     
-    async def generate_complete(
-        self,
-        messages: list,
-        temperature: float = 0.7,
-        max_tokens: Optional[int] = None
-    ) -> str:
+    async def _complete(self, messages: list, temperature: float, max_tokens: Optional[int]) -> str:
         """Get complete response from OpenAI"""
-        try:
-            prepared_messages = self.prepare_messages(messages, messages[-1]["content"])
-            
-            response = await self.client.chat.completions.create(
-                model=self.model_name,
-                messages=prepared_messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                stream=False
-            )
-            
-            return response.choices[0].message.content
-            
-        except Exception as e:
-            logger.error(f"OpenAI completion error: {e}")
-            return f"[Error: {str(e)}]"
+        self.last_usage = None
+        prepared_messages = self.prepare_messages(messages)
+        
+        response = await self.client.chat.completions.create(
+            model=self.model_name,
+            messages=prepared_messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=False,
+            **self._cache_options(prepared_messages)
+        )
+        
+        if response.usage:
+            self._record_openai_usage(response.usage)
+        return response.choices[0].message.content
+    
+    def _cache_options(self, prepared_messages: list) -> dict:
+        """prompt_cache_key shared by every call with this persona's system prompt"""
+        if not self.prompt_caching:
+            return {}
+        prefix = f"{self.model_name}\n{prepared_messages[0]['content']}"
+        return {"extra_body": {"prompt_cache_key": hashlib.sha256(prefix.encode()).hexdigest()[:32]}}
+    
+    def _record_openai_usage(self, usage):
+        details = getattr(usage, "prompt_tokens_details", None)
+        self._record_usage(
+            input_tokens=usage.prompt_tokens,
+            output_tokens=usage.completion_tokens,
+            cached_input_tokens=getattr(details, "cached_tokens", 0) if details else 0
+        )
     
     def get_token_count(self, text: str) -> int:
-        """Count tokens using tiktoken"""
-        return len(self.encoding.encode(text))
+        """Count tokens with the model's tiktoken encoding (see model capabilities)"""
+        return model_capabilities.count_tokens(text, self.model_name)
@@ -0,0 +1,122 @@
+"""
+Persona Registry
+Cached view of config/personas.yaml shared by the whole process
+Updated: 2026-10-19 - Initial registry with mtime/hash reload
+
+The file is parsed into an immutable snapshot. Each read costs one stat();
+the file is re-read only when its mtime or size changes, and re-parsed only
+when its content hash changes too (a `touch` keeps the snapshot). A file
+that fails to parse is logged and the last good snapshot is kept.
+
+Snapshots are replaced, never modified, so readers need no lock: they take
+the current reference and keep using it. Reloads are serialized by a lock
+so concurrent requests after an edit parse the file once.
+"""
+
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, Optional, Tuple
+import yaml
+from loguru import logger
+from models.schemas import ModelPersonality
+
+PERSONAS_CONFIG = Path(__file__).parent.parent / "config" / "personas.yaml"
+
+
+@dataclass(frozen=True)
+class PersonaSnapshot:
+    """One parsed version of personas.yaml"""
+    personas: Dict[str, ModelPersonality]
+    version: int = 0
+    digest: Optional[str] = None
+    # Available-model views keyed by the set of providers with an API key
+    _available: Dict[FrozenSet[str], Dict[str, ModelPersonality]] = field(default_factory=dict, repr=False)
+
+    def available(self, configured: FrozenSet[str]) -> Dict[str, ModelPersonality]:
+        view = self._available.get(configured)
+        if view is None:
+            view = {
+                model_id: personality for model_id, personality in self.personas.items()
+                if personality.provider in configured
+            }
+            self._available[configured] = view
+        return view
+
+
+class PersonaRegistry:
+    """Loads personas.yaml once per change"""
+
+    def __init__(self, path: Path = PERSONAS_CONFIG):
+        self.path = path
+        self._snapshot = PersonaSnapshot(personas={})
+        # (st_mtime_ns, st_size) the snapshot was checked against
+        self._signature: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def snapshot(self) -> PersonaSnapshot:
+        """Current snapshot, reloading first if the file changed"""
+        try:
+            stat = self.path.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature = None
+
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    self._reload(signature)
+        return self._snapshot
+
+    def _reload(self, signature: Optional[Tuple[int, int]]):
+        self._signature = signature
+        if signature is None:
+            logger.error(f"Personas config not found at {self.path}")
+            self._snapshot = PersonaSnapshot(personas={}, version=self._snapshot.version + 1)
+            return
+
+        raw = self.path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest == self._snapshot.digest:
+            return
+
+        try:
+            config = yaml.safe_load(raw) or {}
+        except Exception as e:
+            logger.error(f"Error loading personas, keeping the previous ones: {e}")
+            return
+
+        personas = {}
+        for model_id, persona_data in config.get('personas', {}).items():
+            try:
+                personas[model_id] = ModelPersonality(**persona_data)
+            except Exception as e:
+                logger.error(f"Error creating ModelPersonality for {model_id}: {e}")
+                logger.error(f"Persona data: {persona_data}")
+                # Skip this persona if it fails to load
+                continue
+
+        self._snapshot = PersonaSnapshot(personas=personas, version=self._snapshot.version + 1, digest=digest)
+        self.reloads += 1
+        logger.info(f"Loaded {len(personas)} personas from configuration")
+
+    def personas(self) -> Dict[str, ModelPersonality]:
+        """All personas by model id (a copy; the personalities are shared)"""
+        return dict(self.snapshot().personas)
+
+    def available(self, has_api_key: Callable[[str], bool]) -> Dict[str, ModelPersonality]:
+        """Personas whose provider has an API key configured"""
+        snapshot = self.snapshot()
+        providers = {personality.provider for personality in snapshot.personas.values()}
+        configured = frozenset(provider for provider in providers if has_api_key(provider))
+        return dict(snapshot.available(configured))
+
+    def stats(self) -> Dict[str, int]:
+        snapshot = self._snapshot
+        return {"personas": len(snapshot.personas), "version": snapshot.version, "reloads": self.reloads}
+
+
+# Singleton instance
+persona_registry = PersonaRegistry()
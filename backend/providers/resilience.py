@@ -0,0 +1,220 @@
+"""
+Provider Resilience
+Error classification and retries with backoff for provider calls
+Updated: 2026-10-19 - Initial retry layer (replaces "[Error: ...]" chunks)
+
+Every provider failure becomes a ProviderError classified as
+- rate_limited: 429 / quota exhausted; retried after the server's retry-after
+- retryable: timeouts, connection errors, 408/409/5xx/529 overloads
+- fatal: everything else (bad request, auth, content blocked, ...)
+
+A stream is only retried until its first token has been yielded: after that
+the caller has already shown (and may have stored) part of the answer, so a
+retry would repeat or contradict it. Delays are exponential with full jitter,
+so panelists hitting the same limit don't retry in lockstep; a retry-after
+from the provider is honoured as the minimum wait, and one longer than
+PROVIDER_MAX_RETRY_AFTER fails immediately instead of stalling the turn.
+
+The SDKs' own retries are disabled on pooled clients (see client_pool), so
+this is the only place that retries.
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+from loguru import logger
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 409, 500, 502, 503, 504, 529}
+RATE_LIMITED_STATUS = {429}
+
+# Exception class names (anywhere in the MRO) that mean the request never got a
+# usable response; matched by name so httpx and httpx2 based SDKs both qualify
+TRANSIENT_EXCEPTIONS = {
+    "APIConnectionError", "APITimeoutError", "TimeoutException", "NetworkError",
+    "RemoteProtocolError", "ServiceUnavailable", "DeadlineExceeded", "InternalServerError",
+    "TimeoutError", "ConnectionError"
+}
+RATE_LIMIT_EXCEPTIONS = {"RateLimitError", "ResourceExhausted", "TooManyRequests"}
+
+
+class ErrorKind(str, Enum):
+    RETRYABLE = "retryable"
+    RATE_LIMITED = "rate_limited"
+    FATAL = "fatal"
+
+
+class ProviderError(Exception):
+    """A classified provider failure"""
+
+    def __init__(
+        self,
+        message: str,
+        kind: ErrorKind,
+        status_code: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        error_type: Optional[str] = None
+    ):
+        super().__init__(message)
+        self.message = message
+        self.kind = kind
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.error_type = error_type
+        self.attempts = 1
+        # Whether the stream had already produced tokens when it failed
+        self.partial = False
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind != ErrorKind.FATAL
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind.value,
+            "message": self.message,
+            "status_code": self.status_code,
+            "error_type": self.error_type,
+            "retry_after": self.retry_after,
+            "attempts": self.attempts,
+            "partial": self.partial
+        }
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = int(os.getenv("PROVIDER_MAX_ATTEMPTS", "4"))
+    base_delay: float = float(os.getenv("PROVIDER_RETRY_BASE_DELAY", "0.5"))
+    max_delay: float = float(os.getenv("PROVIDER_RETRY_MAX_DELAY", "20"))
+    max_retry_after: float = float(os.getenv("PROVIDER_MAX_RETRY_AFTER", "60"))
+
+    def delay(self, attempt: int, error: ProviderError) -> Optional[float]:
+        """Seconds to wait before attempt `attempt + 1`, or None to give up"""
+        if not error.retryable or attempt >= self.max_attempts:
+            return None
+        if error.retry_after is not None and error.retry_after > self.max_retry_after:
+            return None
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        return max(backoff, error.retry_after or 0.0)
+
+
+default_policy = RetryPolicy()
+
+# Retries and failures by error kind, for /api/health
+retry_stats: Counter = Counter()
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    for attribute in ("status_code", "code"):
+        value = getattr(exc, attribute, None)
+        if isinstance(value, int) and 100 <= value < 600:
+            return value
+    return None
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds from retry-after-ms / retry-after response headers"""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(exc: BaseException) -> ProviderError:
+    """Wrap any exception raised by a provider SDK as a ProviderError"""
+    if isinstance(exc, ProviderError):
+        return exc
+
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    status = _status_code(exc)
+    if status in RATE_LIMITED_STATUS or names & RATE_LIMIT_EXCEPTIONS:
+        kind = ErrorKind.RATE_LIMITED
+    elif status in RETRYABLE_STATUS or (status is None and names & TRANSIENT_EXCEPTIONS):
+        kind = ErrorKind.RETRYABLE
+    else:
+        kind = ErrorKind.FATAL
+
+    error = ProviderError(
+        str(exc) or type(exc).__name__, kind,
+        status_code=status, retry_after=_retry_after(exc), error_type=type(exc).__name__
+    )
+    error.__cause__ = exc
+    return error
+
+
+async def _wait_or_give_up(
+    error: ProviderError, attempt: int, policy: RetryPolicy, label: str
+) -> None:
+    """Sleep before the next attempt; raise `error` if there is none"""
+    delay = policy.delay(attempt, error)
+    if delay is None:
+        error.attempts = attempt
+        retry_stats[f"failed_{error.kind.value}"] += 1
+        raise error
+    retry_stats[f"retried_{error.kind.value}"] += 1
+    logger.warning(f"{label}: {error.kind.value} error ({error.message}); "
+                   f"attempt {attempt + 1}/{policy.max_attempts} in {delay:.2f}s")
+    await asyncio.sleep(delay)
+
+
+async def stream_with_retries(
+    open_stream: Callable[[], AsyncIterator[T]],
+    label: str,
+    policy: RetryPolicy = default_policy
+) -> AsyncIterator[T]:
+    """Yield from `open_stream()`, reopening it on retryable errors before the first item"""
+    attempt = 1
+    while True:
+        started = False
+        try:
+            async for item in open_stream():
+                started = True
+                yield item
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = classify_error(e)
+            if started:
+                error.partial = True
+                error.attempts = attempt
+                retry_stats[f"failed_{error.kind.value}"] += 1
+                raise error
+            await _wait_or_give_up(error, attempt, policy, label)
+            attempt += 1
+
+
+async def call_with_retries(
+    call: Callable[[], Awaitable[T]],
+    label: str,
+    policy: RetryPolicy = default_policy
+) -> T:
+    """Await `call()`, retrying retryable errors"""
+    attempt = 1
+    while True:
+        try:
+            return await call()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await _wait_or_give_up(classify_error(e), attempt, policy, label)
+            attempt += 1
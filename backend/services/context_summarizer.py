@@ -1,13 +1,14 @@
 """
 Context Summarization Service
 Uses LLM to intelligently summarize conversation history
+Updated: 2026-10-19 - Token estimates use the model's tokenizer family (model capabilities)
 """
 
 from typing import List, Dict, Any, Optional
 from models.schemas import Message, MessageType
 from providers.openai_provider import OpenAIProvider
+from providers.model_capabilities import model_capabilities
 from loguru import logger
-import tiktoken
 import asyncio
 import os
 
@@ -48,18 +49,14 @@ class ContextSummarizer:
     
     def estimate_tokens(self, messages: List[Message], model: str = "gpt-4") -> int:
         """Estimate token count for messages"""
-        try:
-            encoding = tiktoken.encoding_for_model(model)
-        except:
-            encoding = tiktoken.get_encoding("cl100k_base")
-        
         total_tokens = 0
         for msg in messages:
-            total_tokens += len(encoding.encode(msg.content))
+            total_tokens += model_capabilities.count_tokens(msg.content, model)
             # Add overhead for message structure
             total_tokens += 4  # Tokens for role, etc.
         
-        return total_tokens    
+        return total_tokens
+    
     def should_summarize(self, messages: List[Message], context_limit: int = 3000) -> bool:
         """
         Determine if summarization is needed based on token count
@@ -1,17 +1,49 @@
 """
 Streaming Orchestrator
 Manages concurrent AI model responses and streaming coordination
+Updated: 2026-10-19 - Optional semantic synapse previews at sentence boundaries
+Updated: 2026-10-19 - Provider-reported usage (incl. cached prompt tokens) on completion events
+Updated: 2026-10-19 - Classified provider errors on failure events; partial output discarded
+Updated: 2026-10-19 - Opt-in exact-match response cache with instant or paced replay
+Updated: 2026-10-19 - Usage, estimate and timing recorded in each response's metadata
+Updated: 2026-10-19 - Context and response budgets from model capabilities
+Updated: 2026-10-19 - Non-streaming turns: all panelists completed concurrently under one deadline
 """
 
 import asyncio
-from typing import List, Dict, Any, AsyncGenerator, Optional
+import os
+import time
+from typing import List, Dict, Any, AsyncGenerator, Optional, Set, Tuple
 from providers.base_provider import AIProvider
+from providers.resilience import ErrorKind, ProviderError, classify_error
+from core.response_cache import ResponseCache
 from memory.group_memory import GroupMemory
+from memory.semantic_synapse_detector import semantic_detector
 from models.schemas import Message, MessageType, CollaborationState, StreamingResponse
 from datetime import datetime
 from loguru import logger
 import uuid
 import json
+from collections import Counter
+
+
+class DeadlineExceeded(Exception):
+    """A panelist was still running when the turn deadline passed"""
+
+
+async def _within_deadline(coro, deadline: float):
+    """
+    Await coro, cancelling it after deadline seconds
+    Unlike wait_for, the timeout is told apart from a TimeoutError the
+    awaited code raises itself
+    """
+    task = asyncio.ensure_future(coro)
+    done, _ = await asyncio.wait({task}, timeout=deadline)
+    if not done:
+        task.cancel()
+        await asyncio.wait({task})
+        raise DeadlineExceeded(f"No response within the {deadline:g}s turn deadline")
+    return task.result()
 
 
 class StreamingOrchestrator:
@@ -20,11 +52,37 @@ class StreamingOrchestrator:
     Handles timing, coordination, and synapse detection
     """
     
-    def __init__(self, memory: GroupMemory):
+    # Semantic preview throttling (per stream)
+    PREVIEW_MIN_INTERVAL = 2.0  # seconds between previews
+    PREVIEW_MIN_NEW_CHARS = 80  # new text required since the last preview
+    SENTENCE_ENDINGS = (".", "!", "?", "\n")
+    
+    def __init__(
+        self,
+        memory: GroupMemory,
+        semantic_previews: Optional[bool] = None,
+        response_cache: Optional[ResponseCache] = None,
+        cache_replay: str = "instant"
+    ):
         self.memory = memory
         self.active_streams: Dict[str, Any] = {}
         self.providers: Dict[str, AIProvider] = {}
         
+        # Provisional semantic synapse events while models are still streaming
+        if semantic_previews is None:
+            semantic_previews = os.getenv("SEMANTIC_PREVIEWS", "false").lower() == "true"
+        self.semantic_previews = semantic_previews
+        self._preview_events: List[StreamingResponse] = []
+        # Running previews, referenced until done (the loop only keeps weak references)
+        self._preview_tasks: Set[asyncio.Task] = set()
+        self._reconciliations: Dict[str, Dict[str, Any]] = {}
+        
+        # Exact-match response cache (None unless the session opted in)
+        self.response_cache = response_cache
+        self.cache_replay = cache_replay
+        self.response_cache_stats: Counter = Counter()
+        self._cache_outcomes: Dict[str, str] = {}
+        
     def add_provider(self, model_id: str, provider: AIProvider):
         """Add an AI provider to the orchestration"""
         self.providers[model_id] = provider
@@ -39,83 +97,213 @@ class StreamingOrchestrator:
         Stream responses from all active models concurrently
         This is the main method that enables collaborative intelligence
         """
-        # Add user message to memory
-        user_message = Message(
-            session_id=self.memory.session_id,
-            content=user_input,
-            message_type=message_type,
-            model_source=None  # User message
-        )
-        await self.memory.add_message(user_message, "user")
+        await self._add_user_message(user_input, message_type)
         
         # Create streaming tasks for each provider with token-aware context
         tasks = []
         for model_id, provider in self.providers.items():
-            # Get token-aware context for this specific model
-            model_context = self.memory.get_token_aware_context(
-                provider.model_name,
-                token_limit=8000 if "gpt-4" in provider.model_name else 4000
-            )
+            model_context, budget, estimated_tokens = self._turn_context(provider)
             
             task = asyncio.create_task(
-                self._stream_from_provider(model_id, provider, model_context)
+                self._stream_from_provider(
+                    model_id, provider, model_context,
+                    estimated_tokens=estimated_tokens,
+                    max_tokens=budget.response_tokens
+                )
             )
             tasks.append((model_id, task))
         
         # Stream responses as they arrive
         active_tasks = dict(tasks)
-        completed_models = set()        
-        while active_tasks:
-            # Wait for any task to produce a result
-            done, pending = await asyncio.wait(
-                active_tasks.values(),
-                return_when=asyncio.FIRST_COMPLETED
-            )
-            
-            for task in done:
-                # Find which model this task belongs to
-                model_id = next(m for m, t in active_tasks.items() if t == task)
+        completed_models = set()
+        try:
+            while active_tasks:
+                # Wait for any task to produce a result
+                done, pending = await asyncio.wait(
+                    active_tasks.values(),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
                 
-                try:
-                    # Get the streaming response chunk
-                    response_chunk = await task
+                for task in done:
+                    # Find which model this task belongs to
+                    model_id = next(m for m, t in active_tasks.items() if t == task)
                     
-                    if response_chunk:  # Still streaming
-                        yield response_chunk
+                    try:
+                        # Get the streaming response chunk
+                        response_chunk = await task
                         
-                        # Create a new task to continue streaming
-                        provider = self.providers[model_id]
-                        new_task = asyncio.create_task(
-                            self._get_next_chunk(model_id, provider)
-                        )
-                        active_tasks[model_id] = new_task
-                    else:
-                        # Model finished streaming
-                        completed_models.add(model_id)
+                        if response_chunk:  # Still streaming
+                            yield response_chunk
+                            
+                            # Provisional synapse previews that finished meanwhile
+                            for preview in self._drain_previews():
+                                yield preview
+                            
+                            # Create a new task to continue streaming
+                            provider = self.providers[model_id]
+                            new_task = asyncio.create_task(
+                                self._get_next_chunk(model_id, provider)
+                            )
+                            active_tasks[model_id] = new_task
+                        else:
+                            # Model finished streaming
+                            completed_models.add(model_id)
+                            del active_tasks[model_id]
+                            
+                            # Send completion signal (with preview reconciliation and usage if any)
+                            metadata = {}
+                            reconciliation = self._reconciliations.pop(model_id, None)
+                            if reconciliation:
+                                metadata["synapse_reconciliation"] = reconciliation
+                            if self.providers[model_id].last_usage:
+                                metadata["usage"] = self.providers[model_id].last_usage
+                            if model_id in self._cache_outcomes:
+                                metadata["response_cache"] = self._cache_outcomes.pop(model_id)
+                            yield StreamingResponse(
+                                session_id=self.memory.session_id,
+                                model_source=model_id,
+                                content="",
+                                message_type=MessageType.RESPONSE,
+                                is_complete=True,
+                                metadata=metadata
+                            )
+                            
+                    except Exception as e:
+                        logger.error(f"Error streaming from {model_id}: {e}")
                         del active_tasks[model_id]
+                        # Partial output is dropped, not stored as a message
+                        self.active_streams.pop(model_id, None)
                         
-                        # Send completion signal
-                        yield StreamingResponse(
-                            session_id=self.memory.session_id,
-                            model_source=model_id,
-                            content="",
-                            message_type=MessageType.RESPONSE,
-                            is_complete=True
-                        )
-                        
-                except Exception as e:
-                    logger.error(f"Error streaming from {model_id}: {e}")
-                    del active_tasks[model_id]
-                    
-                    # Inject system message about provider failure
-                    failure_response = await self._handle_provider_failure(model_id, str(e))
-                    if failure_response:
-                        yield failure_response    
+                        # Inject system message about provider failure
+                        failure_response = await self._handle_provider_failure(model_id, classify_error(e))
+                        if failure_response:
+                            yield failure_response
+        finally:
+            # Previews of a finished (or abandoned) turn would only be dropped
+            for task in list(self._preview_tasks):
+                task.cancel()
+    
+    async def complete_concurrent_responses(
+        self,
+        user_input: str,
+        deadline: float,
+        message_type: MessageType = MessageType.MISSION
+    ) -> Dict[str, Any]:
+        """
+        Non-streaming turn: every panelist's generate_complete runs at once
+        under one deadline (seconds); panelists still running then are
+        cancelled and reported as failures. Returns the responses, failures
+        and the synapses detected this turn as one plain payload.
+        """
+        await self._add_user_message(user_input, message_type)
+        synapses_before = len(self.memory.synapse_connections)
+        started = time.monotonic()
+        
+        model_ids = list(self.providers)
+        outcomes = await asyncio.gather(*[
+            _within_deadline(self._complete_from_provider(model_id, self.providers[model_id]), deadline)
+            for model_id in model_ids
+        ], return_exceptions=True)
+        
+        completed, failed = [], []
+        for model_id, outcome in zip(model_ids, outcomes):
+            if isinstance(outcome, DeadlineExceeded):
+                failed.append((model_id, ProviderError(
+                    str(outcome), ErrorKind.RETRYABLE, error_type="DeadlineExceeded"
+                )))
+            elif isinstance(outcome, BaseException):
+                failed.append((model_id, classify_error(outcome)))
+            else:
+                completed.append((model_id, outcome))
+        
+        # Answers stored in the order they finished, as a streamed turn would
+        responses = []
+        for model_id, (_, message) in sorted(completed, key=lambda item: item[1][0]):
+            provider = self.providers[model_id]
+            await self.memory.add_message(message, model_id)
+            provider.set_state(CollaborationState.COMPLETE)
+            responses.append({
+                "model": model_id,
+                "role": provider.personality.role,
+                "message_id": message.id,
+                "content": message.content,
+                "metadata": message.metadata
+            })
+        
+        failures = []
+        for model_id, error in failed:
+            provider = self.providers[model_id]
+            provider.set_state(CollaborationState.ERROR)
+            await self._handle_provider_failure(model_id, error)
+            failures.append({"model": model_id, "role": provider.personality.role, "error": error.to_dict()})
+        
+        return {
+            "session_id": self.memory.session_id,
+            "responses": responses,
+            "failures": failures,
+            "synapses": [
+                {
+                    "id": conn.id,
+                    "from_message": conn.from_message_id,
+                    "to_message": conn.to_message_id,
+                    "type": conn.synapse_type.value,
+                    "strength": conn.strength
+                }
+                for conn in self.memory.synapse_connections[synapses_before:]
+            ],
+            "elapsed_ms": round((time.monotonic() - started) * 1000)
+        }
+    
+    async def _complete_from_provider(self, model_id: str, provider: AIProvider) -> Tuple[float, Message]:
+        """When one panelist's whole answer arrived (monotonic), and the answer (not yet in memory)"""
+        provider.set_state(CollaborationState.THINKING)
+        context, budget, estimated_tokens = self._turn_context(provider)
+        started = time.monotonic()
+        
+        provider.set_state(CollaborationState.RESPONDING)
+        content = await provider.generate_complete(context, max_tokens=budget.response_tokens)
+        
+        metadata = self._usage_metadata(provider, {
+            "buffer": content,
+            "started": started,
+            "estimated_tokens": estimated_tokens,
+            "streamed": False
+        })
+        return time.monotonic(), Message(
+            session_id=self.memory.session_id,
+            content=content,
+            message_type=MessageType.RESPONSE,
+            model_source=model_id,
+            metadata=metadata
+        )
+    
+    async def _add_user_message(self, user_input: str, message_type: MessageType):
+        user_message = Message(
+            session_id=self.memory.session_id,
+            content=user_input,
+            message_type=message_type,
+            model_source=None  # User message
+        )
+        await self.memory.add_message(user_message, "user")
+    
+    def _turn_context(self, provider: AIProvider):
+        """Token-aware context sized to this model's window, its budget and the prompt estimate"""
+        budget = provider.context_budget()
+        model_context = self.memory.get_token_aware_context(
+            provider.model_name,
+            token_limit=budget.context_tokens,
+            response_reserve=0  # Already left out of the budget
+        )
+        estimated_tokens = self.memory.context_token_estimates.get(provider.model_name, 0) + budget.system_tokens
+        return model_context, budget, estimated_tokens
+    
     async def _stream_from_provider(
         self, 
         model_id: str, 
         provider: AIProvider, 
-        context: List[Dict[str, Any]]
+        context: List[Dict[str, Any]],
+        estimated_tokens: Optional[int] = None,
+        max_tokens: Optional[int] = None
     ) -> Optional[StreamingResponse]:
         """
         Start streaming from a single provider
@@ -125,12 +313,25 @@ class StreamingOrchestrator:
             provider.set_state(CollaborationState.THINKING)
             
             # Initialize streaming for this model
-            self.active_streams[model_id] = {
+            stream_data = {
                 "buffer": "",
                 "message_id": str(uuid.uuid4()),
                 "started_at": datetime.utcnow(),
-                "generator": provider.generate_stream(context)
+                "started": time.monotonic(),
+                "first_chunk_at": None,
+                "estimated_tokens": estimated_tokens,
+                "last_preview_at": 0.0,
+                "last_preview_length": 0,
+                "previews": {}
             }
+            if self.response_cache:
+                stream_data["generator"] = self.response_cache.stream(
+                    provider, context, replay=self.cache_replay, max_tokens=max_tokens,
+                    session_stats=self.response_cache_stats, outcome=stream_data
+                )
+            else:
+                stream_data["generator"] = provider.generate_stream(context, max_tokens=max_tokens)
+            self.active_streams[model_id] = stream_data
             
             # Start streaming
             provider.set_state(CollaborationState.RESPONDING)
@@ -157,6 +358,8 @@ class StreamingOrchestrator:
             chunk = await anext(stream_data["generator"], None)
             
             if chunk:
+                if stream_data["first_chunk_at"] is None:
+                    stream_data["first_chunk_at"] = time.monotonic()
                 # Add to buffer
                 stream_data["buffer"] += chunk
                 
@@ -165,6 +368,10 @@ class StreamingOrchestrator:
                     model_id, stream_data["buffer"]
                 )
                 
+                # Semantic preview at sentence boundaries (runs in the background)
+                if self.semantic_previews:
+                    self._maybe_schedule_preview(model_id, chunk, stream_data)
+                
                 # Return streaming response
                 return StreamingResponse(
                     session_id=self.memory.session_id,
@@ -201,12 +408,20 @@ class StreamingOrchestrator:
             session_id=self.memory.session_id,
             content=complete_content,
             message_type=MessageType.RESPONSE,
-            model_source=model_id
+            model_source=model_id,
+            metadata=self._usage_metadata(provider, stream_data)
         )
         
         # Add to memory (will trigger synapse detection)
         await self.memory.add_message(message, model_id)
         
+        # Reconcile provisional previews with the final detection
+        if stream_data["previews"]:
+            self._reconciliations[model_id] = self._reconcile_previews(message, stream_data["previews"])
+        
+        if "response_cache" in stream_data:
+            self._cache_outcomes[model_id] = stream_data["response_cache"]
+        
         # Update provider state
         provider.set_state(CollaborationState.COMPLETE)
         
@@ -215,6 +430,40 @@ class StreamingOrchestrator:
         
         logger.info(f"Completed message from {model_id}: {len(complete_content)} chars")
     
+    def _usage_metadata(self, provider: AIProvider, stream_data: Dict[str, Any]) -> Dict[str, Any]:
+        """What this response cost and how fast it streamed (see GroupMemory.get_usage_stats)"""
+        finished = time.monotonic()
+        usage = provider.last_usage
+        metadata = {"provider": provider.personality.provider, "model": provider.model_name}
+        if usage:
+            metadata["usage"] = dict(usage)
+            output_tokens = usage["output_tokens"]
+        else:
+            output_tokens = provider.get_token_count(stream_data["buffer"])
+        if stream_data.get("estimated_tokens") is not None:
+            metadata["estimated_input_tokens"] = stream_data["estimated_tokens"]
+        if "response_cache" in stream_data:
+            metadata["response_cache"] = stream_data["response_cache"]
+        
+        if not stream_data.get("streamed", True):
+            # One response at the end: no first-token or generation split to report
+            metadata["timing"] = {
+                "total_ms": round((finished - stream_data["started"]) * 1000),
+                "output_tokens": output_tokens,
+                "output_tokens_estimated": not usage,
+                "streamed": False
+            }
+            return metadata
+        
+        first_chunk_at = stream_data["first_chunk_at"] or finished
+        metadata["timing"] = {
+            "time_to_first_token_ms": round((first_chunk_at - stream_data["started"]) * 1000),
+            "generation_ms": round((finished - first_chunk_at) * 1000),
+            "output_tokens": output_tokens,
+            "output_tokens_estimated": not usage
+        }
+        return metadata
+    
     async def _detect_realtime_synapse(self, model_id: str, partial_content: str) -> Optional[str]:
         """
         Detect synapses in real-time as models are streaming
@@ -237,6 +486,84 @@ class StreamingOrchestrator:
         
         return None
     
+    def _maybe_schedule_preview(self, model_id: str, chunk: str, stream_data: Dict[str, Any]):
+        """Start a semantic preview if the stream just ended a sentence and isn't throttled"""
+        if not semantic_detector.is_ready:
+            return
+        if not any(ending in chunk for ending in self.SENTENCE_ENDINGS):
+            return
+        
+        now = time.monotonic()
+        buffer = stream_data["buffer"]
+        if now - stream_data["last_preview_at"] < self.PREVIEW_MIN_INTERVAL:
+            return
+        if len(buffer) - stream_data["last_preview_length"] < self.PREVIEW_MIN_NEW_CHARS:
+            return
+        if semantic_detector.preview_backlogged:
+            semantic_detector.previews_skipped += 1
+            return
+        
+        stream_data["last_preview_at"] = now
+        stream_data["last_preview_length"] = len(buffer)
+        task = asyncio.create_task(self._run_preview(model_id, stream_data["message_id"], buffer))
+        self._preview_tasks.add(task)
+        task.add_done_callback(self._preview_done)
+    
+    def _preview_done(self, task: asyncio.Task):
+        self._preview_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.warning(f"Semantic preview failed: {task.exception()}")
+    
+    async def _run_preview(self, model_id: str, message_id: str, partial_content: str):
+        """Score a partial message and queue a provisional synapse event"""
+        candidates = [
+            msg for msg in self.memory.messages[-5:]
+            if msg.model_source and msg.model_source != model_id
+        ]
+        scores = await semantic_detector.preview_synapses(partial_content, candidates)
+        
+        # Drop results for streams that completed while the preview ran
+        stream_data = self.active_streams.get(model_id)
+        if not scores or not stream_data or stream_data["message_id"] != message_id:
+            return
+        
+        best_id = max(scores, key=lambda candidate_id: scores[candidate_id].confidence)
+        best = scores[best_id]
+        stream_data["previews"][best_id] = best
+        
+        self._preview_events.append(StreamingResponse(
+            session_id=self.memory.session_id,
+            model_source=model_id,
+            content="",
+            message_type=MessageType.RESPONSE,
+            is_complete=False,
+            synapse_detected=best_id,
+            metadata={
+                "event": "synapse_preview",
+                "provisional": True,
+                "message_id": message_id,
+                "synapse_type": best.synapse_type.value,
+                "strength": best.confidence,
+                "similarity": best.similarity,
+                "characters": len(partial_content)
+            }
+        ))
+    
+    def _drain_previews(self) -> List[StreamingResponse]:
+        """Pending preview events for streams that are still active"""
+        events, self._preview_events = self._preview_events, []
+        return [event for event in events if event.model_source in self.active_streams]
+    
+    def _reconcile_previews(self, message: Message, previews: Dict[str, Any]) -> Dict[str, Any]:
+        """Compare provisional previews with the synapses detected on completion"""
+        final_ids = set(message.synapse_connections)
+        return {
+            "message_id": message.id,
+            "confirmed": [candidate_id for candidate_id in previews if candidate_id in final_ids],
+            "retracted": [candidate_id for candidate_id in previews if candidate_id not in final_ids],
+            "added": [candidate_id for candidate_id in message.synapse_connections if candidate_id not in previews]
+        }
+    
     def get_active_models(self) -> List[str]:
         """Get list of currently active/streaming models"""
         return list(self.active_streams.keys())
@@ -248,7 +575,7 @@ class StreamingOrchestrator:
             for model_id, provider in self.providers.items()
         }
     
-    async def _handle_provider_failure(self, model_id: str, error_message: str) -> Optional[StreamingResponse]:
+    async def _handle_provider_failure(self, model_id: str, error: ProviderError) -> Optional[StreamingResponse]:
         """Handle provider failure by injecting system message"""
         # Get the provider's personality for a proper name
         provider = self.providers.get(model_id)
@@ -266,7 +593,8 @@ class StreamingOrchestrator:
             metadata={
                 "error_type": "provider_failure",
                 "failed_model": model_id,
-                "error_details": error_message
+                "error_details": error.message,
+                "error_kind": error.kind.value
             }
         )
         
@@ -282,7 +610,8 @@ class StreamingOrchestrator:
             is_complete=True,
             metadata={
                 "event": "provider_failure",
-                "model": model_id
+                "model": model_id,
+                "error": error.to_dict()
             }
         )
         
@@ -0,0 +1,43 @@
+"""Shared fixtures: SessionManagers acting as separate workers on one SQLite state store"""
+
+import pytest
+from core.session_manager import SessionManager
+from core.sqlite_store import SQLiteStateStore
+from models.schemas import CreateSessionRequest, Message, MessageType
+
+
+@pytest.fixture
+async def workers(tmp_path, monkeypatch):
+    """workers(url=None) -> a started SessionManager with its own worker id; all shut down afterwards"""
+    monkeypatch.setenv("STATE_BACKEND", "memory")
+    # Eviction is driven by the tests themselves
+    monkeypatch.setenv("SESSION_IDLE_TIMEOUT", "0")
+    monkeypatch.setenv("SESSION_MEMORY_BUDGET_MB", "0")
+    started = []
+
+    async def start(url=None) -> SessionManager:
+        manager = SessionManager()
+        manager.store = SQLiteStateStore(str(tmp_path / "state.db"))
+        manager.store.worker_id = f"worker-{len(started)}"
+        manager.worker_url = url
+        await manager.initialize()
+        started.append(manager)
+        return manager
+
+    yield start
+    for manager in started:
+        await manager.shutdown()
+
+
+async def create_session(manager: SessionManager) -> str:
+    """A session with no panelists (no provider is ever called)"""
+    session = await manager.create_session(CreateSessionRequest(mission="test", selected_models=["test-model"]))
+    return session.id
+
+
+def say(manager: SessionManager, session_id: str, n: int):
+    """Add n panelist messages to the session's memory on this worker"""
+    memory = manager.memory_managers[session_id]
+    for i in range(n):
+        memory.messages.append(Message(session_id=session_id, content=f"message {len(memory.messages)}",
+                                       message_type=MessageType.RESPONSE, model_source="analyst"))
@@ -0,0 +1,79 @@
+"""Persona store: cursor-paged listing of own and public personas"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from database.persona_store import PersonaStore, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+async def store(tmp_path):
+    store = PersonaStore(f"sqlite+aiosqlite:///{tmp_path / 'personas.db'}")
+    await store.initialize()
+    yield store
+    await store.close()
+
+
+def _fields(name: str, created_at: datetime, **overrides):
+    return {
+        "name": name, "provider": "openai", "model_name": "gpt-4o", "role": "Analyst", "icon": "🔍",
+        "prompt_prefix": "As the analyst…", "collaboration_style": "analytical", "color_theme": "blue",
+        "created_at": created_at, **overrides
+    }
+
+
+async def _seed(store: PersonaStore):
+    """Alice's personas, Bob's public and private ones and an inactive one; several share a timestamp"""
+    base = datetime(2026, 1, 1)
+    visible = []
+    for i in range(7):
+        # Pairs of personas created in the same instant: the id breaks the tie
+        visible.append(await store.create("alice", _fields(f"alice-{i}", base + timedelta(minutes=i // 2))))
+    for i in range(4):
+        visible.append(await store.create("bob", _fields(f"bob-public-{i}", base + timedelta(minutes=i), is_public=True)))
+    await store.create("bob", _fields("bob-private", base + timedelta(minutes=10)))
+    hidden = await store.create("alice", _fields("alice-hidden", base + timedelta(minutes=11)))
+    await store.deactivate(hidden.id)
+    return visible
+
+
+async def _all_pages(store: PersonaStore, limit: int, **kwargs):
+    pages, cursor = [], None
+    while True:
+        page, cursor = await store.list_for_user("alice", limit=limit, cursor=cursor, **kwargs)
+        pages.append(page)
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 3, 4, 11, 50])
+async def test_pages_cover_every_visible_persona_once_newest_first(store, limit):
+    visible = await _seed(store)
+    pages = await _all_pages(store, limit)
+
+    listed = [persona for page in pages for persona in page]
+    assert all(len(page) <= limit for page in pages)
+    assert sorted(p.id for p in listed) == sorted(p.id for p in visible), "no gaps, no duplicates"
+    keys = [(p.created_at, p.id) for p in listed]
+    assert keys == sorted(keys, reverse=True)
+    assert len(pages) == max(1, -(-len(visible) // limit))
+
+
+async def test_own_personas_only(store):
+    await _seed(store)
+    listed = [p for page in await _all_pages(store, 2, include_public=False) for p in page]
+    assert {p.user_id for p in listed} == {"alice"}
+    assert len(listed) == 7
+
+
+async def test_last_page_has_no_cursor(store):
+    await _seed(store)
+    page, cursor = await store.list_for_user("alice", limit=11)
+    assert len(page) == 11 and cursor is None
+
+
+async def test_cursor_round_trip_and_invalid_cursor(store):
+    persona = await store.create("alice", _fields("a", datetime(2026, 2, 3, 4, 5, 6, 789)))
+    assert decode_cursor(encode_cursor(persona)) == (persona.created_at, persona.id)
+    with pytest.raises(ValueError):
+        await store.list_for_user("alice", cursor="not-a-cursor")
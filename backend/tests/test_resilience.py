@@ -0,0 +1,189 @@
+"""Provider retries: error classification and retrying streams only before their first item"""
+
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from providers import resilience
+from providers.resilience import (
+    ErrorKind, ProviderError, RetryPolicy, call_with_retries, classify_error, stream_with_retries
+)
+
+
+class FakeResponse:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+class FakeAPIError(Exception):
+    """Shaped like the SDKs' status errors: status_code plus the HTTP response"""
+
+    def __init__(self, status_code=None, headers=None, message="provider error"):
+        super().__init__(message)
+        if status_code is not None:
+            self.status_code = status_code
+        self.response = FakeResponse(headers)
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Delays the retry layer waited, without waiting"""
+    waited = []
+
+    async def fake_sleep(delay):
+        waited.append(delay)
+
+    monkeypatch.setattr(resilience.asyncio, "sleep", fake_sleep)
+    return waited
+
+
+POLICY = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.05, max_retry_after=30)
+
+
+@pytest.mark.parametrize("exc, kind", [
+    (FakeAPIError(429), ErrorKind.RATE_LIMITED),
+    (RateLimitError("quota"), ErrorKind.RATE_LIMITED),
+    (FakeAPIError(500), ErrorKind.RETRYABLE),
+    (FakeAPIError(503), ErrorKind.RETRYABLE),
+    (FakeAPIError(529), ErrorKind.RETRYABLE),
+    (FakeAPIError(408), ErrorKind.RETRYABLE),
+    (APIConnectionError("reset"), ErrorKind.RETRYABLE),
+    (asyncio.TimeoutError(), ErrorKind.RETRYABLE),
+    (FakeAPIError(400), ErrorKind.FATAL),
+    (FakeAPIError(401), ErrorKind.FATAL),
+    (FakeAPIError(404), ErrorKind.FATAL),
+    (ValueError("bad input"), ErrorKind.FATAL),
+])
+def test_classify_error(exc, kind):
+    error = classify_error(exc)
+    assert error.kind == kind
+    assert error.__cause__ is exc
+    assert error.retryable == (kind != ErrorKind.FATAL)
+
+
+def test_status_code_wins_over_transient_class_name():
+    class InternalServerError(Exception):
+        status_code = 400
+
+    assert classify_error(InternalServerError()).kind == ErrorKind.FATAL
+
+
+@pytest.mark.parametrize("headers, seconds", [
+    ({"retry-after": "7"}, 7.0),
+    ({"retry-after-ms": "1500", "retry-after": "9"}, 1.5),
+    ({"retry-after": "soon"}, None),
+    ({}, None),
+])
+def test_retry_after_headers(headers, seconds):
+    assert classify_error(FakeAPIError(429, headers)).retry_after == seconds
+
+
+def test_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    retry_after = classify_error(FakeAPIError(503, {"retry-after": format_datetime(when, usegmt=True)})).retry_after
+    assert 25 <= retry_after <= 31
+
+
+def _stream(script):
+    """open_stream() whose n-th opening yields script[n]'s items, then raises its error (if any)"""
+    openings = []
+
+    def open_stream():
+        items, error = script[len(openings)]
+        openings.append(1)
+
+        async def stream():
+            for item in items:
+                yield item
+            if error:
+                raise error
+        return stream()
+    return open_stream, openings
+
+
+async def _collect(stream):
+    return [item async for item in stream]
+
+
+async def test_stream_retries_before_first_item(sleeps):
+    open_stream, openings = _stream([
+        ([], FakeAPIError(503)),
+        ([], APIConnectionError("reset")),
+        (["a", "b"], None),
+    ])
+    assert await _collect(stream_with_retries(open_stream, "test", POLICY)) == ["a", "b"]
+    assert len(openings) == 3
+    assert len(sleeps) == 2 and all(0 <= delay <= POLICY.max_delay for delay in sleeps)
+
+
+async def test_stream_is_not_retried_after_first_item(sleeps):
+    open_stream, openings = _stream([(["a"], FakeAPIError(503)), (["again"], None)])
+    received = []
+    with pytest.raises(ProviderError) as raised:
+        async for item in stream_with_retries(open_stream, "test", POLICY):
+            received.append(item)
+    assert received == ["a"]
+    assert raised.value.partial and raised.value.attempts == 1
+    assert raised.value.kind == ErrorKind.RETRYABLE
+    assert len(openings) == 1 and sleeps == []
+
+
+async def test_fatal_errors_are_not_retried(sleeps):
+    open_stream, openings = _stream([([], FakeAPIError(400)), (["never"], None)])
+    with pytest.raises(ProviderError) as raised:
+        await _collect(stream_with_retries(open_stream, "test", POLICY))
+    assert raised.value.kind == ErrorKind.FATAL and not raised.value.partial
+    assert len(openings) == 1 and sleeps == []
+
+
+async def test_gives_up_after_max_attempts(sleeps):
+    open_stream, openings = _stream([([], FakeAPIError(500))] * POLICY.max_attempts)
+    with pytest.raises(ProviderError) as raised:
+        await _collect(stream_with_retries(open_stream, "test", POLICY))
+    assert raised.value.attempts == POLICY.max_attempts
+    assert len(openings) == POLICY.max_attempts and len(sleeps) == POLICY.max_attempts - 1
+
+
+async def test_retry_after_is_the_minimum_wait(sleeps):
+    open_stream, _ = _stream([([], FakeAPIError(429, {"retry-after": "2"})), (["ok"], None)])
+    assert await _collect(stream_with_retries(open_stream, "test", POLICY)) == ["ok"]
+    assert sleeps == [2.0]
+
+
+async def test_retry_after_beyond_limit_fails_immediately(sleeps):
+    open_stream, openings = _stream([([], FakeAPIError(429, {"retry-after": "120"})), (["ok"], None)])
+    with pytest.raises(ProviderError) as raised:
+        await _collect(stream_with_retries(open_stream, "test", POLICY))
+    assert raised.value.kind == ErrorKind.RATE_LIMITED and raised.value.retry_after == 120
+    assert len(openings) == 1 and sleeps == []
+
+
+async def test_call_with_retries(sleeps):
+    outcomes = [FakeAPIError(502), FakeAPIError(429), "done"]
+
+    async def call():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert await call_with_retries(call, "test", POLICY) == "done"
+    assert len(sleeps) == 2
+
+
+def test_backoff_is_jittered_and_capped():
+    error = ProviderError("x", ErrorKind.RETRYABLE)
+    policy = RetryPolicy(max_attempts=10, base_delay=1, max_delay=4, max_retry_after=60)
+    delays = [policy.delay(attempt, error) for attempt in range(1, 9) for _ in range(20)]
+    assert all(0 <= delay <= 4 for delay in delays)
+    assert policy.delay(10, error) is None
+    assert policy.delay(1, ProviderError("x", ErrorKind.FATAL)) is None
@@ -0,0 +1,104 @@
+"""Session codec: lossless round trips and explicit errors for unreadable records"""
+
+import struct
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from core.session_codec import SessionCodec, CodecError, MAGIC, SCHEMA_VERSION, FLAG_ZLIB, session_codec
+from models.schemas import (
+    Session, Message, SynapseConnection, CollaborationEvent, PanelistConfig, ModelPersonality,
+    MessageType, SynapseType, CollaborationState
+)
+
+
+def _session(n_messages: int = 3) -> Session:
+    personality = ModelPersonality(
+        provider="openai", model_name="gpt-4o", role="The Analyst", icon="🔍",
+        prompt_prefix="As the analyst…", collaboration_style="analytical", color_theme="blue"
+    )
+    session = Session(
+        mission="Design a rate limiter ✓",
+        panelist_configs=[PanelistConfig(personality=personality, state=CollaborationState.BUILDING)],
+        metadata={"panelist_models": {"a": {"model_id": "gpt-4o", "custom": False}}}
+    )
+    for i in range(n_messages):
+        session.messages.append(Message(
+            session_id=session.id, content=f"Point {i}: token buckets per tenant",
+            message_type=MessageType.RESPONSE, model_source="gpt-4o",
+            metadata={"usage": {"input_tokens": 10 + i, "output_tokens": 5}},
+            synapse_connections=[session.messages[-1].id] if session.messages else []
+        ))
+    session.synapse_connections.append(SynapseConnection(
+        from_message_id=session.messages[0].id, to_message_id=session.messages[-1].id,
+        synapse_type=SynapseType.SYNTHESIS, strength=0.8
+    ))
+    session.collaboration_events.append(CollaborationEvent(
+        session_id=session.id, event_type="synapse_formed", involved_models=["gpt-4o"],
+        description="built on point 0", metadata={"strength": 0.8}
+    ))
+    return session
+
+
+def test_session_round_trip():
+    session = _session()
+    decoded = session_codec.decode(session_codec.encode(session))
+    assert isinstance(decoded, Session)
+    assert decoded.model_dump() == session.model_dump()
+
+
+@pytest.mark.parametrize("record", [
+    Message(session_id="s", content="hello", message_type=MessageType.MISSION),
+    SynapseConnection(from_message_id="a", to_message_id="b", synapse_type=SynapseType.BUILDING, strength=0.5),
+    CollaborationEvent(session_id="s", event_type="e", involved_models=["x"], description="d"),
+])
+def test_record_round_trip(record):
+    decoded = session_codec.decode(session_codec.encode(record))
+    assert type(decoded) is type(record)
+    assert decoded.model_dump() == record.model_dump()
+
+
+def test_large_records_are_compressed():
+    codec = SessionCodec(compress_threshold=256)
+    session = _session(n_messages=50)
+    data = codec.encode(session)
+    assert data[3] & FLAG_ZLIB
+    assert codec.decode(data).model_dump() == session.model_dump()
+    assert not SessionCodec(compress_threshold=0).encode(session)[3] & FLAG_ZLIB
+
+
+def test_non_primitive_metadata_is_stringified():
+    stamp = datetime(2026, 1, 2, 3, 4, 5)
+    message = Message(session_id="s", content="x", message_type=MessageType.RESPONSE,
+                      metadata={"at": stamp, "tags": {"a"}, "ratio": 0.5})
+    decoded = session_codec.decode(session_codec.encode(message))
+    assert decoded.metadata == {"at": stamp.isoformat(), "tags": ["a"], "ratio": 0.5}
+
+
+def test_aware_timestamps_are_stored_as_utc():
+    aware = datetime(2026, 5, 1, 12, 0, tzinfo=timezone(timedelta(hours=2)))
+    message = Message(session_id="s", content="x", message_type=MessageType.RESPONSE, timestamp=aware)
+    decoded = session_codec.decode(session_codec.encode(message))
+    assert decoded.timestamp == datetime(2026, 5, 1, 10, 0)
+
+
+def test_is_encoded_tells_codec_records_from_json():
+    assert session_codec.is_encoded(session_codec.encode(_session()))
+    assert not session_codec.is_encoded(_session().model_dump_json().encode())
+
+
+def test_unsupported_model_is_rejected():
+    with pytest.raises(CodecError):
+        session_codec.encode(_session().panelist_configs[0])
+
+
+@pytest.mark.parametrize("data", [
+    b"GC",                                                        # truncated header
+    b"{\"id\": \"json\"}",                                        # not a codec record
+    struct.pack(">2sBBB", MAGIC, SCHEMA_VERSION + 1, 0, 1) + b"x",  # newer schema
+    struct.pack(">2sBBB", MAGIC, SCHEMA_VERSION, 0, 99) + b"x",     # unknown kind
+    struct.pack(">2sBBB", MAGIC, SCHEMA_VERSION, FLAG_ZLIB, 1) + b"not zlib",
+    session_codec.encode(Message(session_id="s", content="x", message_type=MessageType.RESPONSE))[:-4],
+])
+def test_unreadable_records_raise_codec_error(data):
+    with pytest.raises(CodecError):
+        session_codec.decode(data)
@@ -0,0 +1,106 @@
+"""SessionManager hibernation: owned sessions are flushed and released, read-only copies dropped"""
+
+import time
+
+from conftest import create_session, say
+
+
+async def _stored_messages(manager, session_id) -> int:
+    state = await manager.store.get_memory_state(session_id)
+    return len(state["messages"]) if state else 0
+
+
+def _resident(manager, session_id) -> bool:
+    return any(session_id in table for table in (
+        manager.sessions, manager.memory_managers, manager.orchestrators, manager._last_used
+    ))
+
+
+async def test_hibernating_an_owned_session_flushes_and_releases_it(workers):
+    manager = await workers()
+    session_id = await create_session(manager)
+    say(manager, session_id, 3)
+
+    assert await manager.hibernate(session_id)
+    assert not _resident(manager, session_id)
+    assert session_id not in manager.owned_sessions
+    assert await manager.store.get_lease_owner(session_id) is None
+    assert await _stored_messages(manager, session_id) == 3
+    assert manager.hibernated == 1
+
+    await manager.claim_session(session_id)
+    assert manager.rehydrated == 1
+    assert [m.content for m in (await manager.get_session(session_id)).messages] == [
+        "message 0", "message 1", "message 2"
+    ]
+
+
+async def test_hibernating_a_read_only_copy_drops_it_unflushed(workers):
+    owner, reader = await workers(), await workers()
+    session_id = await create_session(owner)
+    say(owner, session_id, 2)
+    assert await owner._persist_delta(session_id)
+
+    await reader.get_session(session_id)
+    say(reader, session_id, 5)
+    assert await reader.hibernate(session_id)
+    assert not _resident(reader, session_id)
+    assert reader.hibernated == 0
+    assert await _stored_messages(owner, session_id) == 2, "the copy never overwrites the owner's state"
+    assert await owner.store.get_lease_owner(session_id) == owner.store.worker_id
+
+
+async def test_failed_persist_keeps_the_session_resident(workers):
+    manager = await workers()
+    session_id = await create_session(manager)
+    say(manager, session_id, 2)
+
+    async def failing(session_id, delta):
+        return False
+    manager.store.append_memory_delta = failing
+    assert not await manager.hibernate(session_id)
+    assert session_id in manager.orchestrators and session_id in manager.owned_sessions
+    assert await manager.store.get_lease_owner(session_id) == manager.store.worker_id
+
+    del manager.store.append_memory_delta
+    assert await manager.hibernate(session_id)
+    assert await _stored_messages(manager, session_id) == 2, "the failed delta is written by the next attempt"
+
+
+async def test_streaming_sessions_are_never_hibernated(workers):
+    manager = await workers()
+    session_id = await create_session(manager)
+    manager.idle_timeout = 60
+    manager._last_used[session_id] -= 120
+    manager._streaming[session_id] = 1
+    assert not await manager.hibernate(session_id)
+    assert await manager.evict_idle() == []
+    assert _resident(manager, session_id)
+
+
+async def test_evicts_idle_sessions_then_least_recently_used(workers):
+    manager = await workers()
+    idle, older, newer = [await create_session(manager) for _ in range(3)]
+    for session_id in (idle, older, newer):
+        say(manager, session_id, 4)
+
+    manager.idle_timeout = 60
+    manager._last_used[idle] = time.monotonic() - 120
+    assert await manager.evict_idle() == [idle]
+
+    # Over budget by one session: the least recently used goes
+    manager.idle_timeout = 0
+    manager.memory_budget = manager.memory_managers[older].estimated_bytes()
+    manager._touch(older)
+    assert await manager.evict_idle() == [newer]
+    assert _resident(manager, older)
+
+
+async def test_use_marks_a_session_recently_used(workers):
+    manager = await workers()
+    first, second = await create_session(manager), await create_session(manager)
+    assert list(manager._last_used) == [first, second]
+    await manager.claim_session(first)
+    assert list(manager._last_used) == [second, first]
+    await manager.get_session(second)
+    assert list(manager._last_used) == [first, second]
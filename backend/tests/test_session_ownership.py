@@ -0,0 +1,135 @@
+"""Session ownership leases across workers, and forwarding requests to the owner exactly once"""
+
+import asyncio
+from datetime import timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from api import chat
+from core.session_manager import SessionManager, SessionOwnedElsewhere
+
+from conftest import create_session, say
+
+OWNER_URL = "http://worker-a:8000"
+
+
+async def test_lease_conflict_reports_the_owner(workers):
+    owner, other = await workers(OWNER_URL), await workers()
+    session_id = await create_session(owner)
+
+    with pytest.raises(SessionOwnedElsewhere) as raised:
+        await other.claim_session(session_id)
+    assert raised.value.owner == owner.store.worker_id
+    assert raised.value.owner_url == OWNER_URL
+    assert session_id not in other.orchestrators and session_id not in other._last_used
+    assert session_id not in other.owned_sessions
+
+
+async def test_released_lease_is_taken_over_and_rebuilt(workers):
+    first, second = await workers(OWNER_URL), await workers()
+    session_id = await create_session(first)
+    say(first, session_id, 2)
+    assert await first.hibernate(session_id)
+
+    await second.claim_session(session_id)
+    assert session_id in second.owned_sessions and session_id in second.orchestrators
+    assert second.rehydrated == 1
+    assert len((await second.get_session(session_id)).messages) == 2
+
+    with pytest.raises(SessionOwnedElsewhere) as raised:
+        await first.claim_session(session_id)
+    assert raised.value.owner == second.store.worker_id
+
+
+async def test_unknown_session_is_not_leased(workers):
+    manager = await workers()
+    with pytest.raises(ValueError):
+        await manager.claim_session("missing")
+    assert await manager.store.get_lease_owner("missing") is None
+    assert "missing" not in manager.owned_sessions
+
+
+async def test_heartbeat_renews_held_leases_and_drops_lost_ones(workers):
+    first, second = await workers(), await workers()
+    first.lease_ttl = timedelta(seconds=0.3)
+    kept, lost = await create_session(first), await create_session(first)
+    await first.store.release_leases([lost])
+    await second.claim_session(lost)
+
+    heartbeat = asyncio.create_task(first._heartbeat())
+    await asyncio.sleep(0.5)
+    heartbeat.cancel()
+
+    assert lost not in first.owned_sessions and lost not in first.orchestrators
+    assert kept in first.owned_sessions and kept in first.orchestrators
+    assert await second.store.get_lease_owner(kept) == first.store.worker_id, "renewed past its first TTL"
+
+
+def _client(manager: SessionManager) -> httpx.AsyncClient:
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/api/chat")
+    app.dependency_overrides[SessionManager] = lambda: manager
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.fixture
+def forwarded(monkeypatch):
+    """Owner URLs requests were relayed to (nothing is actually sent)"""
+    calls = []
+
+    async def forward_request(owner_url, request, body):
+        calls.append(owner_url)
+        return {"forwarded": True}
+
+    async def forward_stream(owner_url, request):
+        calls.append(owner_url)
+        return PlainTextResponse("relayed")
+
+    monkeypatch.setattr(chat, "_forward_request", forward_request)
+    monkeypatch.setattr(chat, "_forward_stream", forward_stream)
+    return calls
+
+
+async def test_requests_for_another_workers_session_are_forwarded_once(workers, forwarded):
+    owner, other = await workers(OWNER_URL), await workers()
+    session_id = await create_session(owner)
+
+    async with _client(other) as client:
+        response = await client.post(f"/api/chat/{session_id}/complete", json={"message": "hi"})
+        assert response.json() == {"forwarded": True}
+        response = await client.get(f"/api/chat/{session_id}/stream", params={"message": "hi"})
+        assert response.text == "relayed"
+        assert forwarded == [OWNER_URL, OWNER_URL]
+
+        # Already relayed once: never bounced on, even if this worker thinks someone else owns it
+        headers = {chat.FORWARDED_HEADER: "1"}
+        response = await client.post(f"/api/chat/{session_id}/complete", json={"message": "hi"}, headers=headers)
+        assert response.status_code == 409
+        response = await client.get(f"/api/chat/{session_id}/stream", params={"message": "hi"}, headers=headers)
+        assert response.status_code == 409
+        assert len(forwarded) == 2
+
+
+async def test_owner_serves_forwarded_requests(workers, forwarded):
+    owner = await workers(OWNER_URL)
+    session_id = await create_session(owner)
+
+    async with _client(owner) as client:
+        response = await client.post(
+            f"/api/chat/{session_id}/complete", json={"message": "hi"}, headers={chat.FORWARDED_HEADER: "1"}
+        )
+    assert response.status_code == 200
+    assert response.json()["session_id"] == session_id
+    assert forwarded == []
+
+
+async def test_owner_without_an_address_is_a_conflict(workers, forwarded):
+    owner, other = await workers(), await workers()
+    session_id = await create_session(owner)
+
+    async with _client(other) as client:
+        response = await client.post(f"/api/chat/{session_id}/complete", json={"message": "hi"})
+    assert response.status_code == 409
+    assert forwarded == []
@@ -0,0 +1,207 @@
+"""
+StateStore conformance: every backend behaves the same for what SessionManager relies on
+
+Redis runs when REDIS_TEST_URL (default redis://localhost:6379/15) is reachable
+and is skipped otherwise. Each test gets the store and a second worker's view
+of it: the same backing store if it is shared, else an unrelated one.
+"""
+
+import asyncio
+import os
+import uuid
+from datetime import timedelta
+from typing import Dict
+
+import pytest
+from core.memory_store import InMemoryStateStore
+from core.redis_client import RedisClient
+from core.sqlite_store import SQLiteStateStore
+from core.wal_store import WALStateStore
+from memory.group_memory import GroupMemory
+from models.schemas import CollaborationEvent, Message, MessageType, Session, SynapseConnection, SynapseType
+
+REDIS_TEST_URL = os.getenv("REDIS_TEST_URL", "redis://localhost:6379/15")
+
+
+def _memory(session_id: str, n_messages: int) -> GroupMemory:
+    """GroupMemory with n messages and one synapse/event per six messages"""
+    memory = GroupMemory(session_id)
+    for i in range(n_messages):
+        speaker = ("analyst", "critic", "builder")[i % 3]
+        memory.messages.append(Message(session_id=session_id, content=f"Point {i} from the {speaker}",
+                                       message_type=MessageType.RESPONSE, model_source=speaker))
+        if i % 6 == 5:
+            memory.synapse_connections.append(SynapseConnection(
+                from_message_id=memory.messages[i - 1].id, to_message_id=memory.messages[i].id,
+                synapse_type=SynapseType.BUILDING, strength=0.7))
+            memory.collaboration_events.append(CollaborationEvent(
+                session_id=session_id, event_type="synapse_formed",
+                involved_models=[speaker], description="test"))
+    return memory
+
+
+def _session() -> Session:
+    return Session(id=f"test-{uuid.uuid4()}", mission="state store conformance", panelist_configs=[])
+
+
+def _restored(state: Dict) -> GroupMemory:
+    memory = GroupMemory(state["session_id"])
+    memory.from_dict(state)
+    return memory
+
+
+@pytest.fixture(params=["memory", "sqlite", "wal", "redis"])
+async def stores(request, tmp_path):
+    factory = {
+        "memory": InMemoryStateStore,
+        "sqlite": lambda: SQLiteStateStore(str(tmp_path / "state.db")),
+        "wal": lambda: WALStateStore(str(tmp_path / "wal"), fsync=False),
+        "redis": lambda: RedisClient(REDIS_TEST_URL),
+    }[request.param]
+    store = factory()
+    if not await store.connect():
+        pytest.skip(f"{request.param} state store unavailable")
+    other = factory() if store.shared else InMemoryStateStore()
+    await other.connect()
+    other.worker_id = f"{store.worker_id}-other"
+    yield store, other
+    await other.disconnect()
+    await store.disconnect()
+
+
+async def test_round_trip(stores):
+    store, _ = stores
+    session = _session()
+    memory = _memory(session.id, 20)
+    versions = []
+    store.write_listeners.append(lambda sid, version: versions.append(version))
+    assert await store.save_session_with_memory(session, memory.take_delta())
+
+    loaded, state, version = await store.get_session_with_memory(session.id)
+    assert loaded.id == session.id and loaded.mission == session.mission
+    assert version == versions[-1], "version stamp is the last write's"
+    restored = _restored(state)
+    assert [m.id for m in restored.messages] == [m.id for m in memory.messages]
+    assert [s.id for s in restored.synapse_connections] == [s.id for s in memory.synapse_connections]
+    assert len(restored.collaboration_events) == len(memory.collaboration_events)
+    assert session.id in await store.get_active_sessions()
+    await store.delete_session(session.id)
+
+
+async def test_append_order(stores):
+    store, _ = stores
+    session = _session()
+    memory = _memory(session.id, 0)
+    await store.save_session_with_memory(session, memory.take_delta())
+    full = _memory(session.id, 30)
+    for start in range(0, 30, 7):
+        memory.messages.extend(full.messages[start:start + 7])
+        memory.context_summary = f"after {start}"
+        assert await store.append_memory_delta(session.id, memory.take_delta())
+
+    state = await store.get_memory_state(session.id)
+    assert [m.id for m in _restored(state).messages] == [m.id for m in full.messages]
+    assert state["context_summary"] == "after 28"
+    await store.delete_session(session.id)
+
+
+async def test_batch_load(stores):
+    store, _ = stores
+    sessions = [_session() for _ in range(3)]
+    for session in sessions:
+        await store.save_session(session)
+    loaded = await store.get_sessions([s.id for s in sessions] + ["test-missing"])
+    assert sorted(loaded) == sorted(s.id for s in sessions), "missing sessions are omitted"
+    await store.delete_sessions([s.id for s in sessions])
+
+
+async def test_replace_memory(stores):
+    store, _ = stores
+    session = _session()
+    await store.save_session_with_memory(session, _memory(session.id, 12).take_delta())
+    replacement = _memory(session.id, 4)
+    replacement.context_summary = "replaced"
+    assert await store.save_memory_state(session.id, replacement.to_dict())
+
+    state = await store.get_memory_state(session.id)
+    assert [m.id for m in _restored(state).messages] == [m.id for m in replacement.messages]
+    assert state["context_summary"] == "replaced"
+    await store.delete_session(session.id)
+
+
+async def test_delete(stores):
+    store, _ = stores
+    session = _session()
+    await store.save_session_with_memory(session, _memory(session.id, 5).take_delta())
+    await store.save_orchestrator_state(session.id, {"turn": 3})
+    assert await store.get_orchestrator_state(session.id) == {"turn": 3}
+    await store.acquire_lease(session.id, timedelta(seconds=30))
+
+    assert await store.delete_session(session.id)
+    assert await store.get_session(session.id) is None
+    assert await store.get_memory_state(session.id) is None
+    assert await store.get_orchestrator_state(session.id) is None
+    assert await store.get_lease_owner(session.id) is None
+    assert session.id not in await store.get_active_sessions()
+
+
+async def test_leases(stores):
+    store, other = stores
+    session_id = f"test-{uuid.uuid4()}"
+    ttl = timedelta(seconds=30)
+    assert await store.acquire_lease(session_id, ttl) == store.worker_id
+    assert await store.acquire_lease(session_id, ttl) == store.worker_id, "re-acquiring refreshes"
+    assert await store.renew_leases([session_id, "test-missing"], ttl) == [session_id]
+    if store.shared:
+        assert await other.acquire_lease(session_id, ttl) == store.worker_id, "held lease is not taken"
+        assert await other.renew_leases([session_id], ttl) == []
+        assert await other.release_leases([session_id]) == []
+
+    assert await store.release_leases([session_id]) == [session_id]
+    assert await other.acquire_lease(session_id, ttl) == other.worker_id
+    await other.release_leases([session_id])
+
+    short = timedelta(milliseconds=50)
+    assert await store.acquire_lease(session_id, short) == store.worker_id
+    await asyncio.sleep(0.1)
+    assert await store.get_lease_owner(session_id) is None, "leases expire"
+    await store.delete_session(session_id)
+
+
+async def test_workers(stores):
+    store, other = stores
+    assert await store.register_worker("http://10.0.0.5:8000", timedelta(seconds=30))
+    assert await store.get_worker_url(store.worker_id) == "http://10.0.0.5:8000"
+    if store.shared:
+        assert await other.get_worker_url(store.worker_id) == "http://10.0.0.5:8000"
+
+
+async def test_memory_deltas_keep_the_session_alive(stores):
+    store, _ = stores
+    store.SESSION_TTL = timedelta(seconds=1)
+    session = _session()
+    memory = _memory(session.id, 2)
+    await store.save_session_with_memory(session, memory.take_delta())
+    await asyncio.sleep(0.6)
+    memory.messages.extend(_memory(session.id, 1).messages)
+    assert await store.append_memory_delta(session.id, memory.take_delta())
+    await asyncio.sleep(0.6)
+    assert await store.get_session(session.id) is not None, "a session in use outlives its first TTL"
+    await store.delete_session(session.id)
+
+
+async def test_reads_wait_for_uncommitted_sqlite_writes(tmp_path):
+    store = SQLiteStateStore(str(tmp_path / "state.db"))
+    await store.connect()
+    session = _session()
+    try:
+        async with store._transaction_lock:
+            await store._db.execute("BEGIN IMMEDIATE")
+            await store._db.execute(*store._session_statement(session))
+            read = asyncio.create_task(store.get_session(session.id))
+            await asyncio.sleep(0.05)
+            assert not read.done(), "reads wait for the write transaction"
+            await store._db.execute("ROLLBACK")
+        assert await read is None, "a rolled back write is never seen"
+    finally:
+        await store.disconnect()
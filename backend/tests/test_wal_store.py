@@ -0,0 +1,197 @@
+"""WAL state store: replay on startup, torn-tail truncation and snapshot compaction"""
+
+import asyncio
+import os
+import uuid
+
+import pytest
+from core.wal_store import WALStateStore, encode_frame, read_frames, OP_SESSION, OP_DELETE
+from memory.group_memory import GroupMemory
+from models.schemas import Message, MessageType, Session
+
+
+def _session() -> Session:
+    return Session(id=f"test-{uuid.uuid4()}", mission="wal recovery", panelist_configs=[])
+
+
+def _turn(memory: GroupMemory, n: int, start: int = 0):
+    for i in range(start, start + n):
+        memory.messages.append(Message(session_id=memory.session_id, content=f"message {i}",
+                                       message_type=MessageType.RESPONSE, model_source="analyst"))
+    return memory.take_delta()
+
+
+async def _open(directory, **kwargs) -> WALStateStore:
+    store = WALStateStore(str(directory), fsync=False, **kwargs)
+    assert await store.connect()
+    return store
+
+
+def _log_path(store: WALStateStore) -> str:
+    return store._path("wal", store.generation)
+
+
+async def test_replays_writes_after_restart(tmp_path):
+    store = await _open(tmp_path)
+    kept, deleted = _session(), _session()
+    memory = GroupMemory(kept.id)
+    await store.save_session_with_memory(kept, _turn(memory, 3))
+    await store.append_memory_delta(kept.id, _turn(memory, 4, start=3))
+    await store.save_orchestrator_state(kept.id, {"turn": 2})
+    await store.save_session(deleted)
+    await store.delete_session(deleted.id)
+    await store.disconnect()
+
+    store = await _open(tmp_path)
+    try:
+        loaded, state, _ = await store.get_session_with_memory(kept.id)
+        assert loaded.mission == kept.mission
+        assert [m["content"] if isinstance(m, dict) else m.content for m in state["messages"]] == \
+            [m.content for m in memory.messages]
+        assert await store.get_orchestrator_state(kept.id) == {"turn": 2}
+        assert await store.get_session(deleted.id) is None
+        assert store.recovery["sessions"] == 1
+    finally:
+        await store.disconnect()
+
+
+@pytest.mark.parametrize("tail", [
+    b"\x00\x00",                                          # torn frame header
+    encode_frame(OP_SESSION, "torn", b"x" * 64)[:-10],    # torn payload
+])
+async def test_torn_tail_is_truncated(tmp_path, tail):
+    store = await _open(tmp_path)
+    session = _session()
+    memory = GroupMemory(session.id)
+    await store.save_session_with_memory(session, _turn(memory, 2))
+    path = _log_path(store)
+    await store.disconnect()
+
+    valid_size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(tail)
+
+    store = await _open(tmp_path)
+    assert os.path.getsize(path) == valid_size, "the torn tail is cut off"
+    assert await store.get_session(session.id) is not None
+    # Writes after recovery append to a clean log and survive the next restart
+    await store.append_memory_delta(session.id, _turn(memory, 1, start=2))
+    await store.disconnect()
+
+    store = await _open(tmp_path)
+    try:
+        state = await store.get_memory_state(session.id)
+        assert len(state["messages"]) == 3
+    finally:
+        await store.disconnect()
+
+
+async def test_replay_stops_at_corrupt_frame(tmp_path):
+    store = await _open(tmp_path)
+    first, second = _session(), _session()
+    await store.save_session(first)
+    path = _log_path(store)
+    await store.disconnect()
+    corrupt_at = os.path.getsize(path)
+
+    store = await _open(tmp_path)
+    await store.save_session(second)
+    await store.disconnect()
+    with open(path, "r+b") as f:
+        f.seek(corrupt_at + 12)
+        byte = f.read(1)
+        f.seek(corrupt_at + 12)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    store = await _open(tmp_path)
+    try:
+        assert await store.get_session(first.id) is not None
+        assert await store.get_session(second.id) is None, "nothing after a checksum mismatch is applied"
+        assert os.path.getsize(path) == corrupt_at
+    finally:
+        await store.disconnect()
+
+
+async def test_recovers_from_snapshot_and_later_log(tmp_path):
+    store = await _open(tmp_path)
+    sessions = [_session() for _ in range(3)]
+    for session in sessions[:2]:
+        await store.save_session(session)
+    await store.compact()
+    await store.save_session(sessions[2])
+    await store.delete_session(sessions[0].id)
+    await store.disconnect()
+    assert store._generations("snapshot") == [1]
+    assert store._generations("wal") == [1], "logs before the snapshot are removed"
+
+    store = await _open(tmp_path)
+    try:
+        assert await store.get_session(sessions[0].id) is None
+        assert await store.get_session(sessions[1].id) is not None
+        assert await store.get_session(sessions[2].id) is not None
+    finally:
+        await store.disconnect()
+
+
+async def test_writes_during_automatic_compaction_are_acknowledged(tmp_path):
+    # Every write crosses the threshold, so compactions close writers with flushes in flight
+    store = await _open(tmp_path, compact_bytes=1)
+    sessions = [_session() for _ in range(10)]
+    for session in sessions:
+        assert await asyncio.wait_for(store.save_session(session), timeout=5)
+    await asyncio.wait_for(store.disconnect(), timeout=5)
+    assert store.generation > 0
+
+    store = await _open(tmp_path)
+    try:
+        assert sorted(await store.get_sessions([s.id for s in sessions])) == sorted(s.id for s in sessions)
+    finally:
+        await store.disconnect()
+
+
+def _fail_next_write(store: WALStateStore):
+    write = store._writer._write
+
+    def failing(data):
+        store._writer._write = write
+        raise OSError("disk full")
+    store._writer._write = failing
+
+
+async def test_failed_delta_is_undone_so_a_retry_is_stored_once(tmp_path):
+    store = await _open(tmp_path)
+    session = _session()
+    memory = GroupMemory(session.id)
+    try:
+        await store.save_session_with_memory(session, _turn(memory, 2))
+        _fail_next_write(store)
+        delta = _turn(memory, 3, start=2)
+        assert not await store.append_memory_delta(session.id, delta)
+        assert len((await store.get_memory_state(session.id))["messages"]) == 2
+
+        memory.restore_delta(delta)
+        assert await store.append_memory_delta(session.id, memory.take_delta())
+        contents = [m.content for m in (await store.get_memory_state(session.id))["messages"]]
+        assert contents == [f"message {i}" for i in range(5)]
+    finally:
+        await store.disconnect()
+
+
+async def test_failed_delete_is_undone(tmp_path):
+    store = await _open(tmp_path)
+    session = _session()
+    try:
+        await store.save_session_with_memory(session, _turn(GroupMemory(session.id), 1))
+        _fail_next_write(store)
+        assert not await store.delete_session(session.id)
+        assert await store.get_session(session.id) is not None
+        assert len((await store.get_memory_state(session.id))["messages"]) == 1
+    finally:
+        await store.disconnect()
+
+
+def test_read_frames_stops_before_incomplete_frame():
+    frames = encode_frame(OP_SESSION, "a", b"one") + encode_frame(OP_DELETE, "b", None)
+    records = list(read_frames(frames + frames[:5]))
+    assert [(op, session_id) for op, session_id, _, _ in records] == [(OP_SESSION, "a"), (OP_DELETE, "b")]
+    assert records[-1][3] == len(frames)